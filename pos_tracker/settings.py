@@ -69,7 +69,6 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "tracker.middleware.TimezoneMiddleware",  # Custom middleware
-    "tracker.middleware.AutoProgressOrdersMiddleware",  # Auto-progress orders
 ]
 
 ROOT_URLCONF = "pos_tracker.urls"
@@ -185,6 +184,11 @@ if not DEBUG:
 APSCHEDULER_DATETIME_FORMAT = "N j, Y, f:s a"
 APSCHEDULER_RUN_NOW_TIMEOUT = 25  # Seconds
 
+# Audit log (tracker.utils.audit): buffered bulk writes and retention
+AUDIT_LOG_FLUSH_SIZE = int(os.environ.get('AUDIT_LOG_FLUSH_SIZE', '50'))
+AUDIT_LOG_FLUSH_INTERVAL = int(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', '5'))  # Seconds
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', '180'))
+
 # Logging configuration
 LOGGING = {
     'version': 1,
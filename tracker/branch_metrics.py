@@ -1,7 +1,9 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db.models import Count, Sum
 from django.http import JsonResponse, HttpRequest
 from django.utils import timezone
-from .models import Branch, Order, Customer
+from .models import Branch, Customer, DailyBranchMetrics
+from .utils.mysql_compat import between_dates
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_staff)
@@ -27,24 +29,36 @@ def api_branch_metrics(request: HttpRequest):
         b = getattr(getattr(request.user, 'profile', None), 'branch', None)
         branches = Branch.objects.filter(id=b.id) if b else Branch.objects.none()
 
+    # Order counts come from the daily rollup: one grouped query over the days in range
+    order_counts = {}
+    rollup = (
+        DailyBranchMetrics.objects.filter(branch__in=branches, day__gte=start_date, day__lte=end_date)
+        .values('branch_id', 'status')
+        .annotate(n=Sum('order_count'))
+        .order_by()
+    )
+    for row in rollup:
+        order_counts.setdefault(row['branch_id'], {})[row['status']] = row['n'] or 0
+    new_customers = dict(
+        Customer.objects.filter(between_dates('registration_date', start_date, end_date), branch__in=branches)
+        .values('branch_id')
+        .annotate(n=Count('id'))
+        .order_by()
+        .values_list('branch_id', 'n')
+    )
+
     data = []
     for b in branches:
-        oqs = Order.objects.filter(branch=b, created_at__date__gte=start_date, created_at__date__lte=end_date)
-        cqs = Customer.objects.filter(branch=b, registration_date__date__gte=start_date, registration_date__date__lte=end_date)
-        total = oqs.count()
-        completed = oqs.filter(status='completed').count()
-        in_progress = oqs.filter(status__in=['created','in_progress']).count()
-        cancelled = oqs.filter(status='cancelled').count()
-        overdue = oqs.filter(status='overdue').count()
+        counts = order_counts.get(b.id, {})
         data.append({
             'branch': {'id': b.id, 'name': b.name, 'code': b.code, 'region': b.region},
             'totals': {
-                'orders': total,
-                'completed': completed,
-                'in_progress': in_progress,
-                'cancelled': cancelled,
-                'overdue': overdue,
-                'new_customers': cqs.count(),
+                'orders': sum(counts.values()),
+                'completed': counts.get('completed', 0),
+                'in_progress': counts.get('created', 0) + counts.get('in_progress', 0),
+                'cancelled': counts.get('cancelled', 0),
+                'overdue': counts.get('overdue', 0),
+                'new_customers': new_customers.get(b.id, 0),
             }
         })
     return JsonResponse({'period': period, 'start': start_date.isoformat(), 'end': end_date.isoformat(), 'branches': data})
@@ -4,17 +4,7 @@ from .models import Order
 
 
 def header_notifications(request):
-    """Provide header notification metrics for stale in-progress orders (>24h).
-    Uses values computed by AutoProgressOrdersMiddleware when available to avoid extra queries.
-    """
-    count = getattr(request, 'stale_in_progress_count', None)
-    items = getattr(request, 'stale_in_progress_list', None)
-    if count is not None and items is not None:
-        return {
-            'stale_in_progress_count': count,
-            'stale_in_progress_orders': items,
-        }
-
+    """Provide header notification metrics for stale in-progress orders (>24h)."""
     try:
         from .utils import scope_queryset
         cutoff = timezone.now() - timedelta(hours=24)
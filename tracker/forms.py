@@ -1339,5 +1339,15 @@ class LabourCodeCSVImportForm(forms.Form):
             'class': 'form-check-input'
         }),
         label='Clear existing codes before importing',
-        help_text='Check this to delete all existing labour codes before importing new ones'
+        help_text='Check this to delete existing labour codes that are not in the imported file'
+    )
+
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=False,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input'
+        }),
+        label='Dry run',
+        help_text='Only report what the import would create, update and delete'
     )
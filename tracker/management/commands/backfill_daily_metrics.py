@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker.services import MetricsService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyBranchMetrics rollup from orders and invoices for a range of days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD, default: first order/invoice day)")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD, default: today)")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Rebuild only the last N days ending today (overrides --start/--end)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["days"]:
+            end = today
+            start = today - timezone.timedelta(days=options["days"] - 1)
+        else:
+            end = self._parse(options["end"]) or today
+            start = self._parse(options["start"]) or MetricsService.first_activity_day()
+        if not start:
+            self.stdout.write("No orders or invoices found; nothing to rebuild.")
+            return
+        if start > end:
+            raise CommandError(f"--start {start} is after --end {end}")
+
+        written = MetricsService.rebuild_range(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt daily metrics for {(end - start).days + 1} day(s) ({start} to {end}): {written} row(s)."
+        ))
+
+    @staticmethod
+    def _parse(value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max
+
+from tracker.models import Invoice, Order, Vehicle
+from tracker.utils.plate_utils import normalize_plate, plate_from_reference
+from tracker.utils.time_utils import OVERDUE_THRESHOLD_HOURS
+
+
+class Command(BaseCommand):
+    help = (
+        "Populate persisted derived columns (Order.overdue_at, Invoice.reference_plate, Vehicle.plate_key) "
+        "for rows written before they existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of primary keys covered by each UPDATE batch (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        updated = self._backfill_order_deadlines(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Order.overdue_at populated for {updated} order(s)."))
+        updated = self._backfill_computed(Invoice, 'reference', 'reference_plate', plate_from_reference, batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Invoice.reference_plate updated for {updated} invoice(s)."))
+        updated = self._backfill_computed(Vehicle, 'plate_number', 'plate_key', normalize_plate, batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Vehicle.plate_key updated for {updated} vehicle(s)."))
+
+    def _backfill_order_deadlines(self, batch_size):
+        threshold = timedelta(hours=OVERDUE_THRESHOLD_HOURS)
+        max_id = Order.objects.aggregate(m=Max('id'))['m'] or 0
+        updated = 0
+        # Walk the primary key range so each UPDATE holds its locks only briefly
+        for start in range(0, max_id + 1, batch_size):
+            with transaction.atomic():
+                pending = Order.objects.filter(id__gte=start, id__lt=start + batch_size, overdue_at__isnull=True)
+                updated += pending.filter(started_at__isnull=False).update(overdue_at=F('started_at') + threshold)
+                updated += pending.filter(started_at__isnull=True).update(overdue_at=F('created_at') + threshold)
+        return updated
+
+    def _backfill_computed(self, model, source, target, compute, batch_size):
+        # Values computed in Python (e.g. regex based plate parsing) are read in primary-key
+        # batches and only the rows whose stored value differs are written back
+        max_id = model.objects.aggregate(m=Max('id'))['m'] or 0
+        updated = 0
+        for start in range(0, max_id + 1, batch_size):
+            rows = model.objects.filter(id__gte=start, id__lt=start + batch_size).values_list('id', source, target)
+            changed = [
+                model(id=pk, **{target: compute(value)})
+                for pk, value, stored in rows
+                if compute(value) != stored
+            ]
+            if changed:
+                model.objects.bulk_update(changed, [target], batch_size=500)
+                updated += len(changed)
+        return updated
@@ -0,0 +1,91 @@
+import time
+from io import BytesIO
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw
+
+from tracker.utils import pdf_signature
+
+
+def convert_to_blue_ink_pixelwise(signature_image: Image.Image) -> Image.Image:
+    """The former per-pixel blue ink conversion, kept as the benchmark baseline and reference."""
+    if signature_image.mode != 'RGBA':
+        signature_image = signature_image.convert('RGBA')
+    width, height = signature_image.size
+    blue_ink_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    sig_pixels = signature_image.load()
+    blue_pixels = blue_ink_image.load()
+    blue_colors = [(0, 50, 200), (30, 80, 220), (60, 120, 255)]
+    for x in range(width):
+        for y in range(height):
+            r, g, b, a = sig_pixels[x, y]
+            if a > 30:
+                intensity = (r + g + b) / 3
+                if intensity < 85:
+                    blue_color = blue_colors[0]
+                elif intensity < 170:
+                    blue_color = blue_colors[1]
+                else:
+                    blue_color = blue_colors[2]
+                blue_pixels[x, y] = (blue_color[0], blue_color[1], blue_color[2], min(255, int(a * 1.2)))
+    return blue_ink_image
+
+
+def sample_signature(width: int, height: int) -> bytes:
+    """A tablet-style capture: a transparent canvas with a stroke in its middle third."""
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    rng = np.random.default_rng(0)
+    xs = np.linspace(width * 0.3, width * 0.7, 40)
+    ys = height * 0.5 + rng.normal(0, height * 0.05, xs.size)
+    draw.line(list(zip(xs.tolist(), ys.tolist())), fill=(20, 20, 20, 255), width=max(2, width // 200))
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Compare signature processing time of the former per-pixel path against the current one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Signature image to process (default: a generated canvas)")
+        parser.add_argument("--width", type=int, default=1600, help="Width of the generated canvas")
+        parser.add_argument("--height", type=int, default=600, help="Height of the generated canvas")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best time is reported")
+
+    def handle(self, *args, **options):
+        if options["file"]:
+            try:
+                with open(options["file"], "rb") as fh:
+                    data = fh.read()
+            except OSError as exc:
+                raise CommandError(f"Could not read {options['file']}: {exc}")
+        else:
+            data = sample_signature(options["width"], options["height"])
+        repeat = max(1, options["repeat"])
+
+        def former():
+            image = Image.open(BytesIO(data)).convert('RGBA')
+            image = pdf_signature._enhance_signature_for_pen_effect(image)
+            return convert_to_blue_ink_pixelwise(image)
+
+        def current():
+            image = Image.open(BytesIO(data)).convert('RGBA')
+            image = pdf_signature._trim_to_ink(image)
+            image = pdf_signature._enhance_signature_for_pen_effect(image)
+            return pdf_signature._convert_to_blue_ink(image)
+
+        results = {}
+        for label, func in (("per-pixel", former), ("numpy+trim", current)):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                out = func()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = best
+            self.stdout.write(f"{label:>11}: {best * 1000:8.1f} ms  -> {out.width}x{out.height}")
+
+        speedup = results["per-pixel"] / results["numpy+trim"] if results["numpy+trim"] else float("inf")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {speedup:.1f}x"))
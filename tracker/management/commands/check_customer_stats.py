@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from tracker.models import Customer
+from tracker.services import CustomerStatsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare CustomerStats rows with order, vehicle and invoice history and report customers "
+        "whose stored figures drifted. With --fix the drifted rows are rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, help="Only check customers of this branch id")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of customers compared per batch (default: 500)",
+        )
+        parser.add_argument("--fix", action="store_true", help="Rebuild the rows that drifted")
+        parser.add_argument("--show", type=int, default=20, help="Drifted customers listed in detail (default: 20)")
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.all()
+        if options["branch"]:
+            customers = customers.filter(branch_id=options["branch"])
+        drifted = CustomerStatsService.check(customers, batch_size=max(1, options["batch_size"]), fix=options["fix"])
+
+        for entry in drifted[:options["show"]]:
+            details = ", ".join(f"{field}: {stored} != {actual}" for field, (stored, actual) in entry["fields"].items())
+            self.stdout.write(f"Customer {entry['customer_id']}: {details}")
+        if len(drifted) > options["show"]:
+            self.stdout.write(f"... and {len(drifted) - options['show']} more")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Customer stats are consistent."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {len(drifted)} drifted customer(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drifted)} customer(s) drifted; run with --fix or rebuild_customer_stats to repair."
+            ))
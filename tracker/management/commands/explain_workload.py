@@ -0,0 +1,95 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, InvoiceLineItem, Order, Vehicle
+from tracker.services import CustomerGroupService
+from tracker.utils.mysql_compat import between_dates, on_date
+
+# Composite indexes designed for the workload below, by table
+WORKLOAD_INDEXES = {
+    Order: ['idx_order_branch_created', 'idx_order_branch_status', 'idx_order_vehicle_status', 'idx_order_branch_updated', 'idx_order_updated', 'idx_order_customer_created'],
+    Invoice: ['idx_invoice_branch_date', 'idx_invoice_customer_date'],
+    InvoiceLineItem: ['idx_line_invoice_type'],
+    Customer: ['idx_cust_branch_name'],
+}
+
+
+def workload(branch, vehicle):
+    """(label, queryset) pairs mirroring the hot list/KPI queries of the views."""
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    invoices = Invoice.objects.filter(branch=branch, invoice_date__gte=month_start, invoice_date__lte=today)
+    return [
+        ('orders_list page', Order.objects.filter(branch=branch).order_by('-created_at', '-id')[:21]),
+        ('started board', Order.objects.filter(branch=branch, status__in=['created', 'in_progress']).order_by('-created_at')[:200]),
+        ('KPI: created today by status', Order.objects.filter(on_date('created_at', today), branch=branch, status='created').values('type').annotate(n=Count('id'))),
+        ('KPI: completed this week', Order.objects.filter(between_dates('created_at', today - timedelta(days=6), today), branch=branch, status='completed')),
+        ('vehicle history', Order.objects.filter(vehicle=vehicle, status='completed').order_by('-created_at')[:20]),
+        ('order change feed', Order.objects.filter(branch=branch, updated_at__gte=timezone.now() - timedelta(minutes=5)).order_by('updated_at', 'id')[:200]),
+        ('started board changes (all branches)', Order.objects.filter(updated_at__gte=timezone.now() - timedelta(minutes=5)).values('id')[:1]),
+        ('invoices this month', invoices.order_by('-invoice_date')[:50]),
+        ('revenue by order type', InvoiceLineItem.objects.filter(invoice__in=invoices.order_by().values('id')).values('order_type').annotate(total=Sum('line_total')).order_by()),
+        ('customer dropdown', Customer.objects.filter(branch=branch).order_by('full_name', 'id')[:50]),
+        ('customer group rows', CustomerGroupService.annotate_rows(
+            Customer.objects.filter(branch=branch, customer_type='personal'),
+            CustomerGroupService.period_window('6months'), ['recent_orders_count'],
+        ).order_by('-recent_orders_count', 'id').values('id')[:25]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN plans for representative list/KPI queries. Save the output before applying "
+        "index migrations (--save) and compare after (--compare) to see which plans changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, help="Branch id the queries are scoped to (default: first branch)")
+        parser.add_argument("--save", metavar="PATH", help="Also write the plans to PATH as JSON")
+        parser.add_argument("--compare", metavar="PATH", help="Compare with plans saved earlier with --save")
+
+    def handle(self, *args, **options):
+        branch = Branch.objects.filter(pk=options["branch"]).first() if options["branch"] else Branch.objects.order_by("id").first()
+        if branch is None:
+            raise CommandError("No branch found; pass --branch or create one first.")
+        vehicle = Vehicle.objects.filter(customer__branch=branch).order_by("id").first() or Vehicle(pk=0)
+
+        self._report_indexes()
+        before = {}
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                before = json.load(fh)
+
+        plans = {}
+        for label, qs in workload(branch, vehicle):
+            plans[label] = qs.explain()
+            previous = before.get(label)
+            if previous is None:
+                marker = ""
+            elif previous == plans[label]:
+                marker = " (unchanged)"
+            else:
+                marker = self.style.WARNING(" (changed)")
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}{marker}"))
+            if previous is not None and previous != plans[label]:
+                self.stdout.write("-- before:\n" + previous + "\n-- after:")
+            self.stdout.write(plans[label])
+
+        if options["save"]:
+            with open(options["save"], "w") as fh:
+                json.dump(plans, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nSaved {len(plans)} plan(s) to {options['save']}"))
+
+    def _report_indexes(self):
+        with connection.cursor() as cursor:
+            for model, names in WORKLOAD_INDEXES.items():
+                table = model._meta.db_table
+                existing = set(connection.introspection.get_constraints(cursor, table))
+                for name in names:
+                    state = self.style.SUCCESS("present") if name in existing else self.style.WARNING("missing")
+                    self.stdout.write(f"{table}.{name}: {state}")
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.utils import prune_audit_events
+
+
+class Command(BaseCommand):
+    help = "Roll up audit events older than the retention window into daily counts and delete them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "AUDIT_LOG_RETENTION_DAYS", 180),
+            help="Keep events newer than this many days (default: AUDIT_LOG_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of events rolled up and deleted per transaction (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        removed = prune_audit_events(options["days"], batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Pruned {removed} audit event(s) older than {options['days']} day(s)."))
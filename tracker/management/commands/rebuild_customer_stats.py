@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from tracker.models import Customer
+from tracker.services import CustomerStatsService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CustomerStats table (order counts, vehicles, spend) from order, vehicle and invoice history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, help="Only rebuild customers of this branch id")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of customers recomputed per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.all()
+        if options["branch"]:
+            customers = customers.filter(branch_id=options["branch"])
+        written = CustomerStatsService.rebuild_all(customers, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt customer stats for {written} customer(s)."))
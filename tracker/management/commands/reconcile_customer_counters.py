@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tracker.models import Customer
+from tracker.services import CustomerService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Customer.total_visits (distinct days with an order) and Customer.total_spent "
+        "(non-cancelled invoices) from order and invoice history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, help="Only reconcile customers of this branch id")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of customers recomputed per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.all()
+        if options["branch"]:
+            customers = customers.filter(branch_id=options["branch"])
+        corrected = CustomerService.reconcile_counters(customers, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Corrected visit/spend counters for {corrected} customer(s)."))
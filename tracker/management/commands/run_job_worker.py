@@ -0,0 +1,55 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tracker.services import JobService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (invoice extraction, document signing). Several workers may run side by side."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty (default: 1)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run all currently queued jobs and exit",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=None,
+            help="Exit after running this many jobs (lets a supervisor recycle the process)",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            ran = JobService.run_pending(max_jobs=options["max_jobs"])
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)."))
+            return
+
+        self.stdout.write(self.style.SUCCESS("Starting job worker…"))
+        JobService.requeue_stale()
+        ran = 0
+        try:
+            while options["max_jobs"] is None or ran < options["max_jobs"]:
+                close_old_connections()
+                job = JobService.claim_next()
+                if job is None:
+                    time.sleep(options["poll_seconds"])
+                    continue
+                JobService.run(job)
+                ran += 1
+                logger.info(f"Job #{job.pk} ({job.kind}) {job.status}")
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping job worker…")
+        self.stdout.write(self.style.SUCCESS(f"Job worker stopped after {ran} job(s)."))
@@ -0,0 +1,35 @@
+import logging
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_apscheduler.jobstores import DjangoJobStore
+
+from tracker.scheduler import register_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run the background scheduler (order status transitions and housekeeping jobs). Run as a single dedicated process."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sweep-seconds",
+            type=int,
+            default=60,
+            help="Interval in seconds between order status sweeps (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = BlockingScheduler(timezone=settings.TIME_ZONE)
+        scheduler.add_jobstore(DjangoJobStore(), "default")
+        register_jobs(scheduler, sweep_seconds=options["sweep_seconds"])
+
+        self.stdout.write(self.style.SUCCESS("Starting scheduler…"))
+        try:
+            scheduler.start()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping scheduler…")
+            scheduler.shutdown()
+            self.stdout.write(self.style.SUCCESS("Scheduler shut down successfully."))
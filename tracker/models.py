@@ -4,7 +4,6 @@ from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
 from decimal import Decimal
-import uuid
 
 
 class Branch(models.Model):
@@ -27,6 +26,43 @@ class Branch(models.Model):
         return f"{self.name}{r}"
 
 
+class NumberSequence(models.Model):
+    """
+    Named counters for human-readable document numbers (invoices, orders, customer codes).
+    Values are allocated with an atomic ``UPDATE ... SET last_value = last_value + 1`` so
+    allocation costs one row lock instead of scanning existing numbers.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.last_value}"
+
+    @classmethod
+    def next_value(cls, key: str, seed=None) -> int:
+        """
+        Allocate and return the next value for ``key``.
+        ``seed`` is an optional callable returning the value to continue from when the
+        counter does not exist yet (e.g. the highest number already in use).
+        The UPDATE runs first so the row lock is taken before reading; this also
+        serializes allocation on SQLite, where SELECT ... FOR UPDATE is a no-op.
+        """
+        from django.db import IntegrityError, transaction
+        from django.db.models import F
+
+        with transaction.atomic():
+            if not cls.objects.filter(key=key).update(last_value=F('last_value') + 1):
+                start = int(seed() if seed else 0) + 1
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(key=key, last_value=start)
+                    return start
+                except IntegrityError:
+                    # Another worker created the counter first; take the next value from it
+                    cls.objects.filter(key=key).update(last_value=F('last_value') + 1)
+            return cls.objects.filter(key=key).values_list('last_value', flat=True).get()
+
+
 class Customer(models.Model):
     TYPE_CHOICES = [
         ("government", "Government"),
@@ -69,14 +105,21 @@ class Customer(models.Model):
     total_visits = models.PositiveIntegerField(default=0)
     total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     last_visit = models.DateTimeField(blank=True, null=True)
+    # Basis for the customer APIs' ETag/Last-Modified validators
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = f"CUST{str(uuid.uuid4())[:8].upper()}"
+            # Sequence-backed code in the legacy CUSTXXXXXXXX shape; probe only guards against old random codes
+            self.code = f"CUST{NumberSequence.next_value('customer_code'):08X}"
             while Customer.objects.filter(code=self.code).exists():
-                self.code = f"CUST{str(uuid.uuid4())[:8].upper()}"
+                self.code = f"CUST{NumberSequence.next_value('customer_code'):08X}"
         if not self.arrival_time:
             self.arrival_time = timezone.now()
+        # Partial saves still count as a change to the row
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['updated_at']
         super().save(*args, **kwargs)
 
     def get_icon_for_customer_type(self):
@@ -103,6 +146,9 @@ class Customer(models.Model):
             models.Index(fields=["registration_date"], name="idx_cust_reg"),
             models.Index(fields=["last_visit"], name="idx_cust_lastvisit"),
             models.Index(fields=["customer_type"], name="idx_cust_type"),
+            models.Index(fields=["branch", "updated_at"], name="idx_cust_branch_updated"),
+            # Branch customer lists and the dropdown API, ordered by name
+            models.Index(fields=["branch", "full_name"], name="idx_cust_branch_name"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -115,6 +161,8 @@ class Customer(models.Model):
 class Vehicle(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="vehicles")
     plate_number = models.CharField(max_length=32)
+    # Canonical plate (upper case, no spaces/dashes) used for all lookups; kept in sync by save()
+    plate_key = models.CharField(max_length=32, blank=True, default="", editable=False)
     make = models.CharField(max_length=64, blank=True, null=True)
     model = models.CharField(max_length=64, blank=True, null=True)
     vehicle_type = models.CharField(max_length=64, blank=True, null=True)
@@ -122,10 +170,45 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"{self.plate_number} - {self.make or ''} {self.model or ''}"
 
+    def save(self, *args, **kwargs):
+        from .utils.plate_utils import normalize_plate
+        self.plate_key = normalize_plate(self.plate_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'plate_number' in update_fields and 'plate_key' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['plate_key']
+        super().save(*args, **kwargs)
+
     class Meta:
         indexes = [
             models.Index(fields=["customer"], name="idx_vehicle_customer"),
             models.Index(fields=["plate_number"], name="idx_vehicle_plate"),
+            models.Index(fields=["plate_key", "customer"], name="idx_vehicle_plate_key"),
+        ]
+
+
+class CustomerSearchToken(models.Model):
+    """
+    Inverted index for customer typeahead: one row per searchable token of a customer
+    (name and organization words, phone digit suffixes, email, code, plate keys), so a
+    search is a left-anchored range scan on ``token``. Maintained by CustomerSearchService.
+    """
+    FIELD_CHOICES = [
+        ("name", "Name"),
+        ("organization", "Organization"),
+        ("phone", "Phone"),
+        ("email", "Email"),
+        ("code", "Code"),
+        ("plate", "Plate"),
+    ]
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="search_tokens")
+    field = models.CharField(max_length=16, choices=FIELD_CHOICES)
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["token", "customer"], name="idx_custsearch_token"),
+            models.Index(fields=["field", "token"], name="idx_custsearch_field_token"),
         ]
 
 
@@ -201,6 +284,12 @@ class Order(models.Model):
     started_at = models.DateTimeField(blank=True, null=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     cancelled_at = models.DateTimeField(blank=True, null=True)
+    # Deadline after which an active order becomes overdue: (started_at or created_at) + OVERDUE_THRESHOLD_HOURS.
+    # Persisted so the status sweeper can mark overdue orders with one indexed UPDATE.
+    overdue_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Last write to the row; drives incremental refresh of the started-orders board.
+    # Set-based UPDATEs must set it explicitly.
+    updated_at = models.DateTimeField(auto_now=True)
 
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_orders")
 
@@ -253,6 +342,8 @@ class Order(models.Model):
         """Check if order is overdue (9+ working hours in progress)."""
         if self.status != 'in_progress' or not self.started_at:
             return False
+        if self.overdue_at:
+            return timezone.now() >= self.overdue_at
         from .utils.time_utils import is_order_overdue
         return is_order_overdue(self.started_at)
 
@@ -269,21 +360,31 @@ class Order(models.Model):
             models.Index(fields=["status"], name="idx_order_status"),
             models.Index(fields=["type"], name="idx_order_type"),
             models.Index(fields=["created_at"], name="idx_order_created"),
+            # Branch listing in (created_at, id) order for keyset pagination
+            models.Index(fields=["branch", "created_at", "id"], name="idx_order_branch_created"),
+            models.Index(fields=["status", "overdue_at"], name="idx_order_status_overdue"),
+            # Branch KPI/board filters: status plus a created_at range or ordering
+            models.Index(fields=["branch", "status", "created_at"], name="idx_order_branch_status"),
+            # Vehicle history and repeat-visit lookups
+            models.Index(fields=["vehicle", "status", "created_at"], name="idx_order_vehicle_status"),
+            # Branch-scoped change feed, read in (updated_at, id) order
+            models.Index(fields=["branch", "updated_at", "id"], name="idx_order_branch_updated"),
+            # Started-board polling (updated_at__gte) and change feeds across all branches
+            models.Index(fields=["updated_at", "id"], name="idx_order_updated"),
+            # Per-customer order aggregates over a created_at window (customer groups)
+            models.Index(fields=["customer", "created_at"], name="idx_order_customer_created"),
         ]
 
     def _generate_order_number(self) -> str:
-        """Generate a unique human-friendly order number."""
-        from uuid import uuid4
-
-        prefix = 'ORD'
-        base = timezone.now().strftime('%Y%m%d%H%M%S')
-        # Retry until unique to avoid collision under concurrent requests
-        for _ in range(5):
-            candidate = f"{prefix}{base}{uuid4().hex[:4].upper()}"
-            if not Order.objects.filter(order_number=candidate).exists():
-                return candidate
-        # Fallback to full UUID if repeated collisions occur
-        return f"{prefix}{uuid4().hex.upper()}"
+        """Generate a unique human-friendly order number.
+
+        Format: ORD + timestamp (to the second) + 4 hex digits taken from a yearly
+        sequence, so numbers are unique without probing as long as fewer than 65536
+        orders are created within the same second.
+        """
+        now = timezone.now()
+        seq = NumberSequence.next_value(f"order:{now.year}")
+        return f"ORD{now.strftime('%Y%m%d%H%M%S')}{seq % 0x10000:04X}"
 
     def save(self, *args, **kwargs):
         """Ensure order numbers exist and inquiries auto-complete."""
@@ -299,6 +400,15 @@ class Order(models.Model):
                 self.completion_date = now
             # Force status to completed
             self.status = 'completed'
+        # Keep the overdue deadline in sync with the timestamp it is derived from
+        from .utils.time_utils import compute_overdue_at
+        self.overdue_at = compute_overdue_at(self.started_at or self.created_at)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'started_at', 'created_at'} & set(update_fields) and 'overdue_at' not in update_fields:
+            kwargs['update_fields'] = update_fields = list(update_fields) + ['overdue_at']
+        # Partial saves still count as a change to the row
+        if update_fields is not None and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['updated_at']
         super().save(*args, **kwargs)
 
 
@@ -579,6 +689,8 @@ class Invoice(models.Model):
     due_date = models.DateField(blank=True, null=True)
     code_no = models.CharField(max_length=128, blank=True, null=True, help_text="Supplier/Invoice code number")
     reference = models.CharField(max_length=128, blank=True, null=True, help_text="Customer PO or reference number")
+    # Normalized plate number parsed from reference (see tracker.utils.plate_utils); kept in sync by save()
+    reference_plate = models.CharField(max_length=32, blank=True, null=True, editable=False)
 
     # Amounts
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -616,11 +728,25 @@ class Invoice(models.Model):
             models.Index(fields=['customer'], name='idx_invoice_customer'),
             models.Index(fields=['order'], name='idx_invoice_order'),
             models.Index(fields=['status'], name='idx_invoice_status'),
+            models.Index(fields=['branch', 'reference_plate', 'invoice_date'], name='idx_invoice_branch_plate'),
+            # Branch invoice lists and revenue KPIs over an invoice_date range
+            models.Index(fields=['branch', 'invoice_date'], name='idx_invoice_branch_date'),
+            # Per-customer spend over an invoice_date window (customer groups)
+            models.Index(fields=['customer', 'invoice_date'], name='idx_invoice_customer_date'),
         ]
 
     def __str__(self) -> str:
         return f"Invoice {self.invoice_number} - {self.customer.full_name}"
 
+    def save(self, *args, **kwargs):
+        """Keep the normalized reference plate in sync with reference."""
+        from .utils.plate_utils import plate_from_reference
+        self.reference_plate = plate_from_reference(self.reference)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'reference' in update_fields and 'reference_plate' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['reference_plate']
+        super().save(*args, **kwargs)
+
     def calculate_totals(self):
         """Recalculate totals from line items, considering per-item VAT"""
         line_items = self.line_items.all()
@@ -637,27 +763,34 @@ class Invoice(models.Model):
         self.total_amount = self.subtotal + self.tax_amount
         return self
 
-    def generate_invoice_number(self):
-        """Generate sequential invoice number"""
-        if self.invoice_number:
-            return self.invoice_number
-        from datetime import datetime
-        year = datetime.now().year
-        prefix = f"INV-{year}-"
-        existing = Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True)
+    @staticmethod
+    def _max_invoice_sequence(prefix: str) -> int:
+        """Highest numeric suffix among existing invoice numbers with ``prefix``.
+        Only used once per year to seed the sequence counter from legacy data."""
         max_seq = 0
-        for inv_no in existing:
+        for inv_no in Invoice.objects.filter(invoice_number__startswith=prefix).values_list('invoice_number', flat=True).iterator():
             try:
-                seq = int(inv_no.split(prefix)[1])
-                if seq > max_seq:
-                    max_seq = seq
+                max_seq = max(max_seq, int(inv_no.split(prefix)[1]))
             except Exception:
                 continue
-        next_seq = max_seq + 1
-        candidate = f"{prefix}{next_seq:05d}"
+        return max_seq
+
+    def generate_invoice_number(self):
+        """Generate sequential invoice number (INV-<year>-<seq>) from the yearly invoice counter.
+        Invoice numbers are unique across branches, so the counter is per year rather than per branch."""
+        if self.invoice_number:
+            return self.invoice_number
+        year = timezone.localdate().year
+        prefix = f"INV-{year}-"
+
+        def next_candidate():
+            seq = NumberSequence.next_value(f"invoice:{year}", seed=lambda: Invoice._max_invoice_sequence(prefix))
+            return f"{prefix}{seq:05d}"
+
+        candidate = next_candidate()
+        # Manually entered numbers can occupy a slot; skip past them
         while Invoice.objects.filter(invoice_number=candidate).exists():
-            next_seq += 1
-            candidate = f"{prefix}{next_seq:05d}"
+            candidate = next_candidate()
         self.invoice_number = candidate
         return self.invoice_number
 
@@ -704,6 +837,10 @@ class InvoiceLineItem(models.Model):
 
     class Meta:
         ordering = ['invoice', 'created_at']
+        indexes = [
+            # Per-invoice revenue split by order type
+            models.Index(fields=['invoice', 'order_type'], name='idx_line_invoice_type'),
+        ]
 
     def save(self, *args, **kwargs):
         # Only recalculate line_total if it wasn't explicitly set (from extraction)
@@ -835,3 +972,158 @@ class InquiryNote(models.Model):
 
     def __str__(self) -> str:
         return f"{self.get_note_type_display()} for Inquiry #{self.inquiry.id}"
+
+
+class AuditEvent(models.Model):
+    """Append-only audit trail of logins, logouts and data changes."""
+    timestamp = models.DateTimeField(default=timezone.now)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_events')
+    # Username snapshot so entries stay readable after the user is renamed or deleted ('system' for jobs)
+    username = models.CharField(max_length=150, blank=True, default='')
+    action = models.CharField(max_length=64, blank=True, default='')
+    description = models.TextField(blank=True, default='')
+    ip = models.CharField(max_length=64, blank=True, null=True)
+    meta = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['timestamp'], name='idx_audit_timestamp'),
+            models.Index(fields=['action', 'timestamp'], name='idx_audit_action_ts'),
+            models.Index(fields=['username', 'timestamp'], name='idx_audit_user_ts'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.timestamp:%Y-%m-%d %H:%M:%S} {self.username} {self.action}"
+
+
+class AuditEventRollup(models.Model):
+    """Daily per-action counts kept for audit events removed by retention pruning."""
+    day = models.DateField()
+    action = models.CharField(max_length=64, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'action']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'action'], name='uniq_audit_rollup_day_action'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.action}: {self.count}"
+
+
+class DailyBranchMetrics(models.Model):
+    """
+    Daily rollup per branch, order type and order status, maintained by MetricsService.
+    Orders are counted on their (local) creation day; invoice revenue is counted on its
+    invoice_date under the type/status of the linked order (blank when unlinked).
+    Cancelled invoices are excluded from revenue.
+    """
+    branch = models.ForeignKey('Branch', on_delete=models.CASCADE, null=True, blank=True, related_name='daily_metrics')
+    day = models.DateField()
+    order_type = models.CharField(max_length=32, blank=True, default='')
+    status = models.CharField(max_length=32, blank=True, default='')
+
+    order_count = models.PositiveIntegerField(default=0)
+    # Sum and count of Order.actual_duration (minutes) for averaging
+    duration_minutes = models.PositiveBigIntegerField(default=0)
+    duration_count = models.PositiveIntegerField(default=0)
+
+    invoice_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Gross (total_amount)")
+    net_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Net (subtotal)")
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day', 'branch_id', 'order_type', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'day', 'order_type', 'status'], name='uniq_daily_branch_metrics'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'branch'], name='idx_metrics_day_branch'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.branch_id} {self.order_type}/{self.status}: {self.order_count} orders, {self.revenue}"
+
+
+class CustomerStats(models.Model):
+    """
+    Per-customer order, vehicle and invoice aggregates, maintained by CustomerStatsService
+    so lists and exports read one flat row instead of joining the customer's history.
+    Rolling spend covers invoices dated from ``rolling_as_of`` minus N days through
+    ``rolling_as_of``; cancelled invoices are excluded from all spend figures.
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    order_count = models.PositiveIntegerField(default=0)
+    service_orders = models.PositiveIntegerField(default=0)
+    sales_orders = models.PositiveIntegerField(default=0)
+    inquiry_orders = models.PositiveIntegerField(default=0)
+    labour_orders = models.PositiveIntegerField(default=0)
+    completed_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    first_order_at = models.DateTimeField(null=True, blank=True)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+
+    vehicle_count = models.PositiveIntegerField(default=0)
+
+    invoice_count = models.PositiveIntegerField(default=0)
+    lifetime_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spend_30d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spend_90d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spend_180d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    spend_365d = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rolling_as_of = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Nightly roll-forward of the rolling spend windows
+            models.Index(fields=['rolling_as_of'], name='idx_custstats_rolling'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Stats for customer {self.customer_id}: {self.order_count} orders, {self.lifetime_spend}"
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of slow work (PDF extraction, signature embedding) queued by a request and run
+    by ``manage.py run_job_worker``. The request returns the job id immediately and the
+    client polls the job status endpoint for progress and the result.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete (0-100)")
+    payload = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='job_inputs/', blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='idx_job_status_created'),
+            models.Index(fields=['created_by', 'created_at'], name='idx_job_user_created'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Job #{self.pk} {self.kind} ({self.status})"
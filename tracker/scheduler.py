@@ -0,0 +1,136 @@
+"""
+Periodic background jobs run by ``manage.py run_scheduler`` (django_apscheduler).
+
+Jobs are plain functions wrapped with ``close_old_connections`` so a long-lived
+scheduler process never reuses a connection the database has already dropped.
+"""
+
+import logging
+
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django_apscheduler import util
+from django_apscheduler.models import DjangoJobExecution
+
+logger = logging.getLogger(__name__)
+
+
+@util.close_old_connections
+def order_status_sweep():
+    """Apply time-driven order status transitions (auto-progress, overdue)."""
+    from django.utils import timezone
+    from tracker.services import OrderStatusService
+    from tracker.utils import flush_audit_log
+
+    now = timezone.now()
+    results = OrderStatusService.run_transitions(now)
+    if any(results.values()):
+        logger.info(f"Order status sweep: {results}")
+        # Set-based status updates bypass model signals, so refresh the rollup and
+        # invalidate cached dashboards explicitly
+        from tracker.services import MetricsService
+        from tracker.utils.dashboard_cache import bump_dashboard_version
+        MetricsService.refresh_recent()
+        bump_dashboard_version()
+    if results['inquiries_completed']:
+        # Of the sweep's transitions only completing inquiries changes CustomerStats counts
+        from tracker.models import Order
+        from tracker.services import CustomerStatsService
+        CustomerStatsService.refresh_for_orders(
+            Order.objects.filter(type='inquiry', status='completed', updated_at__gte=now)
+        )
+    # No request cycle in the scheduler process, so flush buffered audit events here
+    flush_audit_log()
+
+
+@util.close_old_connections
+def prune_audit_events():
+    """Roll up and delete audit events older than AUDIT_LOG_RETENTION_DAYS."""
+    from tracker.utils import prune_audit_events as _prune
+
+    removed = _prune()
+    if removed:
+        logger.info(f"Pruned {removed} audit event(s)")
+
+
+@util.close_old_connections
+def reconcile_daily_metrics():
+    """Rebuild the daily metrics rollup for recent days to repair any missed refresh."""
+    from tracker.services import MetricsService
+    from tracker.services.metrics_service import RECONCILE_DAYS
+
+    MetricsService.refresh_recent(days=RECONCILE_DAYS)
+
+
+@util.close_old_connections
+def roll_customer_stats():
+    """Move the CustomerStats rolling spend windows forward to the new day."""
+    from tracker.services import CustomerStatsService
+
+    rebuilt = CustomerStatsService.roll_forward()
+    if rebuilt:
+        logger.info(f"Rolled customer stats forward for {rebuilt} customer(s)")
+
+
+@util.close_old_connections
+def prune_background_jobs():
+    """Requeue jobs orphaned by a dead worker and delete old finished jobs."""
+    from tracker.services import JobService
+
+    JobService.requeue_stale()
+    removed = JobService.prune_finished()
+    if removed:
+        logger.info(f"Pruned {removed} finished background job(s)")
+
+
+@util.close_old_connections
+def delete_old_job_executions(max_age=604_800):
+    """Delete scheduler execution history older than ``max_age`` seconds (default: 7 days)."""
+    DjangoJobExecution.objects.delete_old_job_executions(max_age)
+
+
+def register_jobs(scheduler, sweep_seconds: int = 60):
+    """Register all tracker jobs on ``scheduler``; existing jobs with the same id are replaced."""
+    scheduler.add_job(
+        order_status_sweep,
+        trigger=IntervalTrigger(seconds=sweep_seconds),
+        id="order_status_sweep",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        prune_audit_events,
+        trigger=CronTrigger(hour="02", minute="30"),
+        id="prune_audit_events",
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        reconcile_daily_metrics,
+        trigger=CronTrigger(hour="03", minute="00"),
+        id="reconcile_daily_metrics",
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        roll_customer_stats,
+        trigger=CronTrigger(hour="00", minute="15"),
+        id="roll_customer_stats",
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        prune_background_jobs,
+        trigger=CronTrigger(hour="03", minute="30"),
+        id="prune_background_jobs",
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        delete_old_job_executions,
+        trigger=CronTrigger(day_of_week="mon", hour="00", minute="00"),
+        id="delete_old_job_executions",
+        max_instances=1,
+        replace_existing=True,
+    )
@@ -1,5 +1,15 @@
 """Centralized services for business logic."""
 
 from .customer_service import CustomerService, VehicleService, OrderService
+from .order_status_service import OrderStatusService
+from .metrics_service import MetricsService
+from .signing_service import SigningService
+from .job_service import JobService
+from .order_feed_service import OrderFeedService
+from .customer_search_service import CustomerSearchService
+from .labour_code_import_service import LabourCodeImportService
+from .customer_group_service import CustomerGroupService
+from .customer_stats_service import CustomerStatsService
+from .export_service import ExportService
 
-__all__ = ['CustomerService', 'VehicleService', 'OrderService']
+__all__ = ['CustomerService', 'VehicleService', 'OrderService', 'OrderStatusService', 'MetricsService', 'SigningService', 'JobService', 'OrderFeedService', 'CustomerSearchService', 'LabourCodeImportService', 'CustomerGroupService', 'CustomerStatsService', 'ExportService']
@@ -0,0 +1,240 @@
+"""
+Customer group (customer_type) analytics over a trailing period.
+
+Group totals come from three grouped queries (customers, orders and invoices per
+customer_type) instead of a handful of counts per group. Per-customer rows annotate the
+period's orders through a FilteredRelation, so only orders inside the window are
+joined, and read spend, vehicle count and last order from the customer's CustomerStats
+row (a one-to-one join that cannot inflate the order counts). A page is selected as
+ids first, annotating only its sort key, and the other aggregates are computed for
+those ids only.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import (
+    Count, DecimalField, Exists, F, FilteredRelation, IntegerField, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from tracker.models import Customer, Invoice, Order
+from tracker.utils.mysql_compat import days_range, range_q
+
+# period key -> (days back from today, label); None means no lower bound
+PERIODS = {
+    '1week': (7, 'Last 7 Days'),
+    '1month': (30, 'Last 30 Days'),
+    '3months': (90, 'Last 3 Months'),
+    '6months': (180, 'Last 6 Months'),
+    '1year': (365, 'Last Year'),
+    'all': (None, 'All Time'),
+}
+DEFAULT_PERIOD = '6months'
+
+# Period names accepted by the earlier DataTables endpoint
+PERIOD_ALIASES = {'week': '1week', 'month': '1month', 'year': '1year'}
+
+ORDER_TYPES = [code for code, _ in Order.TYPE_CHOICES]
+
+# Per-customer values computed over the period; sorting on one annotates it for the whole filtered set
+ROW_AGGREGATES = (
+    'recent_orders_count', *(f'{t}_orders' for t in ORDER_TYPES), 'completed_orders',
+    'period_spent', 'vehicles_count', 'last_order_date',
+)
+ROW_FIELDS = (
+    'id', 'code', 'full_name', 'phone', 'email', 'customer_type', 'registration_date',
+    'last_visit', 'total_visits', 'total_spent', *ROW_AGGREGATES,
+)
+SORTABLE_FIELDS = frozenset(ROW_FIELDS) - {'id'}
+
+# ROW_AGGREGATES read from the customer's CustomerStats row; the rest are counts over the joined period orders
+STORED_AGGREGATES = ('period_spent', 'vehicles_count', 'last_order_date')
+COUNT_AGGREGATES = tuple(name for name in ROW_AGGREGATES if name not in STORED_AGGREGATES)
+
+# CustomerStats spend column matching a period window; other windows sum their invoices
+STATS_SPEND_FIELDS = {
+    '1month': 'spend_30d', '3months': 'spend_90d', '6months': 'spend_180d', '1year': 'spend_365d',
+    'all': 'lifetime_spend',
+}
+
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class CustomerGroupService:
+    """Service for customer group summaries and paged per-customer aggregates."""
+
+    @staticmethod
+    def period_window(period: Optional[str]) -> dict:
+        """The trailing window for ``period``: its key, label, local start/end dates and the half-open datetime range."""
+        period = PERIOD_ALIASES.get(period, period)
+        if period not in PERIODS:
+            period = DEFAULT_PERIOD
+        days, label = PERIODS[period]
+        today = timezone.localdate()
+        start_date = today - timedelta(days=days) if days is not None else None
+        start, end = days_range(start_date or today, today)
+        return {
+            'period': period,
+            'label': label,
+            'start_date': start_date,
+            'end_date': today,
+            'start': start if start_date else None,
+            'end': end,
+        }
+
+    @staticmethod
+    def with_activity(customers_qs, orders_qs, window: dict, activity: str = 'all'):
+        """Keep customers with ('active') or without ('inactive') an order in the window."""
+        if activity not in ('active', 'inactive'):
+            return customers_qs
+        has_orders = Exists(
+            orders_qs.filter(range_q('created_at', window['start'], window['end']), customer=OuterRef('pk'))
+        )
+        return customers_qs.filter(has_orders if activity == 'active' else ~has_orders)
+
+    @staticmethod
+    def period_invoices(invoices_qs, window: dict):
+        """Non-cancelled invoices dated inside the window."""
+        invoices_qs = invoices_qs.filter(invoice_date__lte=window['end_date']).exclude(status='cancelled')
+        if window['start_date'] is not None:
+            invoices_qs = invoices_qs.filter(invoice_date__gte=window['start_date'])
+        return invoices_qs
+
+    @staticmethod
+    def summary(customers_qs, orders_qs, invoices_qs, window: dict, activity: str = 'all', order_type: str = 'all') -> dict:
+        """
+        Per customer_type totals for the window: customers (after the activity filter),
+        orders with type/status splits (optionally of one order type) and invoiced revenue.
+        Returns ``{'groups': {type: {...}}, 'totals': {...}}``.
+        """
+        customers_qs = CustomerGroupService.with_activity(customers_qs, orders_qs, window, activity)
+        customer_counts = dict(
+            customers_qs.order_by().values('customer_type').annotate(n=Count('id')).values_list('customer_type', 'n')
+        )
+
+        order_stats: Dict[str, dict] = {}
+        # Customers without orders in the window have, by definition, no orders to count
+        if activity != 'inactive':
+            orders = orders_qs.filter(range_q('created_at', window['start'], window['end']))
+            if order_type in ORDER_TYPES:
+                orders = orders.filter(type=order_type)
+            splits = {f'{t}_orders': Count('id', filter=Q(type=t)) for t in ORDER_TYPES}
+            for row in orders.order_by().values('customer__customer_type').annotate(
+                total_orders=Count('id'), completed_orders=Count('id', filter=Q(status='completed')), **splits
+            ):
+                order_stats[row.pop('customer__customer_type')] = row
+
+        invoices = CustomerGroupService.period_invoices(invoices_qs, window)
+        if activity != 'all':
+            invoices = invoices.filter(customer__in=customers_qs.values('id'))
+        revenue = dict(
+            invoices.order_by().values('customer__customer_type').annotate(total=Sum('total_amount'))
+            .values_list('customer__customer_type', 'total')
+        )
+
+        groups = {}
+        totals = {'customers': 0, 'orders': 0, 'revenue': 0.0}
+        empty_orders = {'total_orders': 0, 'completed_orders': 0, **{f'{t}_orders': 0 for t in ORDER_TYPES}}
+        for customer_type, name in Customer.TYPE_CHOICES:
+            count = customer_counts.get(customer_type, 0)
+            orders = order_stats.get(customer_type, empty_orders)
+            group_revenue = float(revenue.get(customer_type) or 0)
+            groups[customer_type] = {
+                'name': name,
+                'customer_count': count,
+                **orders,
+                'total_revenue': group_revenue,
+                'avg_orders': round(orders['total_orders'] / count, 1) if count else 0,
+                'avg_revenue': round(group_revenue / count, 2) if count else 0,
+            }
+            totals['customers'] += count
+            totals['orders'] += orders['total_orders']
+            totals['revenue'] += group_revenue
+        totals['revenue'] = round(totals['revenue'], 2)
+        return {'groups': groups, 'totals': totals}
+
+    @staticmethod
+    def annotate_rows(customers_qs, window: dict, fields=ROW_AGGREGATES):
+        """
+        ``customers_qs`` annotated with the given ROW_AGGREGATES of the window. Order counts
+        group by customer while the stored values need no grouping, so callers
+        fetching both for many rows are better off annotating them in separate queries.
+        """
+        counts = {
+            'recent_orders_count': Count('period_orders'),
+            'completed_orders': Count('period_orders', filter=Q(period_orders__status='completed')),
+            **{f'{t}_orders': Count('period_orders', filter=Q(period_orders__type=t)) for t in ORDER_TYPES},
+        }
+        counts = {name: expr for name, expr in counts.items() if name in fields}
+        if counts:
+            customers_qs = customers_qs.annotate(period_orders=FilteredRelation(
+                'orders', condition=range_q('orders__created_at', window['start'], window['end'])
+            )).annotate(**counts)
+
+        stored = {}
+        if 'period_spent' in fields:
+            spend_field = STATS_SPEND_FIELDS.get(window['period'])
+            if spend_field:
+                spend = F(f'stats__{spend_field}')
+            else:
+                spend = Subquery(
+                    CustomerGroupService.period_invoices(Invoice.objects.filter(customer=OuterRef('pk')), window)
+                    .order_by().values('customer').annotate(total=Sum('total_amount')).values('total')
+                )
+            stored['period_spent'] = Coalesce(
+                spend, Value(Decimal('0')), output_field=DecimalField(max_digits=14, decimal_places=2)
+            )
+        if 'vehicles_count' in fields:
+            stored['vehicles_count'] = Coalesce(F('stats__vehicle_count'), Value(0), output_field=IntegerField())
+        if 'last_order_date' in fields:
+            stored['last_order_date'] = F('stats__last_order_at')
+        return customers_qs.annotate(**stored) if stored else customers_qs
+
+    @staticmethod
+    def rows(customers_qs, window: dict, order_by: str = '-total_spent', offset: int = 0, limit: int = 50) -> List[dict]:
+        """
+        One page of per-customer projections (JSON-ready dicts of ROW_FIELDS), ordered by
+        ``order_by`` (a SORTABLE_FIELDS name, optionally prefixed with '-'). The page's ids
+        are selected first, annotating only the sort key; the remaining aggregates are
+        then computed for those ids alone.
+        """
+        field = order_by.lstrip('-')
+        if field not in SORTABLE_FIELDS:
+            order_by, field = '-total_spent', 'total_spent'
+        if field in ROW_AGGREGATES:
+            customers_qs = CustomerGroupService.annotate_rows(customers_qs, window, [field])
+        ids = list(customers_qs.order_by(order_by, 'id').values_list('id', flat=True)[offset:offset + limit])
+        if not ids:
+            return []
+
+        page = Customer.objects.filter(id__in=ids).order_by()
+        counts = {
+            row.pop('id'): row
+            for row in CustomerGroupService.annotate_rows(page, window, COUNT_AGGREGATES).values('id', *COUNT_AGGREGATES)
+        }
+        columns = [name for name in ROW_FIELDS if name not in COUNT_AGGREGATES]
+        rows = {
+            row['id']: row
+            for row in CustomerGroupService.annotate_rows(page, window, STORED_AGGREGATES).values(*columns)
+        }
+        result = []
+        for customer_id in ids:
+            if customer_id not in rows:
+                continue
+            row = {**rows[customer_id], **counts[customer_id]}
+            for key in ('registration_date', 'last_visit', 'last_order_date'):
+                row[key] = _iso(row[key])
+            row['total_spent'] = _number(row['total_spent'] or 0)
+            row['period_spent'] = _number(row['period_spent'])
+            row['email'] = row['email'] or ''
+            result.append({name: row[name] for name in ROW_FIELDS})
+        return result
@@ -0,0 +1,236 @@
+"""
+Customer typeahead search backed by the CustomerSearchToken index.
+
+Every customer is indexed as a set of short tokens: name and organization words, the
+email address and its domain, the customer code, vehicle plate keys and every suffix
+(of at least MIN_PHONE_SUFFIX digits) of the phone number. A search term then only
+needs a left-anchored ``token LIKE 'term%'`` range scan, and because phone suffixes
+are indexed, a prefix match on them behaves like a substring match on the number.
+
+Lookups run in this order: exact plate, phone prefix (queries made of digits), plate
+prefix (queries that look like a plate) and finally the ranked token search, where every
+term must match some token and exact token matches rank above prefix matches.
+"""
+
+import logging
+import re
+from typing import Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from tracker.models import Customer, CustomerSearchToken, Vehicle
+from tracker.utils.plate_utils import normalize_plate
+from .customer_service import VehicleService
+
+logger = logging.getLogger(__name__)
+
+# Results returned to the typeahead
+SEARCH_LIMIT = 20
+
+# Shortest phone suffix that is indexed (e.g. the last four digits)
+MIN_PHONE_SUFFIX = 4
+
+# At most this many query terms are matched; the rest are ignored
+MAX_TERMS = 5
+
+TOKEN_MAX_LENGTH = 64
+
+# Customer fields that feed the index; saves touching none of them skip reindexing
+INDEXED_FIELDS = frozenset({'full_name', 'organization_name', 'phone', 'email', 'code'})
+
+_EDGE_PUNCTUATION = re.compile(r"^[\W_]+|[\W_]+$")
+_WORD_SEPARATORS = re.compile(r"[\W_]+")
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_QUERY = re.compile(r"^\+?[\d\s\-()]+$")
+_CODE_NUMBER = re.compile(r"^cust0*([0-9a-f]+)$")
+
+
+def _words(text) -> Set[str]:
+    """Lower-cased words of ``text``; words with inner punctuation also yield their parts."""
+    words = set()
+    for chunk in (text or '').lower().split():
+        chunk = _EDGE_PUNCTUATION.sub('', chunk)
+        if chunk:
+            words.add(chunk)
+            words.update(part for part in _WORD_SEPARATORS.split(chunk) if part)
+    return words
+
+
+def _phone_suffixes(phone) -> Set[str]:
+    digits = _NON_DIGITS.sub('', phone or '')
+    if len(digits) <= MIN_PHONE_SUFFIX:
+        return {digits} if digits else set()
+    return {digits[i:] for i in range(len(digits) - MIN_PHONE_SUFFIX + 1)}
+
+
+def _query_terms(q: str) -> List[str]:
+    terms = []
+    for chunk in q.lower().split():
+        chunk = _EDGE_PUNCTUATION.sub('', chunk)[:TOKEN_MAX_LENGTH]
+        if chunk and chunk not in terms:
+            terms.append(chunk)
+    return terms[:MAX_TERMS]
+
+
+class CustomerSearchService:
+    """Service for maintaining and querying the customer search index."""
+
+    @staticmethod
+    def tokens_for(customer: Customer, plate_keys: Iterable[str] = ()) -> Set[Tuple[str, str]]:
+        """The (field, token) pairs indexed for ``customer``."""
+        tokens = {('name', w) for w in _words(customer.full_name)}
+        tokens |= {('organization', w) for w in _words(customer.organization_name)}
+        tokens |= {('phone', d) for d in _phone_suffixes(customer.phone)}
+        email = (customer.email or '').strip().lower()
+        if email:
+            tokens.add(('email', email))
+            if '@' in email:
+                tokens.add(('email', email.split('@', 1)[1]))
+        code = (customer.code or '').lower()
+        if code:
+            tokens.add(('code', code))
+            match = _CODE_NUMBER.match(code)
+            if match:
+                tokens.add(('code', match.group(1)))
+        tokens |= {('plate', key.lower()) for key in plate_keys if key}
+        return {(field, token[:TOKEN_MAX_LENGTH]) for field, token in tokens}
+
+    @staticmethod
+    def reindex(customer: Customer) -> bool:
+        """Bring ``customer``'s index rows up to date; returns True when they changed."""
+        plate_keys = Vehicle.objects.filter(customer=customer).values_list('plate_key', flat=True)
+        wanted = CustomerSearchService.tokens_for(customer, plate_keys)
+        current = set(CustomerSearchToken.objects.filter(customer=customer).values_list('field', 'token'))
+        if wanted == current:
+            return False
+        with transaction.atomic():
+            CustomerSearchToken.objects.filter(customer=customer).delete()
+            CustomerSearchToken.objects.bulk_create(
+                CustomerSearchToken(customer=customer, field=field, token=token) for field, token in wanted
+            )
+        return True
+
+    @staticmethod
+    def reindex_customer_id(customer_id: int) -> None:
+        """Reindex by id, ignoring customers deleted in the meantime."""
+        customer = Customer.objects.filter(pk=customer_id).first()
+        if customer is not None:
+            CustomerSearchService.reindex(customer)
+
+    @staticmethod
+    def rebuild(customers_qs=None, batch_size: int = 500) -> int:
+        """Rebuild the index for ``customers_qs`` (default: every customer). Returns customers indexed."""
+        customers_qs = customers_qs if customers_qs is not None else Customer.objects.all()
+        done = 0
+        last_id = 0
+        while True:
+            batch = list(customers_qs.filter(pk__gt=last_id).order_by('pk')[:batch_size])
+            if not batch:
+                return done
+            ids = [c.pk for c in batch]
+            plates = {}
+            for customer_id, key in Vehicle.objects.filter(customer_id__in=ids).values_list('customer_id', 'plate_key'):
+                plates.setdefault(customer_id, []).append(key)
+            with transaction.atomic():
+                CustomerSearchToken.objects.filter(customer_id__in=ids).delete()
+                CustomerSearchToken.objects.bulk_create(
+                    [
+                        CustomerSearchToken(customer=c, field=field, token=token)
+                        for c in batch
+                        for field, token in CustomerSearchService.tokens_for(c, plates.get(c.pk, ()))
+                    ],
+                    batch_size=2000,
+                )
+            done += len(batch)
+            last_id = ids[-1]
+
+    @staticmethod
+    def matching(customers_qs, q: str):
+        """
+        ``customers_qs`` narrowed to customers matching every term of ``q``, unranked and
+        unlimited, for paged lists that apply their own ordering.
+        """
+        q = (q or '').strip()
+        if not q:
+            return customers_qs
+        if not CustomerSearchToken.objects.exists():
+            logger.warning("Customer search index is empty; falling back to a table scan")
+            return customers_qs.filter(
+                Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(code__icontains=q)
+            )
+        digits = _NON_DIGITS.sub('', q)
+        if _PHONE_QUERY.match(q) and len(digits) >= 3:
+            return customers_qs.filter(id__in=CustomerSearchToken.objects.filter(
+                field='phone', token__startswith=digits[:TOKEN_MAX_LENGTH]
+            ).values('customer_id'))
+        for term in _query_terms(q):
+            customers_qs = customers_qs.filter(
+                id__in=CustomerSearchToken.objects.filter(token__startswith=term).values('customer_id')
+            )
+        return customers_qs
+
+    @staticmethod
+    def search(customers_qs, q: str, limit: int = SEARCH_LIMIT) -> List[Customer]:
+        """Customers in ``customers_qs`` matching the typeahead query ``q``, best first."""
+        q = (q or '').strip()
+        if not q:
+            return []
+        recent_first = ('-last_visit', '-registration_date')
+
+        exact_plate = customers_qs.filter(id__in=VehicleService.vehicles_by_plate(q).values('customer_id'))
+        if exact_plate.exists():
+            return list(exact_plate.order_by(*recent_first)[:limit])
+
+        if not CustomerSearchToken.objects.exists():
+            # Index not built yet (see rebuild_customer_search_index): fall back to scanning
+            logger.warning("Customer search index is empty; falling back to a table scan")
+            return list(customers_qs.filter(
+                Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(code__icontains=q) |
+                Q(id__in=VehicleService.vehicles_by_plate(q, prefix=True).values('customer_id'))
+            ).distinct().order_by(*recent_first)[:limit])
+
+        digits = _NON_DIGITS.sub('', q)
+        if _PHONE_QUERY.match(q) and len(digits) >= 3:
+            phone_ids = CustomerSearchToken.objects.filter(
+                field='phone', token__startswith=digits[:TOKEN_MAX_LENGTH]
+            ).values('customer_id')
+            return list(customers_qs.filter(id__in=phone_ids).order_by(*recent_first)[:limit])
+
+        plate_key = normalize_plate(q)
+        if plate_key.isalnum() and re.search(r'\d', plate_key) and re.search(r'[A-Z]', plate_key):
+            plate_matches = customers_qs.filter(
+                id__in=VehicleService.vehicles_by_plate(q, prefix=True).values('customer_id')
+            ).order_by(*recent_first)
+            found = list(plate_matches[:limit])
+            if found:
+                return found
+
+        terms = _query_terms(q)
+        if not terms:
+            return []
+        matches_any = Q()
+        per_term = {}
+        for i, term in enumerate(terms):
+            matches_any |= Q(token__startswith=term)
+            per_term[f't{i}'] = Max(Case(
+                When(token=term, then=Value(2)),
+                When(token__startswith=term, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        score = F('t0')
+        for i in range(1, len(terms)):
+            score = score + F(f't{i}')
+        ranked = (
+            CustomerSearchToken.objects.filter(matches_any, customer__in=customers_qs)
+            .values('customer_id')
+            .annotate(**per_term)
+            .filter(**{f't{i}__gt': 0 for i in range(len(terms))})
+            .annotate(score=score)
+            .order_by('-score', '-customer__last_visit', '-customer_id')
+            .values_list('customer_id', flat=True)[:limit]
+        )
+        ids = list(ranked)
+        by_id = customers_qs.in_bulk(ids)
+        return [by_id[i] for i in ids if i in by_id]
@@ -6,14 +6,17 @@ This ensures consistent deduplication, visit tracking, and code generation acros
 import logging
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Iterable, Tuple, Any
 
 from django.db import transaction, IntegrityError
+from django.db.models import Case, F, IntegerField, Value, When
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 from tracker.models import Customer, Vehicle, Order, InventoryItem, ServiceType, ServiceAddon, Branch
 from tracker.utils import normalize_phone
+from tracker.utils.mysql_compat import date_filter
+from tracker.utils.plate_utils import normalize_plate
 
 logger = logging.getLogger(__name__)
 
@@ -36,17 +39,12 @@ class CustomerService:
             if not branch or not full_name or not plate_number:
                 return None
             name = (full_name or "").strip()
-            plate = (plate_number or "").strip().upper()
-            if not name or not plate:
+            if not name:
                 return None
-            from tracker.models import Vehicle
             vehicle = (
-                Vehicle.objects.select_related("customer")
-                .filter(
-                    plate_number__iexact=plate,
-                    customer__branch=branch,
-                    customer__full_name__iexact=name,
-                )
+                VehicleService.vehicles_by_plate(plate_number, branch=branch)
+                .select_related("customer")
+                .filter(customer__full_name__iexact=name)
                 .first()
             )
             return vehicle.customer if vehicle else None
@@ -292,45 +290,160 @@ class CustomerService:
         Update customer's visit tracking information.
         Call this whenever a customer interacts with the system (creates order, etc.)
         Only increments total_visits once per day to track distinct visit days, not order count.
+
+        The check and the increment happen in one conditional UPDATE, so concurrent orders
+        for the same customer (fleet accounts) can neither lose nor double an increment.
         """
-        if not customer:
+        if not customer or not customer.pk:
             return
 
         try:
-            from django.utils import timezone as tz_module
             now = timezone.now()
-            # IMPORTANT: Use localdate() consistently for timezone-aware date comparisons
-            # This ensures the date is extracted in the server's configured timezone, not UTC
-            today = tz_module.localdate(now) if hasattr(tz_module, 'localdate') else now.date()
-
-            # Check if customer already visited today
-            last_visit_today = False
-            if customer.last_visit:
-                try:
-                    # IMPORTANT: Also use localdate() for the last_visit to ensure consistent timezone handling
-                    # Previously this used .date() which extracted UTC date, causing timezone mismatches
-                    last_visit_date = tz_module.localdate(customer.last_visit) if hasattr(tz_module, 'localdate') else customer.last_visit.date() if hasattr(customer.last_visit, 'date') else customer.last_visit
-                    last_visit_today = (last_visit_date == today)
-                except Exception:
-                    last_visit_today = False
-
-            # Update last_visit and arrival_time
-            customer.last_visit = now
-            customer.arrival_time = now
-            customer.current_status = 'arrived'
-
-            # Only increment total_visits if this is a new visit day
-            if not last_visit_today:
-                customer.total_visits = (customer.total_visits or 0) + 1
-
-            customer.save(update_fields=['last_visit', 'total_visits', 'arrival_time', 'current_status'])
+            # Visit days are local calendar days, compared as a datetime range so the
+            # condition needs no DATE() conversion
+            visited_today = date_filter('last_visit', timezone.localdate(now))
+            # total_visits must come first: MySQL evaluates SET assignments left to right,
+            # so the CASE has to read last_visit before it is overwritten
+            Customer.objects.filter(pk=customer.pk).update(
+                total_visits=F('total_visits') + Case(
+                    When(visited_today, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                ),
+                last_visit=now,
+                arrival_time=now,
+                current_status='arrived',
+                updated_at=now,
+            )
+            customer.refresh_from_db(fields=['last_visit', 'total_visits', 'arrival_time', 'current_status', 'updated_at'])
         except Exception as e:
             logger.warning(f"Error updating customer visit: {e}")
 
+    @staticmethod
+    def invoice_spend(status: Optional[str], customer_id: Optional[int], total_amount) -> Tuple[Optional[int], Decimal]:
+        """(customer id, amount) an invoice contributes to total_spent; cancelled invoices count as zero."""
+        if status == 'cancelled' or not customer_id:
+            return customer_id, Decimal('0')
+        return customer_id, Decimal(total_amount or 0)
+
+    @staticmethod
+    def apply_spend_change(previous: Tuple[Optional[int], Decimal], current: Tuple[Optional[int], Decimal]) -> None:
+        """
+        Move an invoice's contribution to total_spent from ``previous`` to ``current`` (both as
+        returned by invoice_spend) with relative F() updates, so concurrent invoices never
+        overwrite each other's amounts.
+        """
+        deltas: Dict[int, Decimal] = {}
+        for (customer_id, amount), sign in ((previous, -1), (current, 1)):
+            if customer_id:
+                deltas[customer_id] = deltas.get(customer_id, Decimal('0')) + sign * amount
+        now = timezone.now()
+        for customer_id, delta in deltas.items():
+            if delta:
+                Customer.objects.filter(pk=customer_id).update(total_spent=F('total_spent') + delta, updated_at=now)
+
+    @staticmethod
+    def reconcile_counters(customers_qs=None, batch_size: int = 500) -> int:
+        """
+        Recompute total_visits (distinct local days with an order) and total_spent (sum of
+        non-cancelled invoices) from history for ``customers_qs`` (default: every customer),
+        one primary-key batch per transaction. Returns the number of customers corrected.
+        """
+        from django.db.models import Sum
+        from tracker.models import Invoice
+
+        customers_qs = customers_qs if customers_qs is not None else Customer.objects.all()
+        corrected = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    customers_qs.filter(pk__gt=last_id).order_by('pk')
+                    .select_for_update().values_list('pk', 'total_visits', 'total_spent')[:batch_size]
+                )
+                if not batch:
+                    return corrected
+                ids = [pk for pk, _, _ in batch]
+                # Local visit days are worked out in Python: DATE(CONVERT_TZ(...)) needs MySQL's
+                # time zone tables and cannot use the index anyway
+                visit_days: Dict[int, set] = {}
+                for customer_id, created_at in Order.objects.filter(customer_id__in=ids).values_list('customer_id', 'created_at').iterator():
+                    visit_days.setdefault(customer_id, set()).add(timezone.localdate(created_at))
+                spent = dict(
+                    Invoice.objects.filter(customer_id__in=ids).exclude(status='cancelled')
+                    .values('customer_id').annotate(total=Sum('total_amount')).values_list('customer_id', 'total')
+                )
+                changed = []
+                for pk, total_visits, total_spent in batch:
+                    visits = len(visit_days.get(pk, ()))
+                    amount = spent.get(pk) or Decimal('0')
+                    if visits != total_visits or amount != total_spent:
+                        changed.append(Customer(pk=pk, total_visits=visits, total_spent=amount, updated_at=timezone.now()))
+                if changed:
+                    Customer.objects.bulk_update(changed, ['total_visits', 'total_spent', 'updated_at'], batch_size=500)
+                    corrected += len(changed)
+            last_id = ids[-1]
+
 
 class VehicleService:
     """Service for managing vehicle creation and association."""
 
+    @staticmethod
+    def vehicles_by_plate(
+        plate_number: Optional[str],
+        branch: Optional[Branch] = None,
+        customer: Optional[Customer] = None,
+        prefix: bool = False,
+    ):
+        """
+        Vehicles whose plate matches ``plate_number`` ignoring case, spaces and dashes.
+        All plate lookups go through here so they hit the indexed Vehicle.plate_key with an
+        exact (or, with ``prefix``, left-anchored) match.
+
+        Args:
+            plate_number: Plate as typed or extracted, e.g. "t 123-abc"
+            branch: Only vehicles of customers in this branch
+            customer: Only vehicles of this customer
+            prefix: Match plates starting with ``plate_number`` instead of equal to it
+
+        Returns:
+            A Vehicle queryset (empty when the plate normalizes to nothing)
+        """
+        key = normalize_plate(plate_number)
+        if not key:
+            return Vehicle.objects.none()
+        qs = Vehicle.objects.filter(plate_key__startswith=key) if prefix else Vehicle.objects.filter(plate_key=key)
+        if branch is not None:
+            qs = qs.filter(customer__branch=branch)
+        if customer is not None:
+            qs = qs.filter(customer=customer)
+        return qs.order_by('id')
+
+    @staticmethod
+    def vehicles_by_plates(plate_numbers: Iterable[Optional[str]], branch: Optional[Branch] = None) -> Dict[str, Vehicle]:
+        """
+        Batch form of :meth:`find_vehicle_by_plate`: one query for many plates.
+
+        Returns:
+            Normalized plate -> first vehicle (with its customer) registered under it;
+            plates with no vehicle are left out
+        """
+        keys = {key for key in (normalize_plate(p) for p in plate_numbers) if key}
+        if not keys:
+            return {}
+        qs = Vehicle.objects.select_related('customer').filter(plate_key__in=keys)
+        if branch is not None:
+            qs = qs.filter(customer__branch=branch)
+        found = {}
+        for vehicle in qs.order_by('id'):
+            found.setdefault(vehicle.plate_key, vehicle)
+        return found
+
+    @staticmethod
+    def find_vehicle_by_plate(plate_number: Optional[str], branch: Optional[Branch] = None) -> Optional[Vehicle]:
+        """Return the first vehicle (with its customer) registered under ``plate_number``, or None."""
+        return VehicleService.vehicles_by_plate(plate_number, branch=branch).select_related('customer').first()
+
     @staticmethod
     def create_or_get_vehicle(
         customer: Customer,
@@ -362,10 +475,7 @@ class VehicleService:
 
         try:
             # Try to find existing vehicle for this customer
-            vehicle = Vehicle.objects.filter(
-                customer=customer,
-                plate_number__iexact=plate_number
-            ).first()
+            vehicle = VehicleService.vehicles_by_plate(plate_number, customer=customer).first()
 
             if vehicle:
                 # Update vehicle details if provided
@@ -421,13 +531,8 @@ class OrderService:
         if not branch or not plate_number:
             return None
 
-        plate_number = (plate_number or "").strip().upper()
         try:
-            from tracker.models import Vehicle
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate_number,
-                customer__branch=branch
-            ).first()
+            vehicle = VehicleService.vehicles_by_plate(plate_number, branch=branch).first()
 
             if not vehicle:
                 return None
@@ -462,13 +567,8 @@ class OrderService:
         if not branch or not plate_number:
             return []
 
-        plate_number = (plate_number or "").strip().upper()
         try:
-            from tracker.models import Vehicle
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate_number,
-                customer__branch=branch
-            ).first()
+            vehicle = VehicleService.vehicles_by_plate(plate_number, branch=branch).first()
 
             if not vehicle:
                 return []
@@ -604,7 +704,7 @@ class OrderService:
                     'description': description or f"{order_type.title()} Order",
                     'estimated_duration': estimated_duration,
                     # Note: started_at should NOT be set here. It will be set automatically when the order
-                    # is auto-progressed from 'created' to 'in_progress' after 10 minutes by the middleware.
+                    # is auto-progressed from 'created' to 'in_progress' after 10 minutes by the status scheduler.
                     # This ensures that started_at reflects when the order actually started being worked on.
                 }
 
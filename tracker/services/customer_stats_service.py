@@ -0,0 +1,344 @@
+"""
+Per-customer statistics (CustomerStats).
+
+Readers get order counts, first/last order, vehicle count and spend from one flat row
+instead of multi-join aggregates over the customer's history.
+
+Rows are maintained:
+  - incrementally: every order, invoice or vehicle write applies its own delta after
+    commit (see tracker.signals) with relative F() updates, GREATEST/LEAST for the
+    first/last order bounds, and a MIN/MAX over idx_order_customer_created only when
+    an order leaves a customer or changes its date. A write costs one UPDATE whatever
+    the length of the history;
+  - by a full recompute (three grouped queries over the customer's whole history) once,
+    inside the first write's transaction, when the customer has no row yet; for
+    customers whose orders a status sweep changed (set-based updates bypass model
+    signals); and nightly to roll the spend windows forward. An invoice write meeting
+    windows computed on an earlier day re-sums the last year's invoices first;
+  - on demand by ``manage.py rebuild_customer_stats``; ``manage.py check_customer_stats``
+    reports (and with --fix repairs) rows that drifted from the history.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tracker.models import Customer, CustomerStats, Invoice, Order, Vehicle
+
+logger = logging.getLogger(__name__)
+
+# Rolling spend column -> days before rolling_as_of it covers
+ROLLING_SPEND_DAYS = {'spend_30d': 30, 'spend_90d': 90, 'spend_180d': 180, 'spend_365d': 365}
+
+# Every computed column, in the order the checker reports them
+STAT_FIELDS = (
+    'order_count', 'service_orders', 'sales_orders', 'inquiry_orders', 'labour_orders',
+    'completed_orders', 'cancelled_orders', 'first_order_at', 'last_order_at',
+    'vehicle_count', 'invoice_count', 'lifetime_spend', *ROLLING_SPEND_DAYS,
+)
+
+ORDER_TYPES = ('service', 'sales', 'inquiry', 'labour')
+
+# Model fields whose change alters what an order, invoice or vehicle contributes to its row
+ORDER_STAT_SOURCE_FIELDS = {'customer', 'customer_id', 'type', 'status', 'created_at'}
+INVOICE_STAT_SOURCE_FIELDS = {'customer', 'customer_id', 'status', 'total_amount', 'invoice_date'}
+VEHICLE_STAT_SOURCE_FIELDS = {'customer', 'customer_id'}
+
+# Times a row write is retried after losing a race with a concurrent one
+WRITE_ATTEMPTS = 3
+
+# (customer id, type, status, created_at) / (customer id, amount, invoice_date) / customer id
+OrderContribution = Optional[Tuple[int, str, str, datetime]]
+InvoiceContribution = Optional[Tuple[int, Decimal, Optional[date]]]
+
+
+class CustomerStatsService:
+    """Service for maintaining and checking the CustomerStats table."""
+
+    @staticmethod
+    def compute(customer_ids: Iterable[int], today: Optional[date] = None) -> Dict[int, CustomerStats]:
+        """Fresh (unsaved) stats for the existing customers among ``customer_ids``."""
+        today = today or timezone.localdate()
+        ids = list(Customer.objects.filter(id__in=list(customer_ids)).values_list('id', flat=True))
+        stats = {pk: CustomerStats(customer_id=pk, rolling_as_of=today) for pk in ids}
+        if not ids:
+            return stats
+
+        order_stats = (
+            Order.objects.filter(customer_id__in=ids)
+            .values('customer_id')
+            .annotate(
+                order_count=Count('id'),
+                **{f'{t}_orders': Count('id', filter=Q(type=t)) for t in ('service', 'sales', 'inquiry', 'labour')},
+                completed_orders=Count('id', filter=Q(status='completed')),
+                cancelled_orders=Count('id', filter=Q(status='cancelled')),
+                first_order_at=Min('created_at'),
+                last_order_at=Max('created_at'),
+            )
+            .order_by()
+        )
+        for row in order_stats:
+            s = stats[row.pop('customer_id')]
+            for field, value in row.items():
+                setattr(s, field, value)
+
+        vehicle_counts = Vehicle.objects.filter(customer_id__in=ids).values('customer_id').annotate(n=Count('id')).order_by()
+        for row in vehicle_counts:
+            stats[row['customer_id']].vehicle_count = row['n']
+
+        rolling = {
+            field: Sum('total_amount', filter=Q(invoice_date__gte=today - timedelta(days=days), invoice_date__lte=today))
+            for field, days in ROLLING_SPEND_DAYS.items()
+        }
+        invoice_stats = (
+            Invoice.objects.filter(customer_id__in=ids)
+            .exclude(status='cancelled')
+            .values('customer_id')
+            .annotate(invoice_count=Count('id'), lifetime_spend=Sum('total_amount'), **rolling)
+            .order_by()
+        )
+        for row in invoice_stats:
+            s = stats[row.pop('customer_id')]
+            for field, value in row.items():
+                setattr(s, field, value if value is not None else Decimal('0'))
+        return stats
+
+    @staticmethod
+    def rebuild(customer_ids: Iterable[int], today: Optional[date] = None) -> int:
+        """Recompute and store the rows of ``customer_ids``. Returns the number of rows written."""
+        customer_ids = list(customer_ids)
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            stats = CustomerStatsService.compute(customer_ids, today)
+            if not stats:
+                return 0
+            try:
+                with transaction.atomic():
+                    CustomerStats.objects.filter(customer_id__in=list(stats)).delete()
+                    CustomerStats.objects.bulk_create(stats.values())
+                return len(stats)
+            except IntegrityError as e:
+                # A concurrent writer created some of the rows first: recompute from what
+                # is committed now, so the last write stores the freshest figures
+                logger.warning(f"Customer stats rebuild conflicted (attempt {attempt}): {e}")
+        logger.warning(f"Customer stats rebuild gave up after {WRITE_ATTEMPTS} attempts; check_customer_stats --fix repairs it")
+        return 0
+
+    @staticmethod
+    def rebuild_all(customers_qs=None, batch_size: int = 500) -> int:
+        """Rebuild the rows of ``customers_qs`` (default: every customer) one primary-key batch at a time."""
+        customers_qs = customers_qs if customers_qs is not None else Customer.objects.all()
+        written = 0
+        last_id = 0
+        while True:
+            ids = list(customers_qs.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return written
+            written += CustomerStatsService.rebuild(ids)
+            last_id = ids[-1]
+
+    @staticmethod
+    def roll_forward(batch_size: int = 500) -> int:
+        """
+        Bring the rolling spend windows up to today. Only rows computed on an earlier day
+        that still had spend inside a window can change; the rest are left alone.
+        """
+        today = timezone.localdate()
+        # The windows are nested, so any spend inside one shows in the widest
+        stale = CustomerStats.objects.filter(rolling_as_of__lt=today, spend_365d__gt=0)
+        return CustomerStatsService.rebuild_all(
+            Customer.objects.filter(id__in=stale.values('customer_id')), batch_size=batch_size
+        )
+
+    @staticmethod
+    def refresh_for_orders(orders_qs) -> int:
+        """Rebuild the rows of the customers owning ``orders_qs`` (e.g. orders a sweep just updated)."""
+        return CustomerStatsService.rebuild_all(Customer.objects.filter(id__in=orders_qs.values('customer_id')))
+
+    # ---- Incremental maintenance ------------------------------------------------
+
+    @staticmethod
+    def order_contribution(customer_id: Optional[int], order_type: str, status: str, created_at) -> OrderContribution:
+        return (customer_id, order_type, status, created_at) if customer_id else None
+
+    @staticmethod
+    def invoice_contribution(customer_id: Optional[int], status: str, total_amount, invoice_date) -> InvoiceContribution:
+        """What an invoice adds to its customer's row; cancelled invoices add nothing."""
+        if not customer_id or status == 'cancelled':
+            return None
+        # Unsaved instances can still hold the field default (a datetime) or a parsed string
+        if isinstance(invoice_date, datetime):
+            invoice_date = timezone.localtime(invoice_date).date() if timezone.is_aware(invoice_date) else invoice_date.date()
+        elif isinstance(invoice_date, str):
+            invoice_date = parse_date(invoice_date)
+        return customer_id, Decimal(total_amount or 0), invoice_date
+
+    @staticmethod
+    def order_changed(previous: OrderContribution, current: OrderContribution, deleted: bool = False) -> None:
+        """Move an order's contribution from ``previous`` to ``current`` once the transaction commits."""
+        if previous == current:
+            return
+        updates: Dict[int, dict] = {}
+        for contribution, sign in ((previous, -1), (current, 1)):
+            if contribution:
+                customer_id, order_type, status, _ = contribution
+                counts = updates.setdefault(customer_id, {})
+                for field in ('order_count', f'{order_type}_orders' if order_type in ORDER_TYPES else None,
+                              {'completed': 'completed_orders', 'cancelled': 'cancelled_orders'}.get(status)):
+                    if field:
+                        counts[field] = counts.get(field, 0) + sign
+        updates = {pk: {f: F(f) + n for f, n in counts.items() if n} for pk, counts in updates.items()}
+
+        if previous and (not current or previous[0] != current[0] or previous[3] != current[3]):
+            # The order may have been the customer's first or last: read the bounds back
+            # from the customer's remaining orders (two probes of idx_order_customer_created)
+            orders = Order.objects.filter(customer_id=previous[0])
+            updates[previous[0]].update(
+                first_order_at=Subquery(orders.order_by('created_at').values('created_at')[:1]),
+                last_order_at=Subquery(orders.order_by('-created_at').values('created_at')[:1]),
+            )
+        if current and 'last_order_at' not in updates[current[0]]:
+            created_at = current[3]
+            updates[current[0]].update(
+                first_order_at=Least(Coalesce(F('first_order_at'), Value(created_at)), Value(created_at)),
+                last_order_at=Greatest(Coalesce(F('last_order_at'), Value(created_at)), Value(created_at)),
+            )
+        for customer_id, fields in updates.items():
+            if fields and CustomerStatsService._needs_delta(customer_id, create=not deleted):
+                CustomerStatsService._apply_after_commit(customer_id, fields)
+
+    @staticmethod
+    def invoice_changed(previous: InvoiceContribution, current: InvoiceContribution, deleted: bool = False) -> None:
+        """Move an invoice's contribution from ``previous`` to ``current`` once the transaction commits."""
+        if previous == current:
+            return
+        today = timezone.localdate()
+        deltas: Dict[int, Dict[str, Decimal]] = {}
+        for contribution, sign in ((previous, -1), (current, 1)):
+            if not contribution:
+                continue
+            customer_id, amount, invoice_date = contribution
+            d = deltas.setdefault(customer_id, {})
+            d['invoice_count'] = d.get('invoice_count', 0) + sign
+            d['lifetime_spend'] = d.get('lifetime_spend', Decimal('0')) + sign * amount
+            for field, days in ROLLING_SPEND_DAYS.items():
+                if invoice_date and today - timedelta(days=days) <= invoice_date <= today:
+                    d[field] = d.get(field, Decimal('0')) + sign * amount
+        for customer_id, d in deltas.items():
+            if not CustomerStatsService._needs_delta(customer_id, create=not deleted):
+                continue
+            if CustomerStatsService._roll_to(customer_id, today):
+                # The windows were just recomputed from the invoices, this one included
+                d = {f: n for f, n in d.items() if f not in ROLLING_SPEND_DAYS}
+            fields = {f: F(f) + n for f, n in d.items() if n}
+            if fields:
+                CustomerStatsService._apply_after_commit(customer_id, fields)
+
+    @staticmethod
+    def vehicle_changed(previous_customer_id: Optional[int], current_customer_id: Optional[int], deleted: bool = False) -> None:
+        """Move a vehicle from one customer's count to another's once the transaction commits."""
+        if previous_customer_id == current_customer_id:
+            return
+        for customer_id, sign in ((previous_customer_id, -1), (current_customer_id, 1)):
+            if customer_id and CustomerStatsService._needs_delta(customer_id, create=not deleted):
+                CustomerStatsService._apply_after_commit(customer_id, {'vehicle_count': F('vehicle_count') + sign})
+
+    @staticmethod
+    def _needs_delta(customer_id: int, create: bool = True) -> bool:
+        """
+        Whether a change of ``customer_id``'s history must be applied as a delta. A customer
+        without a row gets one computed from history inside the current transaction (with
+        ``create``), which already includes the change, so no delta is needed; without
+        ``create`` (deletions, which may be cascading from the customer itself) the next
+        write computes it.
+        """
+        if CustomerStats.objects.filter(customer_id=customer_id).exists():
+            return True
+        if not create:
+            return False
+        stats = CustomerStatsService.compute([customer_id])
+        if not stats:
+            return False
+        try:
+            with transaction.atomic():
+                CustomerStats.objects.bulk_create(stats.values())
+        except IntegrityError:
+            # A concurrent transaction created the row, without this uncommitted change
+            return True
+        return False
+
+    @staticmethod
+    def _roll_to(customer_id: int, today: date) -> bool:
+        """
+        Recompute the rolling windows of a row computed on an earlier day from the
+        customer's invoices of the last year (idx_invoice_customer_date). Returns whether
+        the row was rolled.
+        """
+        invoices = Invoice.objects.filter(customer_id=customer_id).exclude(status='cancelled').order_by()
+        windows = {
+            field: Coalesce(
+                Subquery(
+                    invoices.filter(invoice_date__gte=today - timedelta(days=days), invoice_date__lte=today)
+                    .values('customer_id').annotate(total=Sum('total_amount')).values('total')
+                ),
+                Value(Decimal('0')),
+            )
+            for field, days in ROLLING_SPEND_DAYS.items()
+        }
+        stale = CustomerStats.objects.filter(customer_id=customer_id).exclude(rolling_as_of=today)
+        return bool(stale.update(rolling_as_of=today, **windows))
+
+    @staticmethod
+    def _apply_after_commit(customer_id: int, fields: dict) -> None:
+        # Registered per change, so a rolled-back write never applies its delta
+        transaction.on_commit(lambda: CustomerStatsService.apply(customer_id, fields))
+
+    @staticmethod
+    def apply(customer_id: int, fields: dict) -> None:
+        """Apply ``fields`` (F()/expression updates) to a customer's row. Failures are logged; check_customer_stats --fix repairs them."""
+        try:
+            CustomerStats.objects.filter(customer_id=customer_id).update(**fields)
+        except Exception as e:
+            logger.warning(f"Customer stats update for customer #{customer_id} failed: {e}")
+
+    @staticmethod
+    def check(customers_qs=None, batch_size: int = 500, fix: bool = False) -> List[dict]:
+        """
+        Compare stored rows with freshly computed ones for ``customers_qs`` (default: every
+        customer). Returns one ``{'customer_id', 'fields': {field: (stored, actual)}}`` per
+        drifted customer; a missing row counts as all zeros. With ``fix`` drifted rows are rebuilt.
+        """
+        customers_qs = customers_qs if customers_qs is not None else Customer.objects.all()
+        empty = CustomerStats()
+        drifted = []
+        last_id = 0
+        while True:
+            ids = list(customers_qs.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return drifted
+            today = timezone.localdate()
+            actual = CustomerStatsService.compute(ids, today)
+            stored = CustomerStats.objects.in_bulk(ids)
+            batch_drift = []
+            for pk, fresh in actual.items():
+                row = stored.get(pk)
+                if row is None:
+                    # No history yet means no row is needed
+                    fields = {
+                        f: (getattr(empty, f), getattr(fresh, f)) for f in STAT_FIELDS
+                        if getattr(fresh, f) != getattr(empty, f)
+                    }
+                else:
+                    fields = {f: (getattr(row, f), getattr(fresh, f)) for f in STAT_FIELDS if getattr(row, f) != getattr(fresh, f)}
+                if fields:
+                    batch_drift.append({'customer_id': pk, 'fields': fields})
+            if fix and batch_drift:
+                CustomerStatsService.rebuild([d['customer_id'] for d in batch_drift], today)
+            drifted += batch_drift
+            last_id = ids[-1]
@@ -0,0 +1,302 @@
+"""
+CSV/XLSX exports that stream instead of building the file in memory.
+
+Each export is registered with ``@exporter(name)`` and turns the request's query
+parameters into an Export: a header and an iterator of ``values_list`` rows read in
+keyset chunks (see tracker.utils.pagination.iter_keyset), so related columns come from
+the SQL join and a full-history export holds one chunk at a time. CSV is written row
+by row into a StreamingHttpResponse; XLSX (optional, needs openpyxl) is written in
+openpyxl's write-only mode to a temporary file that is then streamed. Very large
+exports can run as an 'export' background job that stores the file for download.
+"""
+
+import csv
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import BackgroundJob, Customer, Order
+from tracker.utils import scope_queryset
+from tracker.utils.pagination import iter_keyset
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Rows read per keyset query
+EXPORT_CHUNK_SIZE = 2000
+
+# Job progress is written every this many rows
+PROGRESS_EVERY = 10000
+
+FORMATS = ('csv', 'xlsx')
+
+EXPORT_DIR = 'exports'
+
+
+class ExportError(ValueError):
+    """The export cannot be produced (unknown export or format, missing optional dependency)."""
+
+
+@dataclass
+class Export:
+    filename: str
+    header: Sequence[str]
+    rows: Iterable[Sequence]
+    # Number of rows the export will produce, for job progress (optional, costs a COUNT)
+    count: Optional[Callable[[], int]] = None
+
+
+EXPORTS: Dict[str, Callable[[QueryDict, Callable], Export]] = {}
+
+
+def exporter(name: str):
+    """Register the decorated function as the builder of export ``name``."""
+    def register(func):
+        EXPORTS[name] = func
+        return func
+    return register
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        # Excel has no time zones: write the local wall-clock time
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class ExportService:
+    """Service for building and streaming exports."""
+
+    @staticmethod
+    def build(name: str, params: QueryDict, user) -> Export:
+        """The Export ``name`` for the query parameters ``params``, scoped to ``user``'s branch."""
+        builder = EXPORTS.get(name)
+        if builder is None:
+            raise ExportError(f"Unknown export: {name}")
+        # scope_queryset reads only the ?branch= override from the request
+        request = SimpleNamespace(GET=params)
+        return builder(params, lambda qs: scope_queryset(qs, user, request))
+
+    @staticmethod
+    def check_format(fmt: str) -> str:
+        fmt = (fmt or 'csv').lower()
+        if fmt not in FORMATS:
+            raise ExportError(f"Unknown export format: {fmt}")
+        if fmt == 'xlsx' and not OPENPYXL_AVAILABLE:
+            raise ExportError('XLSX export requires the openpyxl library. Please use CSV or contact the administrator.')
+        return fmt
+
+    @staticmethod
+    def write_csv(export: Export, fileobj) -> int:
+        writer = csv.writer(fileobj)
+        writer.writerow(export.header)
+        written = 0
+        for row in export.rows:
+            writer.writerow([_cell(v) for v in row])
+            written += 1
+        return written
+
+    @staticmethod
+    def write_xlsx(export: Export, fileobj) -> int:
+        """Write ``export`` as a one-sheet workbook in write-only (constant memory) mode."""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(export.filename[:31])
+        sheet.append(list(export.header))
+        written = 0
+        for row in export.rows:
+            sheet.append([_xlsx_cell(v) for v in row])
+            written += 1
+        workbook.save(fileobj)
+        return written
+
+    @staticmethod
+    def response(name: str, params: QueryDict, user, fmt: str = 'csv'):
+        """A streaming download of export ``name`` in ``fmt``."""
+        fmt = ExportService.check_format(fmt)
+        export = ExportService.build(name, params, user)
+        if fmt == 'xlsx':
+            tmp = tempfile.TemporaryFile()
+            ExportService.write_xlsx(export, tmp)
+            tmp.seek(0)
+            return FileResponse(
+                tmp, as_attachment=True, filename=f'{export.filename}.xlsx',
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+
+        writer = csv.writer(_Echo())
+
+        def lines():
+            yield writer.writerow(export.header)
+            for row in export.rows:
+                yield writer.writerow([_cell(v) for v in row])
+
+        response = StreamingHttpResponse(lines(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{export.filename}.csv"'
+        return response
+
+    @staticmethod
+    def run_job(job: BackgroundJob) -> dict:
+        """Write the export described by ``job.payload`` to storage; the result names the stored file."""
+        from .job_service import JobService
+
+        fmt = ExportService.check_format(job.payload.get('format'))
+        params = QueryDict(job.payload.get('params') or '')
+        export = ExportService.build(job.payload.get('name'), params, job.created_by)
+        total = export.count() if export.count else 0
+
+        def progress(written):
+            if total and written % PROGRESS_EVERY == 0:
+                JobService.set_progress(job, min(95, written * 100 // total))
+
+        export.rows = _counting(export.rows, progress)
+        with tempfile.TemporaryFile() as tmp:
+            if fmt == 'xlsx':
+                rows = ExportService.write_xlsx(export, tmp)
+            else:
+                text = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+                rows = ExportService.write_csv(export, text)
+                text.flush()
+                text.detach()
+            tmp.seek(0)
+            filename = f'{export.filename}.{fmt}'
+            path = default_storage.save(f'{EXPORT_DIR}/job-{job.pk}-{filename}', File(tmp, name=filename))
+        return {
+            'success': True, 'file': path, 'filename': filename, 'rows': rows,
+            'download_url': reverse('tracker:api_job_download', args=[job.pk]),
+        }
+
+    @staticmethod
+    def delete_job_file(job: BackgroundJob) -> None:
+        path = (job.result or {}).get('file') if isinstance(job.result, dict) else None
+        if path and os.path.dirname(path) == EXPORT_DIR:
+            default_storage.delete(path)
+
+
+def _counting(rows, callback):
+    written = 0
+    for row in rows:
+        yield row
+        written += 1
+        callback(written)
+
+
+# ---- Exports ----------------------------------------------------------------
+
+@exporter('customers')
+def _customers(params: QueryDict, scope) -> Export:
+    qs = scope(Customer.objects.all())
+    q = params.get('q', '').strip()
+    if q:
+        qs = qs.filter(full_name__icontains=q)
+    fields = ('code', 'full_name', 'phone', 'customer_type', 'total_visits', 'last_visit')
+    return Export(
+        filename='customers',
+        header=['Code', 'Name', 'Phone', 'Type', 'Visits', 'Last Visit'],
+        rows=iter_keyset(qs, fields, order_field='registration_date', chunk_size=EXPORT_CHUNK_SIZE),
+        count=qs.count,
+    )
+
+
+@exporter('orders')
+def _orders(params: QueryDict, scope) -> Export:
+    qs = scope(Order.objects.all())
+    status = params.get('status', 'all')
+    type_ = params.get('type', 'all')
+    if status != 'all':
+        qs = qs.filter(status=status)
+    if type_ != 'all':
+        qs = qs.filter(type=type_)
+    fields = ('order_number', 'customer__full_name', 'type', 'status', 'priority', 'created_at')
+    return Export(
+        filename='orders',
+        header=['Order', 'Customer', 'Type', 'Status', 'Priority', 'Created At'],
+        rows=iter_keyset(qs, fields, order_field='created_at', chunk_size=EXPORT_CHUNK_SIZE),
+        count=qs.count,
+    )
+
+
+def _group_rows(qs, params: QueryDict, fields):
+    """Customers of ``qs`` with CustomerGroupService's period aggregates, a keyset chunk per query."""
+    from .customer_group_service import CustomerGroupService
+
+    window = CustomerGroupService.period_window(params.get('period'))
+    # Every chunk aggregates only its own customers' orders
+    annotated = CustomerGroupService.annotate_rows(qs, window)
+    return iter_keyset(annotated, fields, chunk_size=EXPORT_CHUNK_SIZE)
+
+
+@exporter('customer_groups')
+def _customer_groups(params: QueryDict, scope) -> Export:
+    qs = scope(Customer.objects.all())
+    group = params.get('group', '')
+    if group in dict(Customer.TYPE_CHOICES):
+        qs = qs.filter(customer_type=group)
+    fields = (
+        'code', 'full_name', 'phone', 'customer_type', 'total_visits', 'total_spent', 'recent_orders_count',
+        'service_orders', 'sales_orders', 'inquiry_orders', 'completed_orders', 'vehicles_count', 'last_order_date',
+    )
+    return Export(
+        filename='customer_group',
+        header=['Code', 'Name', 'Phone', 'Type', 'Visits', 'Total Spent', 'Orders (period)', 'Service', 'Sales',
+                'inquiry', 'Completed (period)', 'Vehicles', 'Last Order'],
+        rows=_group_rows(qs, params, fields),
+        count=qs.count,
+    )
+
+
+@exporter('organizations')
+def _organizations(params: QueryDict, scope) -> Export:
+    qs = scope(Customer.objects.filter(customer_type__in=['government', 'ngo', 'company']))
+    q = params.get('q', '').strip()
+    if q:
+        qs = qs.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
+    if params.get('status', '') == 'returning':
+        qs = qs.filter(total_visits__gt=1)
+    fields = (
+        'code', 'organization_name', 'full_name', 'phone', 'customer_type', 'total_visits', 'recent_orders_count',
+        'service_orders', 'sales_orders', 'inquiry_orders', 'completed_orders', 'vehicles_count', 'last_order_date',
+    )
+    return Export(
+        filename='organization_customers',
+        header=['Code', 'Organization', 'Contact', 'Phone', 'Type', 'Visits', 'Orders (period)', 'Service', 'Sales',
+                'Consult', 'Completed', 'Vehicles', 'Last Order'],
+        rows=_group_rows(qs, params, fields),
+        count=qs.count,
+    )
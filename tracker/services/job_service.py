@@ -0,0 +1,266 @@
+"""
+Database-backed background job queue (BackgroundJob).
+
+Requests enqueue a job and return its id; ``manage.py run_job_worker`` polls for queued
+jobs, claims one with a conditional UPDATE (so concurrent workers never run the same
+job) and runs the handler registered for its kind. Handlers return a JSON-safe result
+dict, may report progress with JobService.set_progress() and signal failure by raising;
+the exception message is stored as the job's error for the client to display.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.db.models import F
+from django.utils import timezone
+
+from tracker.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Jobs still 'running' this long after they started were orphaned by a dead worker
+STALE_RUNNING_MINUTES = 30
+
+# Orphaned jobs are retried until they have been claimed this many times
+MAX_ATTEMPTS = 3
+
+# Finished jobs (and their stored input files) are deleted after this many days
+KEEP_FINISHED_DAYS = 7
+
+HANDLERS: Dict[str, Callable[[BackgroundJob], dict]] = {}
+
+
+def job_handler(kind: str):
+    """Register the decorated function as the handler for jobs of ``kind``."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def _read_input(job: BackgroundJob) -> bytes:
+    if not job.input_file:
+        raise ValueError('Job has no input file.')
+    job.input_file.open('rb')
+    try:
+        return job.input_file.read()
+    finally:
+        job.input_file.close()
+
+
+class JobService:
+    """Service for queueing and running background jobs."""
+
+    @staticmethod
+    def enqueue(kind: str, payload: Optional[dict] = None, user=None, upload=None) -> BackgroundJob:
+        """Queue a job of ``kind``; ``upload`` (an uploaded file) is stored as its input file."""
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = BackgroundJob(
+            kind=kind,
+            payload=payload or {},
+            created_by=user if getattr(user, 'is_authenticated', False) else None,
+        )
+        if upload is not None:
+            job.input_file.save(upload.name or 'upload', upload, save=False)
+        job.save()
+        return job
+
+    @staticmethod
+    def claim_next() -> Optional[BackgroundJob]:
+        """Atomically move the oldest queued job to 'running' and return it (None when idle)."""
+        candidates = BackgroundJob.objects.filter(status='queued').order_by('created_at', 'id').values_list('id', flat=True)[:10]
+        for job_id in candidates:
+            claimed = BackgroundJob.objects.filter(pk=job_id, status='queued').update(
+                status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+            )
+            if claimed:
+                return BackgroundJob.objects.get(pk=job_id)
+        return None
+
+    @staticmethod
+    def run(job: BackgroundJob) -> BackgroundJob:
+        """Run a claimed job's handler and record its result or error."""
+        handler = HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job.kind}'")
+            job.result = handler(job)
+            if isinstance(job.result, dict) and job.result.get('success') is False:
+                # Handlers report expected failures (e.g. an unreadable PDF) in the payload
+                job.status = 'failed'
+                job.error = job.result.get('message') or job.result.get('error') or 'Job failed'
+            else:
+                job.status = 'succeeded'
+                job.progress = 100
+                job.error = ''
+        except Exception as e:
+            logger.warning(f"Background job #{job.pk} ({job.kind}) failed: {e}")
+            job.status = 'failed'
+            job.error = str(e) or e.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'progress', 'result', 'error', 'finished_at'])
+        return job
+
+    @staticmethod
+    def run_pending(max_jobs: Optional[int] = None) -> int:
+        """Claim and run queued jobs until none are left (or ``max_jobs`` ran). Returns the count."""
+        ran = 0
+        while max_jobs is None or ran < max_jobs:
+            job = JobService.claim_next()
+            if job is None:
+                break
+            JobService.run(job)
+            ran += 1
+        return ran
+
+    @staticmethod
+    def set_progress(job: BackgroundJob, percent: int) -> None:
+        job.progress = max(0, min(100, int(percent)))
+        BackgroundJob.objects.filter(pk=job.pk).update(progress=job.progress)
+
+    @staticmethod
+    def requeue_stale(minutes: int = STALE_RUNNING_MINUTES) -> int:
+        """Requeue jobs orphaned in 'running' by a dead worker, failing those out of attempts."""
+        cutoff = timezone.now() - timedelta(minutes=minutes)
+        stale = BackgroundJob.objects.filter(status='running', started_at__lt=cutoff)
+        failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+            status='failed', error='Worker stopped while running this job.', finished_at=timezone.now()
+        )
+        requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='queued', started_at=None)
+        if failed or requeued:
+            logger.warning(f"Stale background jobs: {requeued} requeued, {failed} failed")
+        return requeued
+
+    @staticmethod
+    def prune_finished(days: int = KEEP_FINISHED_DAYS) -> int:
+        """Delete finished jobs older than ``days`` together with their input and export files."""
+        from .export_service import ExportService
+
+        cutoff = timezone.now() - timedelta(days=days)
+        removed = 0
+        for job in BackgroundJob.objects.filter(status__in=['succeeded', 'failed'], finished_at__lt=cutoff).iterator():
+            if job.input_file:
+                try:
+                    job.input_file.delete(save=False)
+                except Exception as e:
+                    logger.warning(f"Could not delete input file of job #{job.pk}: {e}")
+            if job.kind == 'export':
+                try:
+                    ExportService.delete_job_file(job)
+                except Exception as e:
+                    logger.warning(f"Could not delete export file of job #{job.pk}: {e}")
+            job.delete()
+            removed += 1
+        return removed
+
+    @staticmethod
+    def status_payload(job: BackgroundJob, include_result: bool = True) -> dict:
+        """JSON-safe view of a job for the status endpoints."""
+        data = {
+            'success': True,
+            'job_id': job.pk,
+            'kind': job.kind,
+            'status': job.status,
+            'progress': job.progress,
+            'done': job.status in ('succeeded', 'failed'),
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'error': job.error or None,
+        }
+        if include_result:
+            data['result'] = job.result
+        return data
+
+
+# ---- Handlers ---------------------------------------------------------------
+
+@job_handler('extract_invoice_preview')
+def _extract_invoice_preview(job: BackgroundJob) -> dict:
+    from tracker.views_invoice_upload import build_extraction_preview
+
+    file_bytes = _read_input(job)
+    JobService.set_progress(job, 10)
+    return build_extraction_preview(file_bytes, job.payload.get('filename') or 'document.pdf')
+
+
+@job_handler('upload_extract_invoice')
+def _upload_extract_invoice(job: BackgroundJob) -> dict:
+    from tracker.views_invoice import process_invoice_upload
+
+    file_bytes = _read_input(job)
+    JobService.set_progress(job, 10)
+    return process_invoice_upload(file_bytes, job.payload.get('filename') or 'document.pdf',
+                                  job.payload.get('fields') or {}, job.created_by)
+
+
+@job_handler('sign_order_document')
+def _sign_order_document(job: BackgroundJob) -> dict:
+    from tracker.models import Order
+    from .signing_service import SigningService
+
+    order = Order.objects.get(pk=job.payload['order_id'])
+    signature_bytes = SigningService.decode_signature(job.payload.get('signature_data') or '')
+    pdf_bytes = _read_input(job)
+    JobService.set_progress(job, 10)
+    SigningService.complete_order_with_signed_pdf(
+        order, pdf_bytes, job.payload.get('filename') or 'document.pdf', signature_bytes,
+        preset=job.payload.get('preset'), user=job.created_by,
+    )
+    return {
+        'success': True,
+        'order_id': order.pk,
+        'signed_document_url': order.completion_attachment.url if order.completion_attachment else '',
+    }
+
+
+@job_handler('sign_existing_document')
+def _sign_existing_document(job: BackgroundJob) -> dict:
+    from tracker.models import Order, OrderAttachment
+    from .signing_service import SigningService
+
+    order = Order.objects.get(pk=job.payload['order_id'])
+    signature_bytes = SigningService.decode_signature(job.payload.get('signature_data') or '')
+    attachment_id = job.payload.get('attachment_id')
+    source = OrderAttachment.objects.get(pk=attachment_id, order=order).file if attachment_id else order.completion_attachment
+    if not source:
+        raise ValueError('No document selected to sign.')
+    source.open('rb')
+    try:
+        src_bytes = source.read()
+    finally:
+        source.close()
+    JobService.set_progress(job, 10)
+    attachment = SigningService.sign_into_new_attachment(
+        order, src_bytes, source.name or 'document', signature_bytes,
+        use_job_card=bool(job.payload.get('use_job_card')), user=job.created_by,
+    )
+    return {'success': True, 'order_id': order.pk, 'attachment_id': attachment.pk, 'url': attachment.file.url}
+
+
+@job_handler('sign_supporting_document')
+def _sign_supporting_document(job: BackgroundJob) -> dict:
+    from tracker.models import OrderAttachment, OrderAttachmentSignature
+    from .signing_service import SigningService
+
+    attachment = OrderAttachment.objects.select_related('order').get(pk=job.payload['attachment_id'])
+    if OrderAttachmentSignature.objects.filter(attachment=attachment).exists():
+        raise ValueError('This document has already been signed.')
+    signature_bytes = SigningService.decode_signature(job.payload.get('signature_data') or '')
+    JobService.set_progress(job, 10)
+    att_sig = SigningService.sign_supporting_attachment(attachment, signature_bytes, user=job.created_by)
+    return {
+        'success': True,
+        'message': 'Document signed successfully.',
+        'attachment_id': attachment.pk,
+        'signed_at': att_sig.signed_at.isoformat(),
+        'signed_by': (att_sig.signed_by.get_full_name() or att_sig.signed_by.username) if att_sig.signed_by else '',
+    }
+
+
+@job_handler('export')
+def _export(job: BackgroundJob) -> dict:
+    from .export_service import ExportService
+
+    return ExportService.run_job(job)
@@ -0,0 +1,236 @@
+"""
+Bulk import of the labour code catalogue from CSV/Excel.
+
+The uploaded sheet is normalized and validated column-wise with pandas, compared with
+the current table in one read, and only new or changed codes are written, as chunked
+upserts (``bulk_create(update_conflicts=True)``) that each commit on their own so no
+write lock is held for the whole file. A dry run stops after the comparison and
+reports what the import would change.
+"""
+
+import logging
+from typing import List, Set
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tracker.models import LabourCode
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+REQUIRED_COLUMNS = ('code', 'description', 'category')
+
+# Rows written per upsert statement (and per transaction)
+IMPORT_CHUNK_SIZE = 500
+
+# Changed codes listed individually in a dry-run report
+REPORT_LIMIT = 200
+
+ACTIVE_VALUES = ('true', '1', 'yes', 'y', 'active')
+
+_MAX_LENGTHS = {name: LabourCode._meta.get_field(name).max_length for name in REQUIRED_COLUMNS}
+
+
+class LabourCodeImportError(ValueError):
+    """The file as a whole cannot be imported (unreadable, missing columns)."""
+
+
+def _plain(value):
+    """numpy scalars (e.g. np.False_) as the Python values the JSON report expects."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class LabourCodeImportService:
+    """Service for importing labour codes in bulk."""
+
+    @staticmethod
+    def read_csv(csv_file):
+        if not PANDAS_AVAILABLE:
+            raise LabourCodeImportError('Import requires pandas library. Please contact administrator.')
+        try:
+            return pd.read_csv(csv_file, dtype=str, keep_default_na=False, encoding='utf-8-sig', skipinitialspace=True)
+        except UnicodeDecodeError:
+            raise LabourCodeImportError('File encoding error. Please use UTF-8 encoded CSV files.')
+        except pd.errors.EmptyDataError:
+            raise LabourCodeImportError('CSV file is empty or invalid format')
+
+    @staticmethod
+    def read_excel(excel_file):
+        if not PANDAS_AVAILABLE:
+            raise LabourCodeImportError('Excel import requires pandas library. Please contact administrator.')
+        try:
+            return pd.read_excel(excel_file, sheet_name=0, dtype=str)
+        except Exception as e:
+            logger.error(f"Failed to read Excel file: {str(e)}")
+            raise LabourCodeImportError(f'Failed to read Excel file: {str(e)}')
+
+    @staticmethod
+    def normalize(df):
+        """
+        Validate and normalize an uploaded sheet. Returns ``(rows, errors)``: a DataFrame
+        with row/code/description/category/is_active for the importable rows (one per
+        code, the last occurrence wins) and a list of "Row N: ..." messages for the rest.
+        """
+        if df.empty:
+            raise LabourCodeImportError('File is empty.')
+        df = df.rename(columns=lambda col: str(col).strip().lower()).reset_index(drop=True)
+        if not set(REQUIRED_COLUMNS).issubset(df.columns):
+            raise LabourCodeImportError(
+                f'File must contain columns: code, description, category. Found: {", ".join(map(str, df.columns))}'
+            )
+
+        def text(column):
+            return df[column].fillna('').astype(str).str.strip()
+
+        rows = pd.DataFrame({
+            'row': df.index + 2,  # spreadsheet row number, after the header
+            'code': text('code').str.upper(),
+            'description': text('description'),
+            'category': text('category').str.lower(),
+        })
+        if 'is_active' in df.columns:
+            flag = text('is_active').str.lower()
+            rows['is_active'] = flag.isin(ACTIVE_VALUES)
+        else:
+            rows['is_active'] = True
+
+        checks = []
+        for column in REQUIRED_COLUMNS:
+            checks.append((rows[column] == '', f'{column.capitalize()} is required'))
+        for column in REQUIRED_COLUMNS:
+            checks.append((rows[column].str.len() > _MAX_LENGTHS[column],
+                           f'{column.capitalize()} is longer than {_MAX_LENGTHS[column]} characters'))
+        # The first failing check names the problem of each row
+        problem = np.select([mask for mask, _ in checks], [message for _, message in checks], default='')
+        invalid = problem != ''
+        errors = [f"Row {row}: {message}" for row, message in zip(rows['row'][invalid], problem[invalid])]
+
+        rows = rows[~invalid]
+        superseded = rows.duplicated('code', keep='last')
+        errors += [
+            f"Row {row}: Code {code} appears again further down; the later row was used"
+            for row, code in zip(rows['row'][superseded], rows['code'][superseded])
+        ]
+        return rows[~superseded], errors
+
+    @staticmethod
+    def diff(rows, clear_existing: bool = False) -> dict:
+        """Compare normalized rows with the table: which codes are new, changed, unchanged or (with clear_existing) removed."""
+        existing = pd.DataFrame(
+            list(LabourCode.objects.values_list('code', 'description', 'category', 'is_active')),
+            columns=['code', 'description_old', 'category_old', 'is_active_old'],
+        )
+        merged = rows.merge(existing, on='code', how='left', indicator=True)
+        is_new = (merged['_merge'] == 'left_only').to_numpy()
+        changed_fields = {
+            field: (merged[field] != merged[f'{field}_old']).to_numpy() & ~is_new
+            for field in ('description', 'category', 'is_active')
+        }
+        is_changed = np.logical_or.reduce(list(changed_fields.values()))
+        removed = sorted(set(existing['code']) - set(rows['code'])) if clear_existing else []
+
+        changes = []
+        for i in np.flatnonzero(is_new | is_changed)[:REPORT_LIMIT]:
+            record = merged.iloc[i]
+            changes.append({
+                'row': int(record['row']),
+                'code': record['code'],
+                'action': 'create' if is_new[i] else 'update',
+                'fields': [
+                    {'field': field, 'old': None if is_new[i] else _plain(record[f'{field}_old']), 'new': _plain(record[field])}
+                    for field, mask in changed_fields.items()
+                    if is_new[i] or mask[i]
+                ],
+            })
+        write = merged.loc[is_new | is_changed, ['row', 'code', 'description', 'category', 'is_active']]
+        write['action'] = np.where(is_new[is_new | is_changed], 'create', 'update')
+        return {
+            'write': write,
+            'created': int(is_new.sum()),
+            'updated': int(is_changed.sum()),
+            'unchanged': int(len(rows) - is_new.sum() - is_changed.sum()),
+            'removed': removed,
+            'changes': changes,
+        }
+
+    @staticmethod
+    def _upsert(rows, errors: List[str]) -> Set[str]:
+        """
+        Write ``rows`` in chunks; a chunk that fails is retried row by row to pinpoint the
+        bad rows. Returns the codes that could not be written.
+        """
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target, so unique_fields is only
+        # passed to backends that need one (PostgreSQL, SQLite)
+        unique_fields = ['code'] if connection.features.supports_update_conflicts_with_target else None
+        failed = set()
+        for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+            chunk = rows.iloc[start:start + IMPORT_CHUNK_SIZE]
+            objs = [
+                LabourCode(code=code, description=description, category=category, is_active=bool(is_active))
+                for code, description, category, is_active
+                in chunk[['code', 'description', 'category', 'is_active']].itertuples(index=False)
+            ]
+            try:
+                with transaction.atomic():
+                    LabourCode.objects.bulk_create(
+                        objs,
+                        update_conflicts=True,
+                        unique_fields=unique_fields,
+                        update_fields=['description', 'category', 'is_active', 'updated_at'],
+                    )
+                continue
+            except Exception as e:
+                logger.warning(f"Labour code import chunk at row {int(chunk['row'].iloc[0])} failed, retrying row by row: {e}")
+            for row, obj in zip(chunk['row'], objs):
+                try:
+                    LabourCode.objects.update_or_create(
+                        code=obj.code,
+                        defaults={'description': obj.description, 'category': obj.category, 'is_active': obj.is_active},
+                    )
+                except Exception as e:
+                    failed.add(obj.code)
+                    errors.append(f"Row {row}: {str(e)}")
+        return failed
+
+    @staticmethod
+    def import_frame(df, clear_existing: bool = False, dry_run: bool = False) -> dict:
+        """
+        Import an uploaded sheet. With ``clear_existing`` codes missing from the file are
+        deleted afterwards (instead of emptying the table first); with ``dry_run`` nothing
+        is written and the report lists the changes the import would make.
+        """
+        started = timezone.now()
+        rows, errors = LabourCodeImportService.normalize(df)
+        plan = LabourCodeImportService.diff(rows, clear_existing)
+        stats = {
+            'success': True,
+            'dry_run': dry_run,
+            'created': plan['created'],
+            'updated': plan['updated'],
+            'unchanged': plan['unchanged'],
+            'deleted': len(plan['removed']),
+            'changes': plan['changes'],
+            'changes_truncated': plan['created'] + plan['updated'] > len(plan['changes']),
+        }
+        if not dry_run:
+            failed = LabourCodeImportService._upsert(plan['write'], errors)
+            if failed:
+                actions = plan['write'].loc[~plan['write']['code'].isin(failed), 'action']
+                stats['created'] = int((actions == 'create').sum())
+                stats['updated'] = int((actions == 'update').sum())
+            for start in range(0, len(plan['removed']), IMPORT_CHUNK_SIZE):
+                LabourCode.objects.filter(code__in=plan['removed'][start:start + IMPORT_CHUNK_SIZE]).delete()
+            logger.info(
+                f"Labour code import: created={stats['created']} updated={stats['updated']} "
+                f"deleted={stats['deleted']} errors={len(errors)} in {(timezone.now() - started).total_seconds():.1f}s"
+            )
+        stats['errors'] = len(errors)
+        stats['error_details'] = errors
+        return stats
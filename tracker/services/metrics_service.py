@@ -0,0 +1,199 @@
+"""
+Daily branch metrics rollup (DailyBranchMetrics).
+
+A (day, branch) slice is rebuilt from Order and Invoice with two grouped queries over
+index-friendly ranges, so a refresh reads one branch's orders of one day however much
+history exists, and KPI views read O(days in range) rollup rows instead of raw orders.
+
+Rows are refreshed:
+  - after commit for the day and branch of every order or invoice saved or deleted
+    (see tracker.signals);
+  - by the scheduler after status sweeps (set-based updates bypass model signals)
+    and nightly for the last RECONCILE_DAYS days;
+  - on demand by ``manage.py backfill_daily_metrics``.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Set
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from tracker.models import DailyBranchMetrics, Invoice, Order
+
+logger = logging.getLogger(__name__)
+
+# Days rebuilt by the nightly reconciliation job
+RECONCILE_DAYS = 35
+
+# Times a rebuild is recomputed after losing a race with a concurrent one
+REBUILD_ATTEMPTS = 3
+
+# Statuses counted as "started" (initiated but not finished)
+STARTED_STATUSES = ('created', 'in_progress')
+
+_pending = threading.local()
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def _branch_q(field: str, branch_ids: Set[Optional[int]]) -> Q:
+    """Match ``field`` against ``branch_ids``, where ``None`` stands for "no branch"."""
+    ids = [pk for pk in branch_ids if pk is not None]
+    q = Q(**{f'{field}__in': ids})
+    if None in branch_ids:
+        q |= Q(**{f'{field}__isnull': True})
+    return q
+
+
+def _day_bounds(day: date):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+class MetricsService:
+    """Service for maintaining and rebuilding the DailyBranchMetrics rollup."""
+
+    @staticmethod
+    def rebuild_day(day: date, branch_ids: Optional[Iterable[Optional[int]]] = None) -> int:
+        """
+        Recompute the rollup rows of one local day for ``branch_ids`` (``None`` in the set
+        means orders without a branch; omit it to rebuild every branch). Returns the number
+        of rows written.
+        """
+        branches = None if branch_ids is None else set(branch_ids)
+        for attempt in range(1, REBUILD_ATTEMPTS + 1):
+            rows = MetricsService._compute_day(day, branches)
+            try:
+                with transaction.atomic():
+                    stale = DailyBranchMetrics.objects.filter(day=day)
+                    if branches is not None:
+                        stale = stale.filter(_branch_q('branch_id', branches))
+                    stale.delete()
+                    DailyBranchMetrics.objects.bulk_create(rows)
+                return len(rows)
+            except IntegrityError as e:
+                # A concurrent rebuild of the same rows committed first: recompute from
+                # what is committed now so the last writer stores the freshest figures
+                logger.warning(f"Daily metrics rebuild for {day} conflicted (attempt {attempt}): {e}")
+        logger.warning(f"Daily metrics rebuild for {day} gave up after {REBUILD_ATTEMPTS} attempts")
+        return 0
+
+    @staticmethod
+    def _compute_day(day: date, branches: Optional[Set[Optional[int]]]) -> List[DailyBranchMetrics]:
+        start, end = _day_bounds(day)
+        rows = {}
+
+        def row(branch_id, order_type, status):
+            key = (branch_id, order_type or '', status or '')
+            if key not in rows:
+                rows[key] = DailyBranchMetrics(branch_id=branch_id, day=day, order_type=key[1], status=key[2])
+            return rows[key]
+
+        orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+        invoices = Invoice.objects.filter(invoice_date=day).exclude(status='cancelled')
+        if branches is not None:
+            orders = orders.filter(_branch_q('branch_id', branches))
+            invoices = invoices.filter(_branch_q('branch_id', branches))
+
+        order_stats = (
+            orders.values('branch_id', 'type', 'status')
+            .annotate(n=Count('id'), minutes=Sum('actual_duration'), timed=Count('actual_duration'))
+            .order_by()
+        )
+        for r in order_stats:
+            m = row(r['branch_id'], r['type'], r['status'])
+            m.order_count = r['n']
+            m.duration_minutes = r['minutes'] or 0
+            m.duration_count = r['timed']
+
+        invoice_stats = (
+            invoices.values('branch_id', 'order__type', 'order__status')
+            .annotate(n=Count('id'), gross=Sum('total_amount'), net=Sum('subtotal'), vat=Sum('tax_amount'))
+            .order_by()
+        )
+        for r in invoice_stats:
+            m = row(r['branch_id'], r['order__type'], r['order__status'])
+            m.invoice_count = r['n']
+            m.revenue = r['gross'] or 0
+            m.net_revenue = r['net'] or 0
+            m.tax = r['vat'] or 0
+        return list(rows.values())
+
+    @staticmethod
+    def rebuild_range(start: date, end: date) -> int:
+        """Rebuild every day from ``start`` to ``end`` inclusive. Returns the number of rows written."""
+        written = 0
+        day = start
+        while day <= end:
+            written += MetricsService.rebuild_day(day)
+            day += timedelta(days=1)
+        return written
+
+    @staticmethod
+    def refresh_recent(days: int = 2) -> int:
+        """Rebuild today and the preceding ``days - 1`` days."""
+        today = timezone.localdate()
+        return MetricsService.rebuild_range(today - timedelta(days=max(days, 1) - 1), today)
+
+    @staticmethod
+    def mark_dirty(day=None, branch_id: Optional[int] = None, order_id: Optional[int] = None) -> None:
+        """
+        Queue the rows of ``day`` and ``branch_id`` (and those of the invoices of ``order_id``)
+        for a rebuild once the current transaction commits. Repeated marks within one
+        transaction are rebuilt once.
+        """
+        if not hasattr(_pending, 'rows'):
+            _pending.rows, _pending.orders = set(), set()
+        day = _as_date(day)
+        if day:
+            _pending.rows.add((day, branch_id))
+        if order_id:
+            _pending.orders.add(order_id)
+        # Every mark registers a callback; later ones find the queue empty and return.
+        # After a rollback the queued rows simply ride along with the next commit.
+        transaction.on_commit(MetricsService.flush_dirty)
+
+    @staticmethod
+    def flush_dirty() -> int:
+        """Rebuild all queued (day, branch) rows now. Failures are logged; the nightly reconcile repairs them."""
+        pending = getattr(_pending, 'rows', set())
+        orders = getattr(_pending, 'orders', set())
+        if not pending and not orders:
+            return 0
+        _pending.rows, _pending.orders = set(), set()
+        written = 0
+        try:
+            if orders:
+                pending |= set(Invoice.objects.filter(order_id__in=orders).values_list('invoice_date', 'branch_id'))
+            by_day = {}
+            for day, branch_id in pending:
+                if day:
+                    by_day.setdefault(day, set()).add(branch_id)
+            for day in sorted(by_day):
+                written += MetricsService.rebuild_day(day, by_day[day])
+        except Exception as e:
+            logger.warning(f"Daily metrics refresh failed: {e}")
+        return written
+
+    @staticmethod
+    def first_activity_day() -> Optional[date]:
+        """Earliest local day with an order or invoice, used as the default backfill start."""
+        candidates = []
+        first_order = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if first_order:
+            candidates.append(_as_date(first_order))
+        first_invoice = Invoice.objects.order_by('invoice_date').values_list('invoice_date', flat=True).first()
+        if first_invoice:
+            candidates.append(first_invoice)
+        return min(candidates) if candidates else None
+
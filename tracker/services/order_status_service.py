@@ -0,0 +1,125 @@
+"""
+Order status transition engine.
+
+All automatic status changes (inquiry normalization, created -> in_progress,
+in_progress -> overdue) are expressed as set-based UPDATE statements so a sweep
+costs a fixed number of queries regardless of how many orders are active. UPDATEs
+bypass auto_now, so each one sets ``updated_at`` itself.
+Overdue detection compares the persisted ``Order.overdue_at`` deadline against
+now using the (status, overdue_at) index.
+The sweep is run by the scheduler (``manage.py run_scheduler``) or by the
+``auto_progress_orders`` management command, never from the request path.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from tracker.models import Order
+from tracker.utils import add_audit_log
+from tracker.utils.time_utils import OVERDUE_THRESHOLD_HOURS
+
+logger = logging.getLogger(__name__)
+
+# Minutes an order stays in 'created' before it is auto-progressed to 'in_progress'
+AUTO_PROGRESS_MINUTES = 10
+
+# Statuses that can still become overdue
+ACTIVE_STATUSES = ('created', 'in_progress')
+
+
+class OrderStatusService:
+    """Service for time-driven order status transitions."""
+
+    @staticmethod
+    def normalize_inquiries(now: Optional[datetime] = None) -> int:
+        """Inquiries are always completed; fix any rows that are not."""
+        now = now or timezone.now()
+        return (
+            Order.objects.filter(type='inquiry')
+            .exclude(status='completed')
+            .update(status='completed', completed_at=now, completion_date=now, updated_at=now)
+        )
+
+    @staticmethod
+    def progress_created_orders(now: Optional[datetime] = None, minutes: int = AUTO_PROGRESS_MINUTES) -> int:
+        """
+        Move 'created' orders older than ``minutes`` to 'in_progress'.
+        started_at is set from created_at so it reflects when the order was initiated.
+        """
+        now = now or timezone.now()
+        cutoff = now - timedelta(minutes=minutes)
+        return (
+            Order.objects.filter(status='created', created_at__lte=cutoff)
+            .exclude(type='inquiry')
+            .update(
+                status='in_progress',
+                started_at=F('created_at'),
+                overdue_at=F('created_at') + timedelta(hours=OVERDUE_THRESHOLD_HOURS),
+                updated_at=now,
+            )
+        )
+
+    @staticmethod
+    def fill_missing_deadlines() -> int:
+        """Populate overdue_at for active orders written before the column existed."""
+        threshold = timedelta(hours=OVERDUE_THRESHOLD_HOURS)
+        pending = Order.objects.filter(status__in=ACTIVE_STATUSES, overdue_at__isnull=True)
+        now = timezone.now()
+        updated = pending.filter(started_at__isnull=False).update(overdue_at=F('started_at') + threshold, updated_at=now)
+        updated += pending.filter(started_at__isnull=True).update(overdue_at=F('created_at') + threshold, updated_at=now)
+        return updated
+
+    @staticmethod
+    def mark_overdue_orders(now: Optional[datetime] = None) -> List[int]:
+        """
+        Mark active orders whose overdue_at deadline has passed as overdue.
+        The candidate rows are locked and read through the (status, overdue_at) index,
+        then flipped with a single UPDATE by primary key; the affected IDs are returned
+        for audit logging.
+        """
+        now = now or timezone.now()
+        with transaction.atomic():
+            ids = list(
+                Order.objects.select_for_update()
+                .filter(status__in=ACTIVE_STATUSES, overdue_at__lte=now)
+                .exclude(type='inquiry')
+                .values_list('id', flat=True)
+            )
+            if ids:
+                Order.objects.filter(id__in=ids).update(status='overdue', updated_at=now)
+        return ids
+
+    @staticmethod
+    def run_transitions(now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Run a full status sweep and return the number of rows changed per step.
+        Each step is an independent UPDATE so a failure in one does not block the others.
+        """
+        now = now or timezone.now()
+        results = {'inquiries_completed': 0, 'progressed': 0, 'deadlines_filled': 0, 'overdue': 0}
+        steps = (
+            ('inquiries_completed', lambda: OrderStatusService.normalize_inquiries(now)),
+            ('progressed', lambda: OrderStatusService.progress_created_orders(now)),
+            ('deadlines_filled', OrderStatusService.fill_missing_deadlines),
+        )
+        for key, step in steps:
+            try:
+                with transaction.atomic():
+                    results[key] = step()
+            except Exception as e:
+                logger.warning(f"Order status transition '{key}' failed: {e}")
+
+        try:
+            overdue_ids = OrderStatusService.mark_overdue_orders(now)
+        except Exception as e:
+            logger.warning(f"Order status transition 'overdue' failed: {e}")
+            overdue_ids = []
+        results['overdue'] = len(overdue_ids)
+        if overdue_ids:
+            add_audit_log(None, 'order_overdue', f'Marked {len(overdue_ids)} order(s) overdue', order_ids=overdue_ids)
+        return results
@@ -0,0 +1,180 @@
+"""
+Signature embedding for order documents.
+
+Shared by the signing views (synchronous path) and the background job worker, so a
+document signed either way ends up with the same files and order fields.
+"""
+
+import base64
+import logging
+import time
+from typing import Optional, Tuple
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from tracker.models import Order, OrderAttachment, OrderAttachmentSignature
+from tracker.utils import add_audit_log
+from tracker.utils.pdf_signature import (
+    SignatureEmbedError,
+    build_signed_filename,
+    build_signed_name,
+    embed_signature_in_image,
+    embed_signature_in_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SIGNATURE_BYTES = 2 * 1024 * 1024  # 2 MB
+
+SIGNABLE_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+JOB_CARD_KINDS = {'job_card', 'jobcard', 'job card'}
+
+
+def _mark_signed_completed(order: Order, user) -> None:
+    """Set completion and signature fields on ``order`` (not saved)."""
+    now = timezone.now()
+    if not order.started_at:
+        order.started_at = now
+        order.status = 'in_progress'
+    order.status = 'completed'
+    order.completed_at = now
+    order.completion_date = now
+    reference_time = order.started_at or order.created_at
+    order.actual_duration = int(max(0, (now - reference_time).total_seconds() // 60))
+    order.signed_by = user
+    order.signed_at = now
+
+
+class SigningService:
+    """Service for embedding drawn signatures into order documents."""
+
+    @staticmethod
+    def decode_signature(payload: str) -> bytes:
+        """Decode a base64 string or data URL. Raises ValueError when empty, invalid or too large."""
+        if ';base64,' in (payload or ''):
+            payload = payload.split(';base64,', 1)[1]
+        payload = (payload or '').strip()
+        if not payload:
+            raise ValueError('Signature payload is empty.')
+        try:
+            signature_bytes = base64.b64decode(payload)
+        except Exception as exc:
+            raise ValueError('Signature payload is not valid base64.') from exc
+        if len(signature_bytes) > MAX_SIGNATURE_BYTES:
+            raise ValueError('Signature image is too large (max 2MB).')
+        return signature_bytes
+
+    @staticmethod
+    def complete_order_with_signed_pdf(
+        order: Order,
+        pdf_bytes: bytes,
+        pdf_name: str,
+        signature_bytes: bytes,
+        preset: Optional[str] = None,
+        user=None,
+    ) -> Tuple[bytes, str]:
+        """
+        Embed the signature into the order's completion PDF, store it as the completion
+        attachment and complete the order. Returns (signed_pdf_bytes, signed_name).
+        Raises SignatureEmbedError when the PDF cannot be signed.
+        """
+        if preset:
+            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes, preset=preset)
+        else:
+            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes)
+
+        signed_name = build_signed_filename(pdf_name)
+        order.completion_attachment.save(signed_name, ContentFile(signed_pdf_bytes, name=signed_name), save=False)
+        order.signature_file.save(f"signature_{order.id}_{int(time.time())}.png", ContentFile(signature_bytes), save=False)
+
+        _mark_signed_completed(order, user)
+
+        if order.type == 'sales' and (order.quantity or 0) > 0 and order.item_name and order.brand:
+            from tracker.utils import adjust_inventory
+            adjust_inventory(order.item_name, order.brand, (order.quantity or 0))
+
+        order.save(update_fields=['status', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
+
+        try:
+            add_audit_log(user, 'order_completed', f"Order {order.order_number} signed and archived as PDF")
+        except Exception:
+            pass
+        return signed_pdf_bytes, signed_name
+
+    @staticmethod
+    def sign_into_new_attachment(
+        order: Order,
+        src_bytes: bytes,
+        src_name: str,
+        signature_bytes: bytes,
+        use_job_card: bool = False,
+        user=None,
+    ) -> OrderAttachment:
+        """
+        Embed the signature into an existing document (PDF or image), attach the signed copy
+        to the order and complete it. Raises SignatureEmbedError when embedding fails.
+        """
+        preset = 'job_card' if use_job_card else None
+        if (src_name or '').lower().endswith('.pdf'):
+            out = embed_signature_in_pdf(src_bytes, signature_bytes, preset=preset)
+            out_name = build_signed_filename(src_name)
+        else:
+            out = embed_signature_in_image(src_bytes, signature_bytes, preset=preset)
+            out_name = build_signed_name(src_name)
+
+        attachment = OrderAttachment.objects.create(order=order, file=ContentFile(out, name=out_name), uploaded_by=user)
+        if not order.signature_file:
+            order.signature_file.save(f"signature_{order.id}_{int(time.time())}.png", ContentFile(signature_bytes), save=False)
+        _mark_signed_completed(order, user)
+        order.save(update_fields=['status', 'started_at', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
+        return attachment
+
+    @staticmethod
+    def sign_supporting_attachment(attachment: OrderAttachment, signature_bytes: bytes, user=None) -> OrderAttachmentSignature:
+        """
+        Store a signed copy of a supporting document next to the original.
+        Raises SignatureEmbedError for unsupported file types or when embedding fails.
+        """
+        filename = attachment.filename()
+        filename_lower = filename.lower()
+        try:
+            attachment.file.open('rb')
+            try:
+                doc_bytes = attachment.file.read()
+            finally:
+                attachment.file.close()
+        except Exception as exc:
+            logger.error(f"Failed to read attachment: {exc}")
+            raise SignatureEmbedError('Could not read the document file.') from exc
+
+        if filename_lower.endswith('.pdf'):
+            try:
+                signed_bytes = embed_signature_in_pdf(doc_bytes, signature_bytes)
+            except Exception as exc:
+                logger.error(f"Failed to embed signature in PDF: {exc}")
+                raise SignatureEmbedError('Could not embed signature into PDF.') from exc
+            signed_name = build_signed_filename(filename)
+        elif filename_lower.endswith(SIGNABLE_IMAGE_EXTS):
+            try:
+                signed_bytes = embed_signature_in_image(doc_bytes, signature_bytes)
+            except Exception as exc:
+                logger.error(f"Failed to embed signature in image: {exc}")
+                raise SignatureEmbedError('Could not embed signature into image.') from exc
+            signed_name = build_signed_name(filename)
+        else:
+            raise SignatureEmbedError('Only PDF and image files can be signed.')
+
+        att_sig = OrderAttachmentSignature(
+            attachment=attachment,
+            signed_file=ContentFile(signed_bytes, name=signed_name),
+            signature_image=ContentFile(signature_bytes, name=f"sig_{attachment.id}_{int(time.time())}.png"),
+            signed_by=user,
+        )
+        att_sig.save()
+        try:
+            add_audit_log(user, 'supporting_doc_signed', f"Signed supporting document for order {attachment.order.order_number}")
+        except Exception:
+            pass
+        return att_sig
@@ -1,7 +1,20 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
+from .models import Customer, Invoice, Order, Vehicle
+from .services.customer_service import CustomerService
+from .services.customer_search_service import INDEXED_FIELDS, CustomerSearchService
+from .services.customer_stats_service import (
+    INVOICE_STAT_SOURCE_FIELDS, ORDER_STAT_SOURCE_FIELDS, VEHICLE_STAT_SOURCE_FIELDS, CustomerStatsService,
+)
+from .services.metrics_service import MetricsService
 from .utils import add_audit_log
+from .utils.dashboard_cache import bump_dashboard_version
+
+# Invoice fields that decide its contribution to Customer.total_spent
+SPEND_FIELDS = {'status', 'customer', 'customer_id', 'total_amount'}
 
 
 def _client_ip(request):
@@ -32,3 +45,122 @@ def on_user_login_failed(sender, credentials, request, **kwargs):
     ua = (request.META.get('HTTP_USER_AGENT') if request else '') or ''
     ua = ua[:200]
     add_audit_log(None, 'login_failed', f'Username: {username} from {ip or "?"} UA: {ua}')
+
+
+@receiver([post_save, post_delete], sender=Order)
+def on_order_changed(sender, instance, **kwargs):
+    # Order counts live on the creation day; linked invoice revenue follows the order's type/status
+    MetricsService.mark_dirty(instance.created_at, instance.branch_id, order_id=instance.pk)
+    bump_dashboard_version(instance.branch_id)
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def on_invoice_changed(sender, instance, **kwargs):
+    MetricsService.mark_dirty(instance.invoice_date, instance.branch_id)
+    bump_dashboard_version(instance.branch_id)
+
+
+def _order_stats(order):
+    return CustomerStatsService.order_contribution(order.customer_id, order.type, order.status, order.created_at)
+
+
+def _invoice_stats(invoice):
+    return CustomerStatsService.invoice_contribution(invoice.customer_id, invoice.status, invoice.total_amount, invoice.invoice_date)
+
+
+# Stats handlers remember what the stored row contributed to CustomerStats in pre_save
+# (False: the save cannot change it) so post_save applies only the difference
+
+@receiver(pre_save, sender=Order)
+def on_order_saving_stats(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not ORDER_STAT_SOURCE_FIELDS & set(update_fields)):
+        instance._previous_stats = False
+        return
+    previous = Order.objects.filter(pk=instance.pk).values_list('customer_id', 'type', 'status', 'created_at').first() if instance.pk else None
+    instance._previous_stats = CustomerStatsService.order_contribution(*previous) if previous else None
+
+
+@receiver(post_save, sender=Order)
+def on_order_saved_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_stats', False)
+    if previous is not False:
+        CustomerStatsService.order_changed(previous, _order_stats(instance))
+
+
+@receiver(post_delete, sender=Order)
+def on_order_deleted_stats(sender, instance, **kwargs):
+    CustomerStatsService.order_changed(_order_stats(instance), None, deleted=True)
+
+
+@receiver(pre_save, sender=Invoice)
+def on_invoice_saving(sender, instance, update_fields=None, raw=False, **kwargs):
+    # One read of the stored row for both total_spent (None: unchanged) and CustomerStats (False: unchanged)
+    fields = set(update_fields) if update_fields is not None else None
+    track_spend = fields is None or bool(SPEND_FIELDS & fields)
+    track_stats = not raw and (fields is None or bool(INVOICE_STAT_SOURCE_FIELDS & fields))
+    previous = None
+    if instance.pk and (track_spend or track_stats):
+        previous = Invoice.objects.filter(pk=instance.pk).values_list('customer_id', 'status', 'total_amount', 'invoice_date').first()
+    if track_spend:
+        instance._previous_spend = CustomerService.invoice_spend(previous[1], previous[0], previous[2]) if previous else (None, 0)
+    else:
+        instance._previous_spend = None
+    if track_stats:
+        instance._previous_stats = CustomerStatsService.invoice_contribution(*previous) if previous else None
+    else:
+        instance._previous_stats = False
+
+
+@receiver(post_save, sender=Invoice)
+def on_invoice_saved_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_stats', False)
+    if previous is not False:
+        CustomerStatsService.invoice_changed(previous, _invoice_stats(instance))
+
+
+@receiver(post_delete, sender=Invoice)
+def on_invoice_deleted_stats(sender, instance, **kwargs):
+    CustomerStatsService.invoice_changed(_invoice_stats(instance), None, deleted=True)
+
+
+@receiver(pre_save, sender=Vehicle)
+def on_vehicle_saving_stats(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not VEHICLE_STAT_SOURCE_FIELDS & set(update_fields)):
+        instance._previous_stats = False
+        return
+    instance._previous_stats = Vehicle.objects.filter(pk=instance.pk).values_list('customer_id', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Invoice)
+def on_invoice_saved_spend(sender, instance, raw=False, **kwargs):
+    if raw or getattr(instance, '_previous_spend', (None, 0)) is None:
+        return
+    previous = getattr(instance, '_previous_spend', (None, 0))
+    current = CustomerService.invoice_spend(instance.status, instance.customer_id, instance.total_amount)
+    CustomerService.apply_spend_change(previous, current)
+    instance._previous_spend = current
+
+
+@receiver(post_delete, sender=Invoice)
+def on_invoice_deleted_spend(sender, instance, **kwargs):
+    previous = CustomerService.invoice_spend(instance.status, instance.customer_id, instance.total_amount)
+    CustomerService.apply_spend_change(previous, (None, 0))
+
+
+@receiver(post_save, sender=Customer)
+def on_customer_saved(sender, instance, update_fields=None, **kwargs):
+    # Visit counters and status saves do not touch searchable fields
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    CustomerSearchService.reindex(instance)
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def on_vehicle_changed(sender, instance, signal=None, **kwargs):
+    # After commit, so a vehicle deleted together with its customer does not re-create rows
+    customer_id = instance.customer_id
+    transaction.on_commit(lambda: CustomerSearchService.reindex_customer_id(customer_id))
+    if signal is post_delete:
+        CustomerStatsService.vehicle_changed(customer_id, None, deleted=True)
+    elif getattr(instance, '_previous_stats', False) is not False:
+        CustomerStatsService.vehicle_changed(instance._previous_stats, customer_id)
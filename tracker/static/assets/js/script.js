@@ -318,17 +318,25 @@
     document.querySelectorAll('[data-order-id]').forEach(function(el){ ids.add(String(el.getAttribute('data-order-id'))); });
     return Array.from(ids);
   }
+  // Watermark of the order change feed; starts at the page's render time
+  var orderFeedSince = null;
   function refreshOrderStatuses(){
     var ids = collectOrderIdsFromPage();
-    if (!ids.length) return;
-    fetch('/api/orders/statuses/?ids='+ids.join(','))
+    if (!ids.length || document.hidden) return;
+    if (orderFeedSince === null) {
+      var meta = document.querySelector('meta[name="order-feed-since"]');
+      orderFeedSince = meta ? (meta.getAttribute('content') || '') : '';
+    }
+    fetch('/api/orders/changes/?since='+encodeURIComponent(orderFeedSince))
       .then(function(r){ return r.json(); })
       .then(function(data){
         if (!data || !data.success) return;
-        var map = data.orders || {};
+        orderFeedSince = data.watermark;
+        var onPage = new Set(ids);
         // Update any status badges/labels found next to links and in detail header
-        Object.keys(map).forEach(function(id){
-          var s = map[id];
+        (data.orders || []).forEach(function(s){
+          var id = String(s.id);
+          if (!onPage.has(id)) return;
           // Replace any text nodes that look like status
           document.querySelectorAll('[data-order-id="'+id+'"], a[href="/orders/'+id+'/"], tr[data-order-id="'+id+'"]').forEach(function(row){
             // Badge inside row
@@ -345,6 +353,8 @@
             }
           });
         });
+        // A full page means more changes are waiting
+        if (data.has_more) refreshOrderStatuses();
       }).catch(function(){ /* ignore */ });
   }
 
@@ -436,7 +446,7 @@
     enhanceOrderCompletionForm();
     reorganizeSalesServiceForm();
     refreshOrderStatuses();
-    setInterval(refreshOrderStatuses, 60000);
+    setInterval(refreshOrderStatuses, 20000);
     // Re-run when user changes intent
     document.addEventListener('change', function(e){ if(e.target && (e.target.name==='intent' || e.target.id==='registrationIntent')) reorganizeSalesServiceForm(); });
   });
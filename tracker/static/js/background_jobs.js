@@ -0,0 +1,60 @@
+/**
+ * Background Job Helper
+ * Runs slow endpoints (PDF extraction, document signing) through the job queue:
+ * the request is sent with async=true, the server answers 202 with a status URL,
+ * and the job is polled until it has finished.
+ */
+
+/**
+ * Drop-in replacement for fetch() on endpoints that accept async=true.
+ * Resolves with a Response whose JSON body is the finished job's result, so callers
+ * keep their usual `response.json()` handling. Failed jobs resolve with
+ * `{success: false, error, message}`; responses other than 202 are returned as-is.
+ * @param {string} url - The URL to POST to
+ * @param {object} options - Fetch options; a FormData body gets async=true added
+ * @param {object} polling - {interval, timeout} in milliseconds, and onProgress(percent)
+ * @returns {Promise<Response>}
+ */
+async function fetchJob(url, options = {}, polling = {}) {
+  const interval = polling.interval || 1000;
+  const timeout = polling.timeout || 5 * 60 * 1000;
+
+  if (options.body instanceof FormData || options.body instanceof URLSearchParams) {
+    options.body.set('async', 'true');
+  }
+  const headers = Object.assign({'X-Requested-With': 'XMLHttpRequest'}, options.headers || {});
+  const accepted = await fetch(url, {credentials: 'same-origin', ...options, headers: headers});
+  if (accepted.status !== 202) {
+    return accepted;
+  }
+
+  const job = await accepted.json();
+  const deadline = Date.now() + timeout;
+  let status = job;
+  while (!status.done) {
+    if (Date.now() > deadline) {
+      return jobResponse({success: false, error: 'Timed out waiting for the server. Please check again shortly.'});
+    }
+    await new Promise(resolve => setTimeout(resolve, interval));
+    const poll = await fetch(job.status_url, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}});
+    if (!poll.ok) {
+      return jobResponse({success: false, error: `Server error: ${poll.status}`});
+    }
+    status = await poll.json();
+    if (polling.onProgress) {
+      polling.onProgress(status.progress || 0);
+    }
+  }
+
+  if (status.status === 'failed') {
+    const result = Object.assign({}, status.result || {}, {success: false});
+    result.error = result.error || status.error;
+    result.message = result.message || status.error;
+    return jobResponse(result);
+  }
+  return jobResponse(status.result || {success: true});
+}
+
+function jobResponse(data) {
+  return new Response(JSON.stringify(data), {status: 200, headers: {'Content-Type': 'application/json'}});
+}
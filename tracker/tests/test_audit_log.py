@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import AuditEvent, AuditEventRollup
+from tracker.utils import add_audit_log, flush_audit_log, prune_audit_events
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auditor', password='pass')
+
+    def test_events_are_buffered_then_bulk_written(self):
+        for i in range(3):
+            add_audit_log(self.user, 'order_update', f'Updated order {i}', ip='10.0.0.1', order_id=i)
+        add_audit_log(None, 'login_failed', 'Username: ghost')
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_audit_log(), 4)
+        event = AuditEvent.objects.filter(action='order_update').first()
+        self.assertEqual(event.username, 'auditor')
+        self.assertEqual(event.user_id, self.user.id)
+        self.assertEqual(event.ip, '10.0.0.1')
+        self.assertEqual(AuditEvent.objects.get(action='login_failed').username, 'system')
+
+    def test_prune_rolls_up_old_events(self):
+        old = timezone.now() - timedelta(days=400)
+        AuditEvent.objects.bulk_create([AuditEvent(timestamp=old, username='auditor', action='login') for _ in range(3)])
+        AuditEvent.objects.create(username='auditor', action='login')
+        self.assertEqual(prune_audit_events(retention_days=180), 3)
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertEqual(AuditEventRollup.objects.get(action='login').count, 3)
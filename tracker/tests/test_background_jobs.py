@@ -0,0 +1,66 @@
+import fitz
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import BackgroundJob
+from tracker.services import JobService
+
+
+def _pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(["PI No : PI-777", "Customer Name : ACME LTD", "Gross Value : 500.00"]):
+        page.insert_text((40, 50 + 12 * i), line, fontsize=8)
+    return doc.tobytes()
+
+
+@override_settings(MEDIA_ROOT='/tmp/tracker-test-media')
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def test_async_extraction_is_queued_and_run_by_worker(self):
+        upload = SimpleUploadedFile('invoice.pdf', _pdf(), content_type='application/pdf')
+        resp = self.client.post(reverse('tracker:api_extract_invoice_preview'), {'file': upload, 'async': 'true'})
+        self.assertEqual(resp.status_code, 202)
+        status_url = resp.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'queued')
+
+        self.assertEqual(JobService.run_pending(), 1)
+        data = self.client.get(status_url).json()
+        self.assertEqual((data['status'], data['progress'], data['done']), ('succeeded', 100, True))
+        self.assertEqual(data['result']['header']['invoice_no'], 'PI-777')
+
+    def test_claim_is_exclusive_and_failures_are_recorded(self):
+        job = BackgroundJob.objects.create(kind='no_such_kind', created_by=self.user)
+        claimed = JobService.claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(JobService.claim_next())
+        JobService.run(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn('no_such_kind', job.error)
+
+        other = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('tracker:api_job_status', args=[job.pk])).status_code, 404)
+
+    def test_queued_upload_extraction_and_reported_failures(self):
+        upload = SimpleUploadedFile('invoice.pdf', _pdf(), content_type='application/pdf')
+        resp = self.client.post(reverse('tracker:api_upload_extract_invoice'), {'file': upload, 'async': 'true'})
+        self.assertEqual(resp.status_code, 202)
+        JobService.run_pending()
+        data = self.client.get(resp.json()['status_url']).json()
+        self.assertEqual((data['status'], data['result']['mode']), ('succeeded', 'preview'))
+
+        # An extraction that reports success=False is a failed job, not a succeeded one
+        upload = SimpleUploadedFile('notes.pdf', b'not a pdf', content_type='application/pdf')
+        resp = self.client.post(reverse('tracker:api_extract_invoice_preview'), {'file': upload, 'async': 'true'})
+        JobService.run_pending()
+        data = self.client.get(resp.json()['status_url']).json()
+        self.assertEqual(data['status'], 'failed')
+        self.assertTrue(data['error'])
+        self.assertFalse(data['result']['success'])
@@ -0,0 +1,44 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.models import Branch, Customer
+
+
+class CustomerDropdownApiTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.alice = Customer.objects.create(full_name='Alice Moshi', phone='0711000111', branch=self.branch)
+        self.bob = Customer.objects.create(full_name='Bob Juma', phone='0722000222', branch=self.branch)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        self.url = reverse('tracker:api_customers_list')
+
+    def test_full_list_is_streamed(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([c['full_name'] for c in data['customers']], ['Alice Moshi', 'Bob Juma'])
+
+    def test_search_and_limit(self):
+        response = self.client.get(self.url, {'q': 'juma'})
+        self.assertEqual([c['id'] for c in response.json()['customers']], [self.bob.pk])
+        # Searches also match vehicles, which the customer validators do not cover
+        self.assertFalse(response.has_header('ETag'))
+        data = self.client.get(self.url, {'limit': 1}).json()
+        self.assertEqual([c['id'] for c in data['customers']], [self.alice.pk])
+
+    def test_revalidation_until_a_customer_changes(self):
+        etag = self.client.get(self.url, {'limit': 10})['ETag']
+        self.assertEqual(self.client.get(self.url, {'limit': 10}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.bob.phone = '0722999999'
+        self.bob.save(update_fields=['phone'])
+        self.assertEqual(self.client.get(self.url, {'limit': 10}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_summary_projection(self):
+        url = reverse('tracker:api_customers_summary')
+        data = self.client.get(url, {'ids': f'{self.alice.pk},x'}).json()
+        self.assertEqual(data['customers'], {
+            str(self.alice.pk): {'last_visit': None, 'total_visits': 0, 'customer_type': 'personal'},
+        })
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, Order
+from tracker.services import CustomerService
+
+
+class CustomerCounterTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='Fleet Co', phone='123', branch=self.branch)
+
+    def test_visit_counted_once_per_day(self):
+        CustomerService.update_customer_visit(self.customer)
+        # A second (stale) instance, as a concurrent request would hold
+        stale = Customer.objects.get(pk=self.customer.pk)
+        CustomerService.update_customer_visit(self.customer)
+        CustomerService.update_customer_visit(stale)
+        self.assertEqual(self.customer.total_visits, 1)
+        self.assertEqual(stale.total_visits, 1)
+
+        Customer.objects.filter(pk=self.customer.pk).update(last_visit=timezone.now() - timedelta(days=1))
+        CustomerService.update_customer_visit(self.customer)
+        self.assertEqual(self.customer.total_visits, 2)
+
+    def test_total_spent_follows_invoices(self):
+        invoice = Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, total_amount=100, status='issued')
+        Invoice.objects.create(invoice_number='I-2', customer=self.customer, branch=self.branch, total_amount=50, status='paid')
+        invoice.total_amount = Decimal('120')
+        invoice.save()
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('170'))
+
+        invoice.status = 'cancelled'
+        invoice.save(update_fields=['status'])
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('50'))
+
+        invoice.delete()
+        Invoice.objects.get(status='paid').delete()
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.total_spent, Decimal('0'))
+
+    def test_reconcile_command_repairs_drift(self):
+        now = timezone.now()
+        for created_at in (now, now, now - timedelta(days=2)):
+            order = Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='created')
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, total_amount=75, status='paid')
+        Customer.objects.filter(pk=self.customer.pk).update(total_visits=9, total_spent=1)
+
+        out = StringIO()
+        call_command('reconcile_customer_counters', batch_size=1, stdout=out)
+        self.assertIn('for 1 customer(s)', out.getvalue())
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.total_visits, self.customer.total_spent), (2, Decimal('75')))
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, Order, Profile, Vehicle
+
+
+class CustomerGroupsDataTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        other = Branch.objects.create(name='B2', code='B2')
+        self.user = User.objects.create_user('staff', password='x')
+        Profile.objects.create(user=self.user, branch=self.branch)
+        self.client.force_login(self.user)
+
+        # Stats rows are refreshed after commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fleet = Customer.objects.create(full_name='Fleet Co', phone='0711000001', customer_type='company', branch=self.branch)
+            self.quiet = Customer.objects.create(full_name='Quiet Ltd', phone='0711000002', customer_type='company', branch=self.branch)
+            Customer.objects.create(full_name='Elsewhere Co', phone='0711000003', customer_type='company', branch=other)
+            Vehicle.objects.create(customer=self.fleet, plate_number='T100AAA')
+            Vehicle.objects.create(customer=self.fleet, plate_number='T200BBB')
+
+            for order_type, status, age in (('service', 'completed', 1), ('sales', 'created', 2), ('service', 'created', 400)):
+                order = Order.objects.create(customer=self.fleet, branch=self.branch, type=order_type, status=status)
+                Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=age))
+            Invoice.objects.create(invoice_number='I-1', customer=self.fleet, branch=self.branch, total_amount=100, status='paid')
+            Invoice.objects.create(invoice_number='I-2', customer=self.fleet, branch=self.branch, total_amount=40, status='cancelled')
+            Invoice.objects.create(invoice_number='I-3', customer=self.fleet, branch=self.branch, total_amount=30, status='paid',
+                                   invoice_date=timezone.localdate() - timedelta(days=400))
+
+    def test_rows_are_branch_scoped_with_period_aggregates(self):
+        response = self.client.get(reverse('tracker:customer_groups_data'), {
+            'draw': 3, 'start': 0, 'length': 10, 'group': 'company', 'period': '6months',
+            'columns[0][data]': 'recent_orders_count', 'order[0][column]': 0, 'order[0][dir]': 'desc',
+        })
+        payload = response.json()
+        self.assertEqual((payload['draw'], payload['recordsTotal'], payload['recordsFiltered']), (3, 2, 2))
+        first = payload['data'][0]
+        self.assertEqual(first['full_name'], 'Fleet Co')
+        self.assertEqual(
+            (first['recent_orders_count'], first['service_orders'], first['sales_orders'], first['completed_orders']),
+            (2, 1, 1, 1),
+        )
+        self.assertEqual((first['period_spent'], first['vehicles_count']), (100.0, 2))
+        self.assertEqual(payload['data'][1]['recent_orders_count'], 0)
+
+    def test_search_and_paging(self):
+        response = self.client.get(reverse('tracker:customer_groups_data'), {
+            'start': 0, 'length': 1, 'search[value]': 'quiet', 'columns[0][data]': 'full_name', 'order[0][column]': 0,
+        })
+        payload = response.json()
+        self.assertEqual((payload['recordsTotal'], payload['recordsFiltered']), (2, 1))
+        self.assertEqual([row['full_name'] for row in payload['data']], ['Quiet Ltd'])
+
+    def test_group_summary(self):
+        payload = self.client.get(reverse('tracker:api_customer_groups_data'), {'group': 'company', 'activity': 'active'}).json()
+        company = payload['groups']['company']
+        self.assertEqual((company['customer_count'], company['total_orders'], company['total_revenue']), (1, 2, 100.0))
+        self.assertEqual([c['full_name'] for c in payload['group_details']['customers']], ['Fleet Co'])
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, CustomerSearchToken, Vehicle
+from tracker.services import CustomerSearchService
+
+
+class CustomerSearchTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.john = Customer.objects.create(full_name='John Mwita', phone='+255 712 345 678', email='john@acme.co.tz', branch=self.branch)
+        self.jane = Customer.objects.create(full_name='Jane Johnson', phone='0754111222', organization_name='Acme Motors', branch=self.branch)
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.create(customer=self.jane, plate_number='T 123 ABC')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def _search(self, q):
+        return [c.pk for c in CustomerSearchService.search(Customer.objects.all(), q)]
+
+    def test_index_is_maintained_on_save(self):
+        tokens = set(CustomerSearchToken.objects.filter(customer=self.jane).values_list('field', 'token'))
+        self.assertTrue({('name', 'jane'), ('organization', 'motors'), ('phone', '0754111222'), ('phone', '1222'), ('plate', 't123abc')} <= tokens)
+        self.jane.full_name = 'Janet Johnson'
+        self.jane.save()
+        self.assertEqual(self._search('janet'), [self.jane.pk])
+
+    def test_ranked_prefix_search_across_fields(self):
+        # Exact word match ranks above the prefix match in "Johnson"
+        self.assertEqual(self._search('john'), [self.john.pk, self.jane.pk])
+        self.assertEqual(self._search('jane acme'), [self.jane.pk])
+        self.assertEqual(self._search('acme.co.tz'), [self.john.pk])
+        self.assertEqual(self._search('nobody'), [])
+
+    def test_phone_and_plate_fast_paths(self):
+        self.assertEqual(self._search('0712 345'), [])
+        self.assertEqual(self._search('712 345'), [self.john.pk])
+        self.assertEqual(self._search('5678'), [self.john.pk])
+        self.assertEqual(self._search('t123'), [self.jane.pk])
+        self.assertEqual(self._search('T-123-ABC'), [self.jane.pk])
+
+    def test_search_endpoint(self):
+        data = self.client.get(reverse('tracker:customers_search'), {'q': 'mwita'}).json()
+        self.assertEqual([r['id'] for r in data['results']], [self.john.pk])
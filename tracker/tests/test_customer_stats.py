@@ -0,0 +1,112 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, CustomerStats, Invoice, Order, Vehicle
+from tracker.services import CustomerStatsService
+
+
+class CustomerStatsTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='Fleet Co', phone='123', branch=self.branch)
+
+    def test_writes_refresh_the_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='completed')
+            Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='cancelled')
+            Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+            Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, total_amount=100, status='paid')
+            Invoice.objects.create(invoice_number='I-2', customer=self.customer, branch=self.branch, total_amount=40, status='cancelled')
+        stats = CustomerStats.objects.get(customer=self.customer)
+        self.assertEqual(
+            (stats.order_count, stats.service_orders, stats.sales_orders, stats.completed_orders, stats.cancelled_orders),
+            (2, 1, 1, 1, 1),
+        )
+        self.assertEqual((stats.vehicle_count, stats.invoice_count), (1, 1))
+        self.assertEqual((stats.lifetime_spend, stats.spend_30d), (Decimal('100'), Decimal('100')))
+
+        other = Customer.objects.create(full_name='Other', phone='456', branch=self.branch)
+        with self.captureOnCommitCallbacks(execute=True):
+            invoice = Invoice.objects.get(invoice_number='I-1')
+            invoice.customer = other
+            invoice.save()
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).lifetime_spend, Decimal('0'))
+        self.assertEqual(CustomerStats.objects.get(customer=other).lifetime_spend, Decimal('100'))
+
+    def test_deltas_track_the_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='created')
+            vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T100AAA')
+            invoice = Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, total_amount=100,
+                                             status='paid', invoice_date=timezone.localdate() - timedelta(days=40))
+        CustomerStats.objects.filter(customer=self.customer).update(rolling_as_of=timezone.localdate() - timedelta(days=1))
+
+        other = Customer.objects.create(full_name='Other', phone='456', branch=self.branch)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'completed'
+            order.save()
+            Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+            invoice.total_amount = 60
+            invoice.save()
+            Invoice.objects.create(invoice_number='I-2', customer=other, branch=self.branch, total_amount=10, status='paid')
+            vehicle.delete()
+        self.assertEqual(CustomerStatsService.check(), [])
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).spend_90d, Decimal('60'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(CustomerStatsService.check(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='created')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).order_count, 1)
+
+    def test_bulk_inquiry_actions_refresh_the_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            inquiry = Order.objects.create(customer=self.customer, branch=self.branch, type='inquiry', status='created')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = reverse('tracker:api_inquiry_bulk_action')
+
+        self.client.post(url, {'action': 'mark_resolved', 'inquiry_ids[]': [inquiry.pk]})
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).completed_orders, 1)
+        self.client.post(url, {'action': 'mark_pending', 'inquiry_ids[]': [inquiry.pk]})
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).completed_orders, 0)
+        self.assertEqual(CustomerStatsService.check(), [])
+
+    def test_rolling_spend_moves_forward(self):
+        invoice = Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, total_amount=100,
+                                         status='paid', invoice_date=timezone.localdate() - timedelta(days=30))
+        CustomerStatsService.rebuild([self.customer.pk], today=invoice.invoice_date + timedelta(days=29))
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).spend_30d, Decimal('100'))
+
+        self.assertEqual(CustomerStatsService.roll_forward(), 1)
+        stats = CustomerStats.objects.get(customer=self.customer)
+        self.assertEqual((stats.spend_30d, stats.spend_90d, stats.rolling_as_of), (Decimal('100'), Decimal('100'), timezone.localdate()))
+        CustomerStatsService.rebuild([self.customer.pk], today=timezone.localdate() + timedelta(days=1))
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).spend_30d, Decimal('0'))
+
+    def test_check_reports_and_fixes_drift(self):
+        Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='created')
+        CustomerStatsService.rebuild_all()
+        self.assertEqual(CustomerStatsService.check(), [])
+
+        CustomerStats.objects.filter(customer=self.customer).update(order_count=7)
+        out = StringIO()
+        call_command('check_customer_stats', stdout=out)
+        self.assertIn('order_count: 7 != 1', out.getvalue())
+
+        call_command('check_customer_stats', fix=True, stdout=StringIO())
+        self.assertEqual(CustomerStats.objects.get(customer=self.customer).order_count, 1)
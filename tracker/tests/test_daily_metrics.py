@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, DailyBranchMetrics, Invoice, Order
+from tracker.services import MetricsService
+
+
+class DailyBranchMetricsTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        self.today = timezone.localdate()
+
+    def _rows(self):
+        return {
+            (m.order_type, m.status): m
+            for m in DailyBranchMetrics.objects.filter(branch=self.branch, day=self.today)
+        }
+
+    def test_rebuild_day_groups_orders_and_invoice_revenue(self):
+        done = Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='completed', actual_duration=30)
+        Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='completed', actual_duration=50)
+        Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+        Invoice.objects.create(invoice_number='I-1', customer=self.customer, branch=self.branch, order=done,
+                               subtotal=100, tax_amount=18, total_amount=118, status='issued')
+        Invoice.objects.create(invoice_number='I-2', customer=self.customer, branch=self.branch,
+                               subtotal=10, total_amount=10, status='paid')
+        Invoice.objects.create(invoice_number='I-3', customer=self.customer, branch=self.branch,
+                               total_amount=999, status='cancelled')
+
+        MetricsService.rebuild_day(self.today)
+        rows = self._rows()
+        completed = rows[('service', 'completed')]
+        self.assertEqual((completed.order_count, completed.duration_minutes, completed.duration_count), (2, 80, 2))
+        self.assertEqual((completed.invoice_count, completed.revenue, completed.tax), (1, Decimal('118'), Decimal('18')))
+        self.assertEqual(rows[('sales', 'created')].order_count, 1)
+        # Unlinked invoices are kept under a blank type/status; cancelled ones are excluded
+        self.assertEqual(rows[('', '')].revenue, Decimal('10'))
+
+    def test_saves_refresh_the_day_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+        self.assertEqual(self._rows()[('sales', 'created')].order_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'completed'
+            order.save(update_fields=['status'])
+        rows = self._rows()
+        self.assertNotIn(('sales', 'created'), rows)
+        self.assertEqual(rows[('sales', 'completed')].order_count, 1)
+
+    def test_refresh_is_limited_to_the_written_branch(self):
+        other = Branch.objects.create(name='B2', code='B2')
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, branch=other, type='sales', status='created')
+        # A stale row of the other branch survives a refresh triggered in this branch
+        DailyBranchMetrics.objects.filter(branch=other).update(order_count=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='created')
+        self.assertEqual(self._rows()[('service', 'created')].order_count, 1)
+        self.assertEqual(DailyBranchMetrics.objects.get(branch=other, day=self.today).order_count, 5)
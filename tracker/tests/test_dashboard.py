@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Order
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        temp = Customer.objects.create(full_name='Plate T123', phone='PLATE_T123', branch=self.branch)
+        Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+        Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='completed', priority='high')
+        Order.objects.create(customer=temp, branch=self.branch, type='sales', status='created')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_kpis_exclude_temporary_customers(self):
+        ctx = self.client.get(reverse('tracker:dashboard')).context
+        self.assertEqual(ctx['total_orders'], 2)
+        self.assertEqual(ctx['total_customers'], 1)
+        self.assertEqual((ctx['completed_today'], ctx['new_orders_today'], ctx['completed_orders']), (1, 1, 1))
+        self.assertEqual(ctx['status_counts']['created'], 1)
+        self.assertEqual(ctx['status_counts']['overdue'], 0)
+        self.assertEqual(ctx['type_counts'], {'sales': 1, 'service': 1})
+
+    def test_cached_until_an_order_is_written(self):
+        url = reverse('tracker:dashboard')
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            ctx = self.client.get(url).context
+        self.assertLess(len(warm.captured_queries), len(cold.captured_queries))
+        self.assertEqual(ctx['total_orders'], 2)
+
+        Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+        self.assertEqual(self.client.get(url).context['total_orders'], 3)
@@ -0,0 +1,61 @@
+import re
+from datetime import date, datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order, Profile
+from tracker.utils.mysql_compat import between_dates, on_date, period_range
+
+# DATE(...) on MySQL, django_datetime_cast_date(...) on SQLite
+DATE_WRAPPER = re.compile(r'date\(', re.IGNORECASE)
+
+
+class DateRangeHelperTests(TestCase):
+    def test_ranges_are_half_open_local_days(self):
+        start, end = period_range('month', date(2024, 12, 15))
+        self.assertEqual((timezone.localtime(start).date(), timezone.localtime(end).date()), (date(2024, 12, 1), date(2025, 1, 1)))
+        start, end = period_range('week', date(2024, 5, 1))
+        self.assertEqual((start.date(), (end - start).days), (date(2024, 4, 29), 7))
+        q = on_date('created_at', date(2024, 5, 1))
+        self.assertEqual(sorted(k for k, _ in q.children), ['created_at__gte', 'created_at__lt'])
+
+    def test_day_boundaries_follow_the_current_time_zone(self):
+        customer = Customer.objects.create(full_name='A', phone='1')
+        midnight = timezone.make_aware(datetime(2024, 5, 1))
+        for moment in (midnight, midnight - timezone.timedelta(microseconds=1)):
+            Order.objects.filter(pk=Order.objects.create(customer=customer, type='service').pk).update(created_at=moment)
+        self.assertEqual(Order.objects.filter(on_date('created_at', date(2024, 5, 1))).count(), 1)
+        self.assertEqual(Order.objects.filter(between_dates('created_at', date(2024, 4, 30), date(2024, 5, 1))).count(), 2)
+
+
+class NoDateWrapperInKpiQueriesTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch, last_visit=timezone.now())
+        Order.objects.create(customer=customer, branch=self.branch, type='service', status='created')
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        Profile.objects.create(user=user, branch=self.branch)
+        self.client.force_login(user)
+
+    def test_kpi_screens_filter_on_bare_datetime_columns(self):
+        requests = [
+            ('tracker:dashboard', {}),
+            ('tracker:orders_list', {'date_range': 'today'}),
+            ('tracker:customers_list', {'status': 'active'}),
+            ('tracker:started_orders_dashboard', {}),
+            ('tracker:api_started_orders_kpis', {}),
+            ('tracker:api_branch_metrics', {'period': 'weekly'}),
+            ('tracker:api_notifications_summary', {}),
+            ('tracker:api_service_distribution', {'period': 'quarter'}),
+            ('tracker:api_customer_groups_data', {'group': 'personal'}),
+        ]
+        for name, params in requests:
+            with self.subTest(view=name), CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse(name), params)
+            wrapped = [q['sql'] for q in ctx.captured_queries if DATE_WRAPPER.search(q['sql'])]
+            self.assertEqual(wrapped, [], name)
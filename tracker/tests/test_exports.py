@@ -0,0 +1,60 @@
+import csv
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Order, Profile
+from tracker.services import JobService
+from tracker.services import export_service
+
+
+def _rows(response):
+    return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+
+@override_settings(MEDIA_ROOT='/tmp/tracker-test-media')
+class ExportTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        other = Branch.objects.create(name='B2', code='B2')
+        self.user = User.objects.create_user('staff', password='x')
+        Profile.objects.create(user=self.user, branch=self.branch)
+        self.client.force_login(self.user)
+        self.customers = [
+            Customer.objects.create(full_name=f'Customer {i}', phone=f'07110000{i:02d}', branch=self.branch)
+            for i in range(5)
+        ]
+        Customer.objects.create(full_name='Elsewhere', phone='0711999999', branch=other)
+        for customer in self.customers[:3]:
+            Order.objects.create(customer=customer, branch=self.branch, type='service', status='created')
+
+    @mock.patch.object(export_service, 'EXPORT_CHUNK_SIZE', 2)
+    def test_csv_streams_every_scoped_row_across_chunks(self):
+        response = self.client.get(reverse('tracker:customers_export'))
+        self.assertTrue(response.streaming)
+        rows = _rows(response)
+        self.assertEqual(rows[0][:2], ['Code', 'Name'])
+        self.assertEqual(sorted(r[1] for r in rows[1:]), [c.full_name for c in self.customers])
+
+        rows = _rows(self.client.get(reverse('tracker:orders_export'), {'type': 'service'}))
+        self.assertEqual(sorted(r[1] for r in rows[1:]), [c.full_name for c in self.customers[:3]])
+
+    def test_async_export_is_stored_for_download(self):
+        response = self.client.get(reverse('tracker:customer_groups_export'), {'async': 'true', 'period': '1month'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(JobService.run_pending(), 1)
+        result = self.client.get(response.json()['status_url']).json()['result']
+        self.assertEqual(result['rows'], 5)
+
+        download = self.client.get(result['download_url'])
+        rows = list(csv.reader(b''.join(download.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sum(int(r[6]) for r in rows[1:]), 3)
+
+    def test_unavailable_format_is_rejected(self):
+        with mock.patch.object(export_service, 'OPENPYXL_AVAILABLE', False):
+            response = self.client.get(reverse('tracker:orders_export'), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('tracker:orders_export'), {'format': 'pdf'}).status_code, 400)
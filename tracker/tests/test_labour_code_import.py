@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from tracker.models import LabourCode
+from tracker.views_labour_codes import _process_csv_import
+
+CSV = (
+    "Code,Description,Category,is_active\n"
+    "22007,OIL SERVICE,Labour,\n"
+    "21044,WHEEL BALANCE,tyre service,no\n"
+    ",MISSING CODE,labour,\n"
+    "21031,,labour,\n"
+    "30001,FIRST,labour,\n"
+    "30001,SECOND,labour,\n"
+)
+
+
+class LabourCodeImportTests(TestCase):
+    def setUp(self):
+        LabourCode.objects.create(code='22007', description='OIL SERVICE', category='service')
+        LabourCode.objects.create(code='99999', description='OLD', category='labour')
+
+    def test_upsert_with_row_errors(self):
+        stats = _process_csv_import(CSV)
+        self.assertTrue(stats['success'])
+        self.assertEqual((stats['created'], stats['updated'], stats['deleted']), (2, 1, 0))
+        self.assertEqual(stats['error_details'], [
+            'Row 4: Code is required',
+            'Row 5: Description is required',
+            'Row 6: Code 30001 appears again further down; the later row was used',
+        ])
+        codes = {c.code: c for c in LabourCode.objects.all()}
+        self.assertEqual(codes['22007'].category, 'labour')
+        self.assertFalse(codes['21044'].is_active)
+        # A blank is_active cell imports as inactive, as it always has
+        self.assertFalse(codes['30001'].is_active)
+        self.assertEqual(codes['30001'].description, 'SECOND')
+        self.assertIn('99999', codes)
+
+    def test_dry_run_reports_diff_without_writing(self):
+        stats = _process_csv_import(CSV, clear_existing=True, dry_run=True)
+        self.assertEqual((stats['created'], stats['updated'], stats['deleted']), (2, 1, 1))
+        update = next(c for c in stats['changes'] if c['code'] == '22007')
+        self.assertEqual(update['fields'], [
+            {'field': 'category', 'old': 'service', 'new': 'labour'},
+            {'field': 'is_active', 'old': True, 'new': False},
+        ])
+        self.assertEqual(LabourCode.objects.count(), 2)
+
+    def test_clear_existing_removes_codes_missing_from_file(self):
+        _process_csv_import(CSV, clear_existing=True)
+        self.assertEqual(set(LabourCode.objects.values_list('code', flat=True)), {'22007', '21044', '30001'})
+
+    def test_missing_columns(self):
+        stats = _process_csv_import("code,description\n1,A\n")
+        self.assertFalse(stats['success'])
+        self.assertIn('code, description, category', stats['error_message'])
@@ -0,0 +1,33 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Invoice, NumberSequence, Order
+
+
+class NumberSequenceTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+
+    def test_next_value_increments(self):
+        self.assertEqual(NumberSequence.next_value('test'), 1)
+        self.assertEqual(NumberSequence.next_value('test'), 2)
+        self.assertEqual(NumberSequence.next_value('other', seed=lambda: 41), 42)
+
+    def test_invoice_numbers_continue_from_existing_data(self):
+        prefix = f"INV-{timezone.localdate().year}-"
+        Invoice.objects.create(invoice_number=f"{prefix}00007", customer=self.customer, branch=self.branch)
+        first = Invoice(customer=self.customer, branch=self.branch)
+        self.assertEqual(first.generate_invoice_number(), f"{prefix}00008")
+        first.save()
+        # Counter is seeded once; later allocations are increment + read + uniqueness probe (plus savepoint)
+        with self.assertNumQueries(5):
+            number = Invoice(customer=self.customer).generate_invoice_number()
+        self.assertEqual(number, f"{prefix}00009")
+
+    def test_order_and_customer_codes_are_unique(self):
+        orders = [Order.objects.create(customer=self.customer, branch=self.branch, type='service') for _ in range(3)]
+        self.assertEqual(len({o.order_number for o in orders}), 3)
+        other = Customer.objects.create(full_name='Jane Doe', phone='456', branch=self.branch)
+        self.assertNotEqual(other.code, self.customer.code)
+        self.assertTrue(other.code.startswith('CUST'))
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order, Profile
+from tracker.services import order_feed_service
+
+
+class OrderChangeFeedTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        other_branch = Branch.objects.create(name='B2', code='B2')
+        customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        self.order = Order.objects.create(customer=customer, branch=self.branch, type='service', status='created')
+        self.other = Order.objects.create(customer=customer, branch=other_branch, type='service', status='created')
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        user = User.objects.create_user('clerk', password='pw')
+        Profile.objects.create(user=user, branch=self.branch)
+        self.client.force_login(user)
+        self.url = reverse('tracker:api_orders_changes')
+
+    def test_feed_returns_branch_orders_changed_after_watermark(self):
+        watermark = self.client.get(self.url).json()['watermark']
+        self.assertEqual(self.client.get(self.url, {'since': watermark}).json()['orders'], [])
+
+        for order in (self.order, self.other):
+            order.status = 'in_progress'
+            order.save(update_fields=['status'])
+        data = self.client.get(self.url, {'since': watermark}).json()
+        self.assertEqual([(o['id'], o['status_display']) for o in data['orders']], [(self.order.pk, 'In Progress')])
+
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+    def test_full_page_hands_out_a_keyset_watermark(self):
+        second = Order.objects.create(customer=self.order.customer, branch=self.branch, type='sales', status='created')
+        Order.objects.update(updated_at=timezone.now())
+        feed = order_feed_service.OrderFeedService
+        branch_orders = Order.objects.filter(branch=self.branch)
+
+        first_page = feed.changes(branch_orders, feed.parse_watermark((timezone.now() - timedelta(minutes=1)).isoformat()), limit=1)
+        self.assertEqual(([o['id'] for o in first_page['orders']], first_page['has_more']), ([self.order.pk], True))
+        next_page = feed.changes(branch_orders, feed.parse_watermark(first_page['watermark']), limit=1)
+        self.assertEqual(([o['id'] for o in next_page['orders']], next_page['has_more']), ([second.pk], False))
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tracker.models import Order, Customer, Branch
+from tracker.services import OrderStatusService
+
+
+class OrderStatusServiceTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+
+    def _order(self, **kwargs):
+        return Order.objects.create(branch=self.branch, customer=self.customer, type='service', **kwargs)
+
+    def test_created_orders_progress_after_ten_minutes(self):
+        now = timezone.now()
+        old = self._order(created_at=now - timedelta(minutes=15))
+        fresh = self._order(created_at=now - timedelta(minutes=2))
+        OrderStatusService.run_transitions(now)
+        old.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(old.status, 'in_progress')
+        self.assertEqual(old.started_at, old.created_at)
+        self.assertEqual(fresh.status, 'created')
+
+    def test_in_progress_orders_become_overdue_after_threshold(self):
+        now = timezone.now()
+        late = self._order(status='in_progress', started_at=now - timedelta(hours=10))
+        on_time = self._order(status='in_progress', started_at=now - timedelta(hours=2))
+        results = OrderStatusService.run_transitions(now)
+        late.refresh_from_db()
+        on_time.refresh_from_db()
+        self.assertEqual(late.status, 'overdue')
+        self.assertEqual(on_time.status, 'in_progress')
+        self.assertEqual(results['overdue'], 1)
+
+    def test_sweep_uses_constant_number_of_queries(self):
+        now = timezone.now()
+        for _ in range(5):
+            self._order(status='in_progress', started_at=now - timedelta(hours=12))
+        with CaptureQueriesContext(connection) as ctx:
+            OrderStatusService.run_transitions(now)
+        statements = [q['sql'] for q in ctx.captured_queries if not q['sql'].upper().startswith(('SAVEPOINT', 'RELEASE'))]
+        # Inquiries, progress, two deadline backfills, overdue lookup + overdue update
+        self.assertEqual(len(statements), 6)
+        self.assertEqual(sum(1 for sql in statements if sql.upper().startswith('UPDATE')), 5)
+
+    def test_overdue_deadline_is_persisted_on_save(self):
+        now = timezone.now()
+        order = self._order(status='in_progress', started_at=now)
+        self.assertEqual(order.overdue_at, now + timedelta(hours=9))
+        order.started_at = now - timedelta(hours=1)
+        order.save(update_fields=['started_at'])
+        order.refresh_from_db()
+        self.assertEqual(order.overdue_at, now + timedelta(hours=8))
+
+    def test_mark_overdue_returns_affected_ids(self):
+        now = timezone.now()
+        late = self._order(status='in_progress', started_at=now - timedelta(hours=10))
+        self._order(status='in_progress', started_at=now - timedelta(hours=1))
+        self.assertEqual(OrderStatusService.mark_overdue_orders(now), [late.id])
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order
+from tracker.utils.pagination import keyset_page
+
+
+class OrdersListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        temp = Customer.objects.create(full_name='Plate T123', phone='PLATE_T123', branch=self.branch)
+        Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created', priority='urgent')
+        Order.objects.create(customer=self.customer, branch=self.branch, type='service', status='in_progress')
+        Order.objects.create(customer=temp, branch=self.branch, type='sales', status='created')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_kpis_from_one_cached_query(self):
+        url = reverse('tracker:orders_list')
+        ctx = self.client.get(url).context
+        self.assertEqual(
+            (ctx['total_orders'], ctx['pending_orders'], ctx['active_orders'], ctx['urgent_orders']),
+            (2, 1, 2, 1),
+        )
+        self.assertEqual((ctx['started_total'], ctx['started_pending'], ctx['started_completed']), (3, 1, 0))
+        self.assertEqual(len(ctx['orders']), 2)
+
+        Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+        self.assertEqual(self.client.get(url).context['total_orders'], 3)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        # Shared timestamps make the id tie-breaker matter
+        stamp = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            order = Order.objects.create(customer=self.customer, branch=self.branch, type='sales', status='created')
+            Order.objects.filter(pk=order.pk).update(created_at=stamp - timedelta(minutes=i // 2))
+        qs = Order.objects.all()
+        expected = list(qs.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen, page, pages = [], keyset_page(qs, per_page=3), []
+        while True:
+            pages.append(page)
+            seen += [o.pk for o in page]
+            if not page.next_cursor:
+                break
+            page = keyset_page(qs, after=page.next_cursor, per_page=3)
+        self.assertEqual(seen, expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = keyset_page(qs, before=pages[2].previous_cursor, per_page=3)
+        self.assertEqual([o.pk for o in back], [o.pk for o in pages[1]])
@@ -0,0 +1,45 @@
+from unittest import mock
+
+import fitz
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from tracker.utils import pdf_text_extractor
+
+
+def _invoice_pdf():
+    doc = fitz.open()
+    page = doc.new_page()
+    lines = [
+        "PI No : PI-12345", "Date : 12/05/2024", "Customer Name : ACME LTD Tel 0712345678",
+        "Cust Ref : FOR T 123 ABC", "Sr No Item Code Description Unit Qty Rate Value",
+        "1 40001 TYRE 195/65R15 PCS 2 100,000.00 200,000.00",
+        "Net Value : 200,000.00", "VAT : 36,000.00", "Gross Value : 236,000.00",
+    ]
+    for i, line in enumerate(lines):
+        page.insert_text((40, 50 + 12 * i), line, fontsize=8)
+    return doc.tobytes()
+
+
+class PdfExtractionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_extracts_header_items_and_totals(self):
+        result = pdf_text_extractor.extract_from_bytes(_invoice_pdf(), 'invoice.pdf')
+        header = result['header']
+        self.assertTrue(result['success'])
+        self.assertEqual((header['invoice_no'], header['date'], header['customer_name']), ('PI-12345', '12/05/2024', 'ACME LTD'))
+        self.assertEqual((header['reference'], header['phone']), ('FOR T 123 ABC', '0712345678'))
+        self.assertEqual((header['subtotal'], header['tax'], header['total']), (200000.0, 36000.0, 236000.0))
+        self.assertEqual([(i['code'], i['qty'], i['value']) for i in result['items']], [('40001', 2, 200000.0)])
+
+    def test_same_content_is_extracted_once(self):
+        data = _invoice_pdf()
+        with mock.patch.object(pdf_text_extractor, 'extract_text_from_pdf', wraps=pdf_text_extractor.extract_text_from_pdf) as spy:
+            first = pdf_text_extractor.extract_from_bytes(data, 'preview.pdf')
+            first['items'].clear()
+            second = pdf_text_extractor.extract_from_bytes(data, 'upload.pdf')
+        self.assertEqual(spy.call_count, 1)
+        # Callers get their own copy of the cached result
+        self.assertEqual(len(second['items']), 1)
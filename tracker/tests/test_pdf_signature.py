@@ -0,0 +1,74 @@
+from io import BytesIO
+from unittest import mock
+
+import fitz
+import numpy as np
+from django.test import SimpleTestCase
+from PIL import Image, ImageDraw
+
+from tracker.management.commands.benchmark_signature import convert_to_blue_ink_pixelwise
+from tracker.utils import pdf_signature
+
+
+def _pdf(pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+    return doc.tobytes()
+
+
+def _signature(seed=0):
+    img = Image.new('RGBA', (300, 100), (255, 255, 255, 0))
+    ImageDraw.Draw(img).line([(10, 80), (120, 20 + seed), (290, 70)], fill=(0, 0, 0, 255), width=4)
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class PdfSignatureTests(SimpleTestCase):
+    def setUp(self):
+        pdf_signature._signature_cache.clear()
+
+    def test_signature_is_appended_as_incremental_update_on_last_page(self):
+        original = _pdf()
+        signed = pdf_signature.embed_signature_in_pdf(original, _signature())
+        self.assertTrue(signed.startswith(original))
+        doc = fitz.open(stream=signed, filetype='pdf')
+        self.assertEqual([len(page.get_images()) for page in doc], [0, 1])
+        rect = doc[-1].get_image_rects(doc[-1].get_images()[0][0])[0]
+        self.assertGreater(rect.x0, doc[-1].rect.width * 0.5)
+        self.assertGreater(rect.y0, doc[-1].rect.height * 0.5)
+
+    def test_signature_processed_once_across_documents(self):
+        signature = _signature()
+        with mock.patch.object(pdf_signature, '_convert_to_blue_ink', wraps=pdf_signature._convert_to_blue_ink) as spy:
+            pdf_signature.embed_signature_in_pdf(_pdf(), signature)
+            pdf_signature.embed_signature_in_pdf(_pdf(3), signature, preset='job_card')
+            pdf_signature.embed_signature_in_pdf(_pdf(), _signature(seed=5))
+        self.assertEqual(spy.call_count, 2)
+
+    def test_falls_back_to_rewrite_without_pymupdf(self):
+        original = _pdf()
+        with mock.patch.object(pdf_signature, 'fitz', None):
+            signed = pdf_signature.embed_signature_in_pdf(original, _signature())
+        self.assertFalse(signed.startswith(original))
+        self.assertEqual(len(fitz.open(stream=signed, filetype='pdf')[-1].get_images()), 1)
+
+    def test_vectorized_blue_ink_matches_pixelwise_conversion(self):
+        rng = np.random.default_rng(1)
+        pixels = rng.integers(0, 256, size=(64, 64, 4), dtype=np.uint8)
+        pixels[0, :, 3] = np.arange(64) * 4 + 3  # cover the alpha threshold and saturation
+        image = Image.fromarray(pixels, 'RGBA')
+        self.assertTrue(np.array_equal(
+            np.asarray(pdf_signature._convert_to_blue_ink(image)),
+            np.asarray(convert_to_blue_ink_pixelwise(image)),
+        ))
+
+    def test_trims_empty_canvas_around_strokes(self):
+        img = Image.new('RGBA', (1000, 400), (0, 0, 0, 0))
+        ImageDraw.Draw(img).rectangle([300, 150, 499, 199], fill=(0, 0, 0, 255))
+        trimmed = pdf_signature._trim_to_ink(img)
+        pad = pdf_signature.TRIM_PADDING
+        self.assertEqual(trimmed.size, (200 + 2 * pad, 50 + 2 * pad))
+        blank = Image.new('RGBA', (50, 20), (0, 0, 0, 0))
+        self.assertIs(pdf_signature._trim_to_ink(blank), blank)
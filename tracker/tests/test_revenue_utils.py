@@ -0,0 +1,48 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from tracker.models import Branch, Customer, Invoice, InvoiceLineItem
+from tracker.utils.revenue_utils import get_revenue_by_order_type, get_revenue_by_order_type_over_time
+
+
+class RevenueByOrderTypeTests(TestCase):
+    def setUp(self):
+        branch = Branch.objects.create(name='B1', code='B1')
+        customer = Customer.objects.create(full_name='John Doe', phone='123', branch=branch)
+        rows = [
+            (date(2025, 1, 5), 'issued', [('labour', '100', '18'), ('sales', '50', '0')]),
+            (date(2025, 1, 5), 'paid', [('service', '20', '0'), ('bogus', '5', '0')]),
+            (date(2025, 2, 1), 'issued', [('sales', '10', '1.80')]),
+            (date(2025, 2, 1), 'cancelled', [('sales', '999', '0')]),
+        ]
+        for i, (day, status, items) in enumerate(rows):
+            inv = Invoice.objects.create(invoice_number=f'T-{i}', customer=customer, branch=branch, invoice_date=day, status=status)
+            for order_type, total, tax in items:
+                InvoiceLineItem.objects.create(
+                    invoice=inv, description='x', unit_price=Decimal(total),
+                    line_total=Decimal(total), tax_amount=Decimal(tax), order_type=order_type,
+                )
+
+    def test_breakdown_is_one_grouped_query_plus_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            result = get_revenue_by_order_type()
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(result['labour'], Decimal('118'))
+        self.assertEqual(result['sales'], Decimal('61.80'))
+        self.assertEqual(result['service'], Decimal('20'))
+        self.assertEqual(result['unknown'], Decimal('5'))
+        self.assertEqual(result['total'], Decimal('204.80'))
+        self.assertEqual(result['count'], 3)
+
+    def test_monthly_series(self):
+        series = get_revenue_by_order_type_over_time(period='month')
+        self.assertEqual([row['date'] for row in series], [date(2025, 1, 1), date(2025, 2, 1)])
+        self.assertEqual(series[0]['total'], Decimal('193'))
+        self.assertEqual(series[1]['sales'], Decimal('11.80'))
+        january = get_revenue_by_order_type_over_time(date_from=date(2025, 1, 1), date_to=date(2025, 1, 31))
+        self.assertEqual(len(january), 1)
+        self.assertEqual(january[0]['date'], date(2025, 1, 5))
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Branch, Customer, Order, Vehicle
+
+
+class StartedOrdersBoardTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        car = Vehicle.objects.create(customer=customer, plate_number='T123ABC')
+        self.first = Order.objects.create(customer=customer, vehicle=car, branch=self.branch, type='service', status='created')
+        self.second = Order.objects.create(customer=customer, vehicle=car, branch=self.branch, type='sales', status='in_progress')
+        self.other = Order.objects.create(customer=customer, branch=self.branch, type='sales', status='cancelled')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        # Pretend everything was last written an hour ago
+        self.hour_ago = timezone.now() - timedelta(hours=1)
+        Order.objects.update(updated_at=self.hour_ago)
+
+    def test_board_lists_active_orders_with_tiles(self):
+        ctx = self.client.get(reverse('tracker:started_orders_dashboard')).context
+        self.assertEqual({o.pk for o in ctx['orders']}, {self.first.pk, self.second.pk})
+        self.assertEqual((ctx['total_started'], ctx['today_started'], ctx['unique_plates']), (2, 2, 1))
+        self.assertEqual(ctx['repeated_vehicles_today'], 1)
+
+    def test_changes_returns_only_orders_written_since(self):
+        url = reverse('tracker:api_started_orders_changes')
+        since = (timezone.now() - timedelta(minutes=10)).isoformat()
+        data = self.client.get(url, {'since': since}).json()
+        self.assertEqual((data['changed'], data['kpis']), ([], None))
+        self.assertEqual(set(data['visible_ids']), {self.first.pk, self.second.pk})
+
+        self.first.status = 'completed'
+        self.first.completed_at = timezone.now()
+        self.first.save(update_fields=['status', 'completed_at'])
+        data = self.client.get(url, {'since': since}).json()
+        self.assertEqual([c['id'] for c in data['changed']], [self.first.pk])
+        self.assertIn(self.first.order_number, data['changed'][0]['html'])
+        self.assertEqual(data['kpis']['total_started'], 1)
+
+        self.assertEqual(self.client.get(url).status_code, 400)
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tracker.models import Branch, Customer, Invoice, Order, Vehicle
+from tracker.services import VehicleService
+from tracker.utils.plate_utils import plate_from_reference
+
+
+class VehicleTrackingTests(TestCase):
+    def setUp(self):
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        self.customer = Customer.objects.create(full_name='John Doe', phone='123', branch=self.branch)
+        self.vehicle = Vehicle.objects.create(customer=self.customer, plate_number='T 123 ABC')
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def _invoice(self, reference, amount):
+        inv = Invoice(customer=self.customer, branch=self.branch, reference=reference, total_amount=amount)
+        inv.generate_invoice_number()
+        inv.save()
+        return inv
+
+    def test_reference_plate_is_normalized_on_save(self):
+        self.assertEqual(plate_from_reference('for t 123 abc'), 'T123ABC')
+        self.assertIsNone(plate_from_reference('Purchase order 2024/118'))
+        inv = self._invoice('FOR T 123 ABC', 10)
+        self.assertEqual(inv.reference_plate, 'T123ABC')
+        inv.reference = 'see attached'
+        inv.save(update_fields=['reference'])
+        inv.refresh_from_db()
+        self.assertIsNone(inv.reference_plate)
+
+    def test_plate_lookup_uses_normalized_key(self):
+        self.assertEqual(self.vehicle.plate_key, 'T123ABC')
+        other_branch = Branch.objects.create(name='B2', code='B2')
+        other = Customer.objects.create(full_name='Jane Roe', phone='456', branch=other_branch)
+        Vehicle.objects.create(customer=other, plate_number='t-123 abc')
+        self.assertEqual(VehicleService.find_vehicle_by_plate('t123-abc', branch=self.branch), self.vehicle)
+        self.assertEqual(VehicleService.vehicles_by_plate('T 12', prefix=True).count(), 2)
+        self.assertFalse(VehicleService.vehicles_by_plate(' - ').exists())
+        self.assertEqual(VehicleService.vehicles_by_plates(['t-123 abc', 'X 1', ''], branch=self.branch), {'T123ABC': self.vehicle})
+
+    def test_invoices_grouped_per_plate_with_bounded_queries(self):
+        self._invoice('FOR T123ABC', 100)
+        self._invoice('T 123 ABC', 50)
+        for i in range(5):
+            self._invoice(f'T {200 + i} XYZ', 10)
+        url = reverse('tracker:api_vehicle_tracking_data')
+        self.client.get(url)  # warm up session/profile lookups
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url, {'page_size': 2})
+        with CaptureQueriesContext(connection) as many:
+            data = self.client.get(url, {'page_size': 50}).json()
+        # Query count depends on the page, not on the number of vehicles or invoices
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+        self.assertEqual(data['summary']['total_vehicles'], 6)
+        self.assertEqual(data['summary']['total_invoices'], 7)
+        self.assertEqual(data['summary']['returning_vehicles'], 1)
+        top = data['data'][0]
+        self.assertEqual((top['plate_number'], top['total_spent'], top['invoice_count']), ('T123ABC', 150, 2))
+        # Unlinked invoices are matched to the branch vehicle by normalized plate
+        self.assertEqual(top['id'], self.vehicle.id)
+
+    def test_linked_invoices_and_order_only_vehicles_are_reported(self):
+        inv = self._invoice('Purchase order 2024/118', 80)
+        inv.vehicle = self.vehicle
+        inv.save()
+        other = Vehicle.objects.create(customer=self.customer, plate_number='T 999 ZZZ')
+        Order.objects.create(customer=self.customer, vehicle=other, branch=self.branch, type='service', status='created')
+
+        data = self.client.get(reverse('tracker:api_vehicle_tracking_data')).json()
+        rows = {row['plate_number']: row for row in data['data']}
+        self.assertEqual((rows['T123ABC']['id'], rows['T123ABC']['total_spent']), (self.vehicle.id, 80))
+        self.assertEqual((rows['T999ZZZ']['id'], rows['T999ZZZ']['invoice_count']), (other.id, 0))
+        self.assertEqual(rows['T999ZZZ']['order_stats']['pending'], 1)
+        self.assertEqual(data['summary']['total_vehicles'], 2)
+        self.assertEqual(data['summary']['order_stats']['pending'], 1)
+
+        pending = self.client.get(reverse('tracker:api_vehicle_tracking_data'), {'status': 'pending'}).json()
+        self.assertEqual([row['plate_number'] for row in pending['data']], ['T999ZZZ'])
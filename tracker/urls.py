@@ -4,13 +4,13 @@ from django.views.generic import RedirectView
 from django.contrib.auth.views import LogoutView
 from . import views
 from .views import CustomLoginView, CustomLogoutView
-from .views_api_fix import api_customer_groups_data_fixed
 from . import branch_metrics as views_branch
 from . import views_start_order
 from . import views_invoice
 from . import views_invoice_upload
 from . import views_vehicle_tracking
 from . import views_labour_codes
+from . import views_jobs
 
 app_name = "tracker"
 
@@ -36,7 +36,8 @@ urlpatterns = [
     path("customer-groups/", views.customer_groups_advanced, name="customer_groups"),
     path("customer-groups/advanced/", views.customer_groups_advanced, name="customer_groups_advanced"),
     path("api/customer-groups-data/", views.api_customer_groups_data, name="api_customer_groups_data"),
-    path("api/customer-groups-data-fixed/", api_customer_groups_data_fixed, name="api_customer_groups_data_fixed"),
+    # Former duplicate endpoint, kept for old clients
+    path("api/customer-groups-data-fixed/", RedirectView.as_view(pattern_name="tracker:api_customer_groups_data", query_string=True), name="api_customer_groups_data_fixed"),
     path("customer-groups/export/", views.customer_groups_export, name="customer_groups_export"),
     path("api/customer-groups/data/", views.customer_groups_data, name="customer_groups_data"),
     path("api/customers/summary/", views.api_customers_summary, name="api_customers_summary"),
@@ -57,6 +58,7 @@ urlpatterns = [
     path("attachments/<int:att_id>/delete/", views.delete_order_attachment, name="delete_order_attachment"),
     path("api/orders/<int:pk>/status/", views.api_order_status, name="api_order_status"),
     path("api/orders/statuses/", views.api_orders_statuses, name="api_orders_statuses"),
+    path("api/orders/changes/", views.api_orders_changes, name="api_orders_changes"),
     path("api/orders/<int:pk>/invoice-totals/", views.api_order_invoice_totals, name="api_order_invoice_totals"),
     path("api/orders/<int:pk>/save-delay-reason/", views.api_save_delay_reason, name="api_save_delay_reason"),
     path("orders/<int:pk>/cancel/", views.cancel_order, name="cancel_order"),
@@ -167,6 +169,7 @@ urlpatterns = [
     path("api/orders/update-from-extraction/", views_start_order.api_update_order_from_extraction, name="api_update_order_from_extraction"),
     path("api/orders/quick-stop/", views_start_order.api_quick_stop_order, name="api_quick_stop_order"),
     path("orders/started/", views_start_order.started_orders_dashboard, name="started_orders_dashboard"),
+    path("api/orders/started/changes/", views_start_order.api_started_orders_changes, name="api_started_orders_changes"),
     path("orders/started/<int:order_id>/", views_start_order.started_order_detail, name="started_order_detail"),
     path("orders/started/<int:order_id>/report-overrun/", views_start_order.api_record_overrun_reason, name="api_report_overrun"),
     path("api/orders/started/kpis/", views_start_order.api_started_orders_kpis, name="api_started_orders_kpis"),
@@ -179,6 +182,11 @@ urlpatterns = [
     # Invoice upload (two-step process)
     path("api/invoices/extract-preview/", views_invoice_upload.api_extract_invoice_preview, name="api_extract_invoice_preview"),
     path("api/invoices/create-from-upload/", views_invoice_upload.api_create_invoice_from_upload, name="api_create_invoice_from_upload"),
+
+    # Background jobs (async extraction and signing)
+    path("api/jobs/", views_jobs.api_jobs_list, name="api_jobs_list"),
+    path("api/jobs/<int:job_id>/", views_jobs.api_job_status, name="api_job_status"),
+    path("api/jobs/<int:job_id>/download/", views_jobs.api_job_download, name="api_job_download"),
     path("invoices/<int:pk>/", views_invoice.invoice_detail, name="invoice_detail"),
     path("invoices/<int:pk>/print/", views_invoice.invoice_print, name="invoice_print"),
     path("invoices/<int:pk>/pdf/", views_invoice.invoice_pdf, name="invoice_pdf"),
@@ -80,47 +80,9 @@ def normalize_phone(phone: str) -> str:
         return str(phone)
 
 # ---- Audit log helpers ----------------------------------------------------
+# Stored in the AuditEvent table through a buffered bulk writer (see audit.py).
 
-def add_audit_log(user=None, action: str | None = None, details: str | None = None, **kwargs) -> None:
-    """Record an audit entry in cache.
-    Accepts flexible arguments:
-      - action or action_type
-      - details or description
-      - ip (optional)
-      - any extra metadata via kwargs stored under 'meta'
-    """
-    try:
-        logs = cache.get('audit_logs', []) or []
-        action_val = action or kwargs.pop('action_type', None) or ''
-        description_val = (kwargs.pop('description', None) or details or '')
-        ip = kwargs.pop('ip', None)
-        # Remaining kwargs are metadata
-        meta = {k: v for k, v in kwargs.items() if v is not None}
-        entry = {
-            'timestamp': timezone.localtime().strftime('%Y-%m-%d %H:%M:%S'),
-            'user': getattr(user, 'username', str(user) if user else 'system'),
-            'action': action_val,
-            'description': description_val,
-        }
-        if ip:
-            entry['ip'] = ip
-        if meta:
-            entry['meta'] = meta
-        logs.append(entry)
-        logs = logs[-500:]
-        cache.set('audit_logs', logs, None)
-    except Exception:
-        # Avoid breaking user flows on logging errors
-        pass
-
-
-def get_audit_logs() -> list:
-    logs = cache.get('audit_logs', []) or []
-    return list(reversed(logs))
-
-
-def clear_audit_logs() -> None:
-    cache.delete('audit_logs')
+from .audit import add_audit_log, flush_audit_log, get_audit_logs, clear_audit_logs, prune_audit_events  # noqa: E402
 
 
 # ---- Branch scoping helpers ----------------------------------------------
@@ -174,7 +136,8 @@ def scope_queryset(qs, user, request=None):
 def clear_inventory_cache(name: str | None = None, brand: str | None = None) -> None:
     try:
         cache.delete('api_inv_items_v1')
-        cache.delete('dashboard_metrics_v1')
+        from .dashboard_cache import bump_dashboard_version
+        bump_dashboard_version()
         if name:
             cache.delete(f'api_inv_brands_{name}')
             # Invalidate stock caches for specific brand, unbranded alias, and any-brand aggregate
@@ -0,0 +1,174 @@
+"""
+Durable audit log backed by the AuditEvent table.
+
+add_audit_log() only appends to an in-process buffer (O(1), no query); the buffer is
+written with a single bulk INSERT when a request finishes, when it reaches
+AUDIT_LOG_FLUSH_SIZE entries or AUDIT_LOG_FLUSH_INTERVAL seconds, and at process exit.
+Entries that fail to write stay buffered and are retried on the next flush.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = getattr(settings, 'AUDIT_LOG_FLUSH_SIZE', 50)
+FLUSH_INTERVAL = getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 5)
+# Hard cap so a database outage cannot grow the buffer without bound
+MAX_BUFFERED = 10000
+
+_lock = threading.Lock()
+_buffer: list[dict] = []
+_last_flush = time.monotonic()
+
+
+def _json_safe(value):
+    try:
+        return json.loads(json.dumps(value, default=str))
+    except Exception:
+        return str(value)
+
+
+def add_audit_log(user=None, action: str | None = None, details: str | None = None, **kwargs) -> None:
+    """Record an audit entry.
+    Accepts flexible arguments:
+      - action or action_type
+      - details or description
+      - ip (optional)
+      - any extra metadata via kwargs stored under 'meta'
+    """
+    try:
+        action_val = action or kwargs.pop('action_type', None) or ''
+        description_val = (kwargs.pop('description', None) or details or '')
+        ip = kwargs.pop('ip', None)
+        # Remaining kwargs are metadata
+        meta = {k: v for k, v in kwargs.items() if v is not None}
+        is_user = user is not None and getattr(user, 'pk', None) is not None
+        entry = {
+            'timestamp': timezone.now(),
+            'user_id': user.pk if is_user else None,
+            'username': (getattr(user, 'username', str(user) if user else 'system') or '')[:150],
+            'action': str(action_val)[:64],
+            'description': str(description_val),
+            'ip': str(ip)[:64] if ip else None,
+            'meta': _json_safe(meta) if meta else None,
+        }
+        with _lock:
+            _buffer.append(entry)
+            due = len(_buffer) >= FLUSH_SIZE or (time.monotonic() - _last_flush) >= FLUSH_INTERVAL
+        # Never flush inside a caller's transaction: a rollback would discard the events
+        if due and not connection.in_atomic_block:
+            flush_audit_log()
+    except Exception:
+        # Avoid breaking user flows on logging errors
+        pass
+
+
+def flush_audit_log() -> int:
+    """Write all buffered entries with one bulk INSERT. Returns the number written."""
+    global _last_flush
+    from tracker.models import AuditEvent
+
+    with _lock:
+        if not _buffer:
+            _last_flush = time.monotonic()
+            return 0
+        pending = _buffer[:]
+        _buffer.clear()
+    try:
+        AuditEvent.objects.bulk_create([AuditEvent(**entry) for entry in pending], batch_size=500)
+    except Exception as e:
+        logger.warning(f"Audit log flush failed, {len(pending)} event(s) kept for retry: {e}")
+        with _lock:
+            _buffer[:0] = pending
+            overflow = len(_buffer) - MAX_BUFFERED
+            if overflow > 0:
+                logger.error(f"Audit log buffer full, dropping {overflow} oldest event(s)")
+                del _buffer[:overflow]
+        return 0
+    with _lock:
+        _last_flush = time.monotonic()
+    return len(pending)
+
+
+def _flush_pending(*args, **kwargs):
+    if _buffer:
+        try:
+            flush_audit_log()
+        except Exception:
+            pass
+
+
+request_finished.connect(_flush_pending, dispatch_uid='tracker_audit_log_flush')
+atexit.register(_flush_pending)
+
+
+def get_audit_logs(limit: int = 500) -> list:
+    """Return the most recent audit entries as dicts, newest first."""
+    from tracker.models import AuditEvent
+
+    flush_audit_log()
+    rows = AuditEvent.objects.values('timestamp', 'username', 'action', 'description', 'ip', 'meta')[:limit]
+    return [
+        {
+            'timestamp': timezone.localtime(r['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
+            'user': r['username'],
+            'action': r['action'],
+            'description': r['description'],
+            **({'ip': r['ip']} if r['ip'] else {}),
+            **({'meta': r['meta']} if r['meta'] else {}),
+        }
+        for r in rows
+    ]
+
+
+def clear_audit_logs() -> None:
+    from tracker.models import AuditEvent
+
+    with _lock:
+        _buffer.clear()
+    AuditEvent.objects.all().delete()
+
+
+def prune_audit_events(retention_days: int | None = None, batch_size: int = 5000) -> int:
+    """
+    Roll events older than ``retention_days`` up into AuditEventRollup daily counts, then
+    delete them in primary-key batches. Returns the number of events removed.
+    """
+    from tracker.models import AuditEvent, AuditEventRollup
+
+    if retention_days is None:
+        retention_days = getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 180)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    old = AuditEvent.objects.filter(timestamp__lt=cutoff)
+
+    removed = 0
+    while True:
+        ids = list(old.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Roll up and delete each batch in its own short transaction
+        with transaction.atomic():
+            batch = AuditEvent.objects.filter(id__in=ids)
+            counts = batch.annotate(day=TruncDate('timestamp')).values('day', 'action').annotate(c=Count('id')).order_by()
+            for row in counts:
+                rollup, created = AuditEventRollup.objects.get_or_create(
+                    day=row['day'], action=row['action'], defaults={'count': row['c']}
+                )
+                if not created:
+                    AuditEventRollup.objects.filter(pk=rollup.pk).update(count=F('count') + row['c'])
+            removed += batch.delete()[0]
+    return removed
@@ -101,7 +101,8 @@ def clear_audit_logs() -> None:
 def clear_inventory_cache(name: str | None = None, brand: str | None = None) -> None:
     try:
         cache.delete('api_inv_items_v1')
-        cache.delete('dashboard_metrics_v1')
+        from .dashboard_cache import bump_dashboard_version
+        bump_dashboard_version()
         if name:
             cache.delete(f'api_inv_brands_{name}')
             # Invalidate stock caches for specific brand, unbranded alias, and any-brand aggregate
@@ -0,0 +1,78 @@
+"""
+Short-lived, versioned cache for the dashboard's computed metrics.
+
+Entries are keyed by the viewer's scope plus two version counters: one for that scope
+(a branch, or all branches) and one shared by every scope. Order and invoice writes bump
+their branch and the all-branches version (see tracker.signals); inventory changes and
+set-based status sweeps bump the shared one. A bumped version simply makes old entries
+unreachable, and DASHBOARD_CACHE_TTL bounds staleness for anything not versioned (the
+clock rolling over to a new day, or processes that do not share the cache backend).
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DASHBOARD_CACHE_TTL = getattr(settings, 'DASHBOARD_CACHE_TTL', 30)
+
+_VERSION_KEY = 'dashboard_version:{}'
+_SHARED = 'shared'
+_ALL = 'all'
+
+
+def _version(scope: str) -> int:
+    key = _VERSION_KEY.format(scope)
+    value = cache.get(key)
+    if value is None:
+        # Seed with the clock so a version evicted from the cache never comes back
+        # at a value an older entry was stored under
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key, 0)
+    return value
+
+
+def _bump(scope: str) -> None:
+    key = _VERSION_KEY.format(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def bump_dashboard_version(branch_id: int | None = None) -> None:
+    """Invalidate cached dashboards covering ``branch_id``, or all of them when None."""
+    try:
+        if branch_id:
+            _bump(str(branch_id))
+            _bump(_ALL)
+        else:
+            _bump(_SHARED)
+    except Exception:
+        # Cache outages must never break writes; the TTL bounds staleness
+        pass
+
+
+def dashboard_cache_key(user, request=None, prefix: str = 'dashboard_metrics') -> str:
+    """
+    Cache key for the dashboard as seen by ``user``. Mirrors the dashboard's scoping:
+    branch users see their branch, superusers (optionally ?branch=) and unassigned staff
+    see all branches. Other branch-scoped views pass their own ``prefix`` to share the
+    same invalidation.
+    """
+    from . import get_user_branch
+
+    branch = get_user_branch(user)
+    selected = (request.GET.get('branch') or '').strip() if request is not None else ''
+    if getattr(user, 'is_superuser', False):
+        scope = selected if selected.isdigit() else _ALL
+        label = f"su:{selected or _ALL}"
+    elif branch is not None:
+        scope = str(branch.pk)
+        label = f"b:{branch.pk}"
+    else:
+        scope = _ALL
+        label = 'staff' if getattr(user, 'is_staff', False) else 'none'
+    return f"{prefix}:{label}:{_version(_SHARED)}:{_version(scope)}"
@@ -1,42 +1,112 @@
 """
 MySQL Compatibility Utilities
-Fixes date filtering issues when switching from SQLite to MySQL
+
+Date filtering for datetime columns. A ``__date`` (or ``__year``/``__month``) lookup
+makes MySQL wrap the column in DATE(CONVERT_TZ(...)), so the index on it cannot be
+used. The helpers below express calendar periods of the current time zone as
+half-open datetime ranges ``[start, end)`` instead, which compare the bare column and
+stay index range scans:
+
+    orders.filter(on_date('created_at', today))
+    orders.filter(between_dates('created_at', start_date, end_date))
+    Count('orders', filter=since_date('orders__created_at', start_date))
 """
 
 from django.utils import timezone
-from datetime import datetime, time, timedelta
+from datetime import date, datetime, time, timedelta
 from django.db.models import Q
 
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def day_start(day) -> datetime:
+    """Aware datetime of local midnight at the start of ``day`` (a date or datetime)."""
+    return timezone.make_aware(datetime.combine(_as_date(day), time.min))
+
+
+def day_range(day):
+    """(start, end) of the local calendar day containing ``day``; end is exclusive."""
+    day = _as_date(day)
+    return day_start(day), day_start(day + timedelta(days=1))
+
+
+def days_range(start_date, end_date):
+    """(start, end) covering the local days ``start_date`` through ``end_date`` inclusive."""
+    return day_start(start_date), day_start(_as_date(end_date) + timedelta(days=1))
+
+
+def period_range(period: str, day=None):
+    """
+    (start, end) of the calendar 'day', 'week' (Monday first), 'month', 'quarter' or
+    'year' containing ``day`` (default: today).
+    """
+    day = _as_date(day) if day is not None else timezone.localdate()
+    if period == 'day':
+        return day_range(day)
+    if period == 'week':
+        first = day - timedelta(days=day.weekday())
+        return days_range(first, first + timedelta(days=6))
+    if period == 'month':
+        first = day.replace(day=1)
+        following = (first + timedelta(days=32)).replace(day=1)
+    elif period == 'quarter':
+        first = day.replace(month=((day.month - 1) // 3) * 3 + 1, day=1)
+        following = (first + timedelta(days=95)).replace(day=1)
+    elif period == 'year':
+        first = day.replace(month=1, day=1)
+        following = first.replace(year=first.year + 1)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return day_start(first), day_start(following)
+
+
+def range_q(date_field, start=None, end=None) -> Q:
+    """``start <= field < end``; either bound may be None for an open range."""
+    conditions = {}
+    if start is not None:
+        conditions[f'{date_field}__gte'] = start
+    if end is not None:
+        conditions[f'{date_field}__lt'] = end
+    return Q(**conditions)
+
+
+def on_date(date_field, target_date) -> Q:
+    """Rows whose ``date_field`` falls on the local day ``target_date``."""
+    return range_q(date_field, *day_range(target_date))
+
+
+def between_dates(date_field, start_date, end_date) -> Q:
+    """Rows whose ``date_field`` falls on the local days ``start_date`` through ``end_date``."""
+    return range_q(date_field, *days_range(start_date, end_date))
+
+
+def since_date(date_field, start_date) -> Q:
+    """Rows whose ``date_field`` is on or after the local day ``start_date``."""
+    return range_q(date_field, start=day_start(start_date))
+
+
 def get_date_range(date_obj):
-    """Convert a date to datetime range for MySQL compatibility"""
-    if isinstance(date_obj, datetime):
-        date_obj = date_obj.date()
-    
-    start_dt = timezone.make_aware(datetime.combine(date_obj, time.min))
-    end_dt = timezone.make_aware(datetime.combine(date_obj, time.max))
+    """Convert a date to an inclusive (start, end-of-day) datetime pair; prefer day_range for filtering"""
+    start_dt = day_start(date_obj)
+    end_dt = timezone.make_aware(datetime.combine(_as_date(date_obj), time.max))
     return start_dt, end_dt
 
 def today_filter():
     """Get today's date filter for MySQL compatibility"""
-    today = timezone.now().date()
-    start_dt, end_dt = get_date_range(today)
-    return Q(created_at__gte=start_dt, created_at__lte=end_dt)
+    return on_date('created_at', timezone.localdate())
 
 def date_filter(date_field, target_date):
     """Get date filter for any date field"""
-    start_dt, end_dt = get_date_range(target_date)
-    return Q(**{f'{date_field}__gte': start_dt, f'{date_field}__lte': end_dt})
+    return on_date(date_field, target_date)
 
 def month_start_filter(date_field='created_at'):
     """Get filter for current month start"""
-    today = timezone.now().date()
-    month_start = today.replace(day=1)
-    start_dt = timezone.make_aware(datetime.combine(month_start, time.min))
-    return Q(**{f'{date_field}__gte': start_dt})
+    return since_date(date_field, timezone.localdate().replace(day=1))
 
 def period_filter(days, date_field='created_at'):
     """Get filter for last N days"""
-    today = timezone.now().date()
-    start_date = today - timedelta(days=days)
-    start_dt = timezone.make_aware(datetime.combine(start_date, time.min))
-    return Q(**{f'{date_field}__gte': start_dt})
\ No newline at end of file
+    return since_date(date_field, timezone.localdate() - timedelta(days=days))
@@ -1,15 +1,48 @@
 from __future__ import annotations
 
+import hashlib
+import logging
 import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 from io import BytesIO
 from pathlib import Path
 from typing import Tuple, Optional, Dict, Any
 
+import numpy as np
 from PIL import Image, ImageOps, ImageFilter, ImageEnhance
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+# Processed (pen-effect + blue ink) signatures kept in memory, keyed by SHA-256 of the
+# uploaded image, so signing several documents with one signature processes it once
+SIGNATURE_CACHE_SIZE = 32
+_signature_cache: "OrderedDict[str, Tuple[bytes, int, int]]" = OrderedDict()
+_signature_cache_lock = threading.Lock()
+
+# Pixels at or below this alpha are treated as empty canvas
+INK_ALPHA_THRESHOLD = 30
+
+# Transparent border kept around the ink when trimming, wider than the sharpening radius
+TRIM_PADDING = 4
+
+# Blue ink color variations (like real pen ink), from strong to faint strokes
+BLUE_INK_COLORS = np.array([
+    (0, 50, 200),    # Dark blue
+    (30, 80, 220),   # Medium blue
+    (60, 120, 255),  # Light blue
+], dtype=np.uint8)
+
 
 class SignatureEmbedError(Exception):
     """Raised when a signature cannot be embedded into the provided PDF."""
@@ -68,44 +101,40 @@ def _convert_to_blue_ink(signature_image: Image.Image) -> Image.Image:
     # Convert to RGBA if not already
     if signature_image.mode != 'RGBA':
         signature_image = signature_image.convert('RGBA')
-    
-    # Create a new image for blue ink effect
-    width, height = signature_image.size
-    blue_ink_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    
-    # Get pixel data
-    sig_pixels = signature_image.load()
-    blue_pixels = blue_ink_image.load()
-    
-    # Blue ink color variations (like real pen ink)
-    blue_colors = [
-        (0, 50, 200, 255),    # Dark blue
-        (30, 80, 220, 230),   # Medium blue
-        (60, 120, 255, 200),  # Light blue
-    ]
-    
-    for x in range(width):
-        for y in range(height):
-            r, g, b, a = sig_pixels[x, y]
-            
-            # If this is part of the signature (has some opacity)
-            if a > 30:
-                # Calculate intensity to create natural ink variation
-                intensity = (r + g + b) / 3
-                
-                # Choose blue color based on intensity
-                if intensity < 85:
-                    blue_color = blue_colors[0]  # Dark blue for strong lines
-                elif intensity < 170:
-                    blue_color = blue_colors[1]  # Medium blue
-                else:
-                    blue_color = blue_colors[2]  # Light blue for faint areas
-                
-                # Preserve the alpha but use blue color
-                new_alpha = min(255, int(a * 1.2))  # Slightly enhance visibility
-                blue_pixels[x, y] = (blue_color[0], blue_color[1], blue_color[2], new_alpha)
-    
-    return blue_ink_image
+
+    pixels = np.asarray(signature_image)
+    alpha = pixels[..., 3]
+    ink = alpha > INK_ALPHA_THRESHOLD
+
+    # Stroke intensity picks the shade: dark for strong lines, light for faint areas
+    intensity = pixels[..., :3].sum(axis=2, dtype=np.uint16)
+    shade = (intensity >= 3 * 85).astype(np.uint8) + (intensity >= 3 * 170)
+
+    blue = np.zeros(pixels.shape, dtype=np.uint8)
+    blue[..., :3] = BLUE_INK_COLORS[shade]
+    # Preserve the alpha, slightly enhanced for visibility
+    blue[..., 3] = np.minimum(alpha.astype(np.uint16) * 6 // 5, 255)
+    blue[~ink] = 0
+
+    return Image.fromarray(blue, 'RGBA')
+
+
+def _trim_to_ink(signature_image: Image.Image) -> Image.Image:
+    """Crop the empty canvas around the strokes (RGBA input); unchanged when there is no ink."""
+    ink = np.asarray(signature_image.getchannel('A')) > INK_ALPHA_THRESHOLD
+    rows = np.flatnonzero(ink.any(axis=1))
+    if rows.size == 0:
+        return signature_image
+    cols = np.flatnonzero(ink.any(axis=0))
+    box = (
+        max(0, int(cols[0]) - TRIM_PADDING),
+        max(0, int(rows[0]) - TRIM_PADDING),
+        min(signature_image.width, int(cols[-1]) + 1 + TRIM_PADDING),
+        min(signature_image.height, int(rows[-1]) + 1 + TRIM_PADDING),
+    )
+    if box == (0, 0, signature_image.width, signature_image.height):
+        return signature_image
+    return signature_image.crop(box)
 
 
 def _enhance_signature_for_pen_effect(signature_image: Image.Image) -> Image.Image:
@@ -130,86 +159,141 @@ def _enhance_signature_for_pen_effect(signature_image: Image.Image) -> Image.Ima
     return signature_image
 
 
-def embed_signature_in_pdf(
-    pdf_bytes: bytes,
-    signature_bytes: bytes,
-    *,
-    position_type: str = "customer",
-    margin: float = 36.0,
-    max_width_ratio: float = 0.35,
-    max_height_ratio: float = 0.12,
-    preset: Optional[str] = None,
-) -> bytes:
-    """Return a PDF with blue ink signature embedded."""
-    if not pdf_bytes:
-        raise SignatureEmbedError("No PDF content provided.")
-    if not signature_bytes:
-        raise SignatureEmbedError("No signature content provided.")
-
-    try:
-        reader = PdfReader(BytesIO(pdf_bytes))
-    except Exception as exc:
-        raise SignatureEmbedError("Could not read the provided PDF document.") from exc
-
-    if len(reader.pages) == 0:
-        raise SignatureEmbedError("The PDF has no pages to sign.")
+def _prepared_signature(signature_bytes: bytes) -> Tuple[bytes, int, int]:
+    """
+    Return the blue-ink signature as (png_bytes, width, height), processing each distinct
+    signature image only once per process.
+    """
+    key = hashlib.sha256(signature_bytes).hexdigest()
+    with _signature_cache_lock:
+        cached = _signature_cache.get(key)
+        if cached is not None:
+            _signature_cache.move_to_end(key)
+            return cached
 
     try:
         signature_image = Image.open(BytesIO(signature_bytes))
         signature_image = signature_image.convert("RGBA")
-        
+
+        # Drop the empty canvas first so the remaining steps (and scaling) see only the strokes
+        signature_image = _trim_to_ink(signature_image)
+
         # Enhance signature for better pen effect
         signature_image = _enhance_signature_for_pen_effect(signature_image)
-        
+
         # Convert to blue ink
         signature_image = _convert_to_blue_ink(signature_image)
-        
     except Exception as exc:
         raise SignatureEmbedError("Could not decode the signature image.") from exc
 
-    last_page = reader.pages[-1]
-    page_width = float(last_page.mediabox.width)
-    page_height = float(last_page.mediabox.height)
+    buffer = BytesIO()
+    signature_image.save(buffer, format="PNG")
+    prepared = (buffer.getvalue(), signature_image.width, signature_image.height)
+    with _signature_cache_lock:
+        _signature_cache[key] = prepared
+        while len(_signature_cache) > SIGNATURE_CACHE_SIZE:
+            _signature_cache.popitem(last=False)
+    return prepared
 
-    # Scale signature
-    scaled_width, scaled_height = _scale_dimensions(
-        page_width,
-        page_height,
-        signature_image.width,
-        signature_image.height,
-        max_width_ratio=max_width_ratio,
-        max_height_ratio=max_height_ratio,
-    )
 
-    # Determine effective position type (supports legacy 'preset' argument like 'job_card')
+def _effective_position_type(position_type: str, preset: Optional[str]) -> str:
+    """Resolve the position type, honouring the legacy 'preset' argument (e.g. 'job_card')."""
     eff_position_type = (position_type or "customer").strip().lower()
     if preset:
         p = (str(preset) or "").strip().lower()
         if p in {"job_card", "jobcard", "job card"}:
             # Place slightly lower for job cards
             eff_position_type = "service_advisor"
-    # Calculate position
+    return eff_position_type
+
+
+def _signature_box(
+    page_width: float,
+    page_height: float,
+    image_width: int,
+    image_height: int,
+    position_type: str,
+    max_width_ratio: float,
+    max_height_ratio: float,
+) -> Tuple[float, float, float, float]:
+    """Signature (x, y, width, height) on the page, with PDF's bottom-left origin."""
+    scaled_width, scaled_height = _scale_dimensions(
+        page_width,
+        page_height,
+        image_width,
+        image_height,
+        max_width_ratio=max_width_ratio,
+        max_height_ratio=max_height_ratio,
+    )
     x_position, y_position = _calculate_signature_position(
-        page_width, page_height, scaled_width, scaled_height, eff_position_type
+        page_width, page_height, scaled_width, scaled_height, position_type
     )
+    return x_position, y_position, scaled_width, scaled_height
 
-    overlay_stream = BytesIO()
-    signature_buffer = BytesIO()
-    signature_image.save(signature_buffer, format="PNG")
-    signature_buffer.seek(0)
 
+def _embed_with_pymupdf(pdf_bytes: bytes, signature_png: bytes, box_for_page) -> Optional[bytes]:
+    """
+    Insert the signature on the last page and save as an incremental update, so the output
+    is the original bytes plus a small appended section. Returns None when this path
+    cannot be used (rotated last page, or a file that needs repairing) so the caller can
+    fall back to the PyPDF2 overlay.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(pdf_bytes)
+        doc = fitz.open(path)
+        try:
+            if doc.page_count == 0:
+                raise SignatureEmbedError("The PDF has no pages to sign.")
+            page = doc[-1]
+            if page.rotation or not doc.can_save_incrementally():
+                return None
+            page_width, page_height = page.rect.width, page.rect.height
+            x, y, width, height = box_for_page(page_width, page_height)
+            # PyMuPDF measures from the top-left corner
+            top = page_height - y - height
+            page.insert_image(fitz.Rect(x, top, x + width, top + height), stream=signature_png, keep_proportion=False)
+            doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+        finally:
+            doc.close()
+        with open(path, "rb") as fh:
+            return fh.read()
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _embed_with_pypdf(pdf_bytes: bytes, signature_png: bytes, box_for_page) -> bytes:
+    """Merge a reportlab overlay carrying the signature into the last page and rewrite the PDF."""
+    try:
+        reader = PdfReader(BytesIO(pdf_bytes))
+    except Exception as exc:
+        raise SignatureEmbedError("Could not read the provided PDF document.") from exc
+
+    if len(reader.pages) == 0:
+        raise SignatureEmbedError("The PDF has no pages to sign.")
+
+    last_page = reader.pages[-1]
+    page_width = float(last_page.mediabox.width)
+    page_height = float(last_page.mediabox.height)
+    x_position, y_position, scaled_width, scaled_height = box_for_page(page_width, page_height)
+
+    overlay_stream = BytesIO()
     overlay_canvas = canvas.Canvas(overlay_stream, pagesize=(page_width, page_height))
-    
+
     # Draw the blue ink signature
     overlay_canvas.drawImage(
-        ImageReader(signature_buffer),
+        ImageReader(BytesIO(signature_png)),
         x_position,
         y_position,
         width=scaled_width,
         height=scaled_height,
         mask='auto',
     )
-    
+
     overlay_canvas.save()
     overlay_stream.seek(0)
 
@@ -225,8 +309,48 @@ def embed_signature_in_pdf(
 
     output_stream = BytesIO()
     writer.write(output_stream)
-    output_stream.seek(0)
-    return output_stream.read()
+    return output_stream.getvalue()
+
+
+def embed_signature_in_pdf(
+    pdf_bytes: bytes,
+    signature_bytes: bytes,
+    *,
+    position_type: str = "customer",
+    margin: float = 36.0,
+    max_width_ratio: float = 0.35,
+    max_height_ratio: float = 0.12,
+    preset: Optional[str] = None,
+) -> bytes:
+    """
+    Return a PDF with blue ink signature embedded on the last page.
+    Uses a PyMuPDF incremental update when available, otherwise a PyPDF2 rewrite.
+    """
+    if not pdf_bytes:
+        raise SignatureEmbedError("No PDF content provided.")
+    if not signature_bytes:
+        raise SignatureEmbedError("No signature content provided.")
+
+    signature_png, image_width, image_height = _prepared_signature(signature_bytes)
+    eff_position_type = _effective_position_type(position_type, preset)
+
+    def box_for_page(page_width, page_height):
+        return _signature_box(
+            page_width, page_height, image_width, image_height,
+            eff_position_type, max_width_ratio, max_height_ratio,
+        )
+
+    if fitz is not None:
+        try:
+            signed = _embed_with_pymupdf(pdf_bytes, signature_png, box_for_page)
+            if signed is not None:
+                return signed
+        except SignatureEmbedError:
+            raise
+        except Exception as exc:
+            logger.warning(f"PyMuPDF signing failed, falling back to PyPDF2: {exc}")
+
+    return _embed_with_pypdf(pdf_bytes, signature_png, box_for_page)
 
 
 def embed_signature_in_image(
@@ -251,17 +375,8 @@ def embed_signature_in_image(
     except Exception as exc:
         raise SignatureEmbedError("Could not read the provided image document.") from exc
 
-    try:
-        sig_img = Image.open(BytesIO(signature_bytes)).convert("RGBA")
-        
-        # Enhance signature for better pen effect
-        sig_img = _enhance_signature_for_pen_effect(sig_img)
-        
-        # Convert to blue ink
-        sig_img = _convert_to_blue_ink(sig_img)
-        
-    except Exception as exc:
-        raise SignatureEmbedError("Could not decode the signature image.") from exc
+    signature_png, _, _ = _prepared_signature(signature_bytes)
+    sig_img = Image.open(BytesIO(signature_png))
 
     base_mode = base_img.mode
     base_format = (base_img.format or "").upper() or None
@@ -279,11 +394,7 @@ def embed_signature_in_image(
     sig_resized = sig_img.resize((int(max(1, scaled_w)), int(max(1, scaled_h))), Image.LANCZOS)
 
     # Determine effective position type (supports legacy 'preset' like 'job_card')
-    eff_position_type = (position_type or "customer").strip().lower()
-    if preset:
-        p = (str(preset) or "").strip().lower()
-        if p in {"job_card", "jobcard", "job card"}:
-            eff_position_type = "service_advisor"
+    eff_position_type = _effective_position_type(position_type, preset)
 
     # Calculate position
     if eff_position_type == "customer":
@@ -1,11 +1,17 @@
 """
 PDF and image text extraction for invoice processing.
 CORRECTED VERSION: Proper line item extraction without payment information in descriptions
+
+Results of extract_from_bytes() are cached by the SHA-256 of the file content, so the
+preview and the create step of an upload extract the same PDF only once. Each line is
+classified once (classify_lines) and field extractors only scan the lines that can match.
 """
 
+import hashlib
 import io
 import logging
 import re
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal
 from datetime import datetime
 import json
@@ -24,6 +30,54 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extraction cache entries live this long (seconds); bump the version when parsing changes
+CACHE_TTL_DEFAULT = 24 * 60 * 60
+CACHE_VERSION = 1
+
+# Documents with at least this many pages are split across PDF_EXTRACTION_WORKERS processes
+PARALLEL_MIN_PAGES = 8
+
+
+def _setting(name, default):
+    """Read a Django setting, falling back to ``default`` when used outside Django."""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def _page_entry(page_num, page_text):
+    return {
+        'page_num': page_num + 1,
+        'text': page_text,
+        'lines': [line.strip() for line in page_text.split('\n') if line.strip()]
+    }
+
+
+def _extract_page_range(file_bytes, start, stop) -> list:
+    """Extract pages [start, stop) with PyMuPDF. Runs in a worker process for large documents."""
+    pages = []
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    try:
+        for page_num in range(start, stop):
+            page_text = doc[page_num].get_text("text", sort=True)
+            if page_text and page_text.strip():
+                pages.append(_page_entry(page_num, page_text))
+    finally:
+        doc.close()
+    return pages
+
+
+def _extract_pages_parallel(file_bytes, page_count, workers) -> list:
+    """Split a large document into one contiguous page range per worker process."""
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        chunks = pool.map(_extract_page_range, [file_bytes] * len(ranges), *zip(*ranges))
+        return [page for chunk in chunks for page in chunk]
+
+
 def extract_text_from_pdf(file_bytes) -> list:
     """Extract text from PDF file with page separation for multi-page handling."""
     pages_data = []
@@ -31,15 +85,21 @@ def extract_text_from_pdf(file_bytes) -> list:
     if fitz is not None:
         try:
             doc = fitz.open(stream=file_bytes, filetype="pdf")
-            for page_num, page in enumerate(doc):
-                page_text = page.get_text("text", sort=True)
-                if page_text and page_text.strip():
-                    pages_data.append({
-                        'page_num': page_num + 1,
-                        'text': page_text,
-                        'lines': [line.strip() for line in page_text.split('\n') if line.strip()]
-                    })
-            doc.close()
+            page_count = doc.page_count
+            workers = int(_setting('PDF_EXTRACTION_WORKERS', 0) or 0)
+            if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+                doc.close()
+                try:
+                    pages_data = _extract_pages_parallel(file_bytes, page_count, workers)
+                except Exception as e:
+                    logger.warning(f"Parallel PDF extraction failed, extracting serially: {e}")
+                    pages_data = _extract_page_range(file_bytes, 0, page_count)
+            else:
+                for page_num, page in enumerate(doc):
+                    page_text = page.get_text("text", sort=True)
+                    if page_text and page_text.strip():
+                        pages_data.append(_page_entry(page_num, page_text))
+                doc.close()
 
             if pages_data:
                 logger.info(f"Successfully extracted {len(pages_data)} pages from PDF using PyMuPDF")
@@ -55,11 +115,7 @@ def extract_text_from_pdf(file_bytes) -> list:
             for page_num, page in enumerate(pdf_reader.pages):
                 page_text = page.extract_text()
                 if page_text and page_text.strip():
-                    pages_data.append({
-                        'page_num': page_num + 1,
-                        'text': page_text,
-                        'lines': [line.strip() for line in page_text.split('\n') if line.strip()]
-                    })
+                    pages_data.append(_page_entry(page_num, page_text))
 
             if pages_data:
                 logger.info(f"Successfully extracted {len(pages_data)} pages from PDF using PyPDF2")
@@ -74,6 +130,39 @@ def extract_text_from_image(file_bytes) -> str:
     logger.info("Image file detected. OCR not available. Manual entry required.")
     return ""
 
+# Lower-case keywords of the monetary patterns used by parse_invoice_data
+_MONEY_KEYWORDS = ('net', 'vat', 'tax', 'gst', 'gross', 'total')
+
+
+def classify_lines(lines) -> dict:
+    """
+    Tag each line once with the header fields it could contain.
+    Every extractor regex requires its tag's keyword, so scanning only the tagged lines
+    (in their original order) gives the same result as scanning all lines.
+    """
+    tags = {
+        'customer_name': [], 'phone': [], 'email': [], 'invoice_no': [],
+        'date': [], 'reference': [], 'money': [],
+    }
+    for line in lines:
+        low = line.lower()
+        if 'customer' in low and 'name' in low:
+            tags['customer_name'].append(line)
+        if 'tel' in low or 'phone' in low:
+            tags['phone'].append(line)
+        if '@' in line:
+            tags['email'].append(line)
+        if 'pi' in low or 'invoice' in low:
+            tags['invoice_no'].append(line)
+        if 'date' in low:
+            tags['date'].append(line)
+        if 'ref' in low:
+            tags['reference'].append(line)
+        if any(keyword in low for keyword in _MONEY_KEYWORDS):
+            tags['money'].append(line)
+    return tags
+
+
 def parse_invoice_data(pages_data: list) -> dict:
     """Parse invoice data from extracted pages with multi-page support."""
     if not pages_data:
@@ -83,20 +172,22 @@ def parse_invoice_data(pages_data: list) -> dict:
     all_lines = []
     for page in pages_data:
         all_lines.extend(page['lines'])
+    tags = classify_lines(all_lines)
 
     # Extract customer information - FIXED: Only extract actual customer info, not seller info
-    customer_info = extract_customer_information(all_lines)
+    customer_info = extract_customer_information(all_lines, tags)
     
     # Extract other fields
     code_no = extract_code_no_enhanced(all_lines)
-    invoice_no = extract_invoice_no(all_lines)
-    date_str = extract_date(all_lines)
-    reference = extract_reference(all_lines)
+    invoice_no = extract_invoice_no(tags['invoice_no'])
+    date_str = extract_date(tags['date'])
+    reference = extract_reference(tags['reference'])
 
     # Extract monetary values from all pages (totals are usually on last page)
-    subtotal = extract_monetary_value(all_lines, [r'Net\s*Value', r'Subtotal', r'Net\s*Amount'])
-    tax = extract_monetary_value(all_lines, [r'VAT', r'Tax', r'GST'])
-    total = extract_monetary_value(all_lines, [r'Gross\s*Value', r'Grand\s*Total', r'Total\s*Amount'])
+    money_lines = tags['money']
+    subtotal = extract_monetary_value(money_lines, [r'Net\s*Value', r'Subtotal', r'Net\s*Amount'])
+    tax = extract_monetary_value(money_lines, [r'VAT', r'Tax', r'GST'])
+    total = extract_monetary_value(money_lines, [r'Gross\s*Value', r'Grand\s*Total', r'Total\s*Amount'])
 
     # Extract line items from ALL pages with proper stopping at payment information
     items = extract_line_items_multipage_corrected(pages_data)
@@ -116,8 +207,10 @@ def parse_invoice_data(pages_data: list) -> dict:
         'seller_vat_reg': None
     }
 
-def extract_customer_information(lines):
+def extract_customer_information(lines, tags=None):
     """Extract customer information only, excluding seller information."""
+    if tags is None:
+        tags = classify_lines(lines)
     customer_info = {
         'name': None,
         'address': None,
@@ -126,7 +219,7 @@ def extract_customer_information(lines):
     }
     
     # First pass: Extract customer name and basic info
-    for i, line in enumerate(lines):
+    for line in tags['customer_name']:
         # Look for customer name pattern
         if re.search(r'Customer\s*Name\s*[\t:]?\s*[A-Z]', line, re.I):
             # Extract customer name
@@ -140,10 +233,10 @@ def extract_customer_information(lines):
     customer_info['address'] = extract_customer_address(lines)
     
     # Third pass: Extract customer phone
-    customer_info['phone'] = extract_customer_phone(lines)
+    customer_info['phone'] = extract_customer_phone(tags['phone'])
     
     # Fourth pass: Extract customer email (exclude seller email)
-    customer_info['email'] = extract_customer_email(lines)
+    customer_info['email'] = extract_customer_email(tags['email'])
     
     return customer_info
 
@@ -795,7 +888,10 @@ def extract_monetary_value(lines, patterns):
     return None
 
 def extract_from_bytes(file_bytes, filename: str = '') -> dict:
-    """Main entry point: extract text from file and parse invoice data."""
+    """
+    Main entry point: extract text from file and parse invoice data.
+    PDF results are cached by content hash; the returned dict is a fresh copy either way.
+    """
     if not file_bytes:
         return {
             'success': False, 'error': 'empty_file', 'message': 'File is empty.',
@@ -819,6 +915,35 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
             'header': {}, 'items': [], 'raw_text': ''
         }
 
+    cache_key = f"pdf_extract:v{CACHE_VERSION}:{hashlib.sha256(file_bytes).hexdigest()}"
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    result = _extract_from_pdf_bytes(file_bytes)
+    # Failures to read the PDF at all may be environmental (missing library), so retry those
+    if result.get('error') != 'pdf_extraction_failed':
+        _cache_set(cache_key, result)
+    return result
+
+
+def _cache_get(key):
+    try:
+        from django.core.cache import cache
+        return cache.get(key)
+    except Exception:
+        return None
+
+
+def _cache_set(key, value):
+    try:
+        from django.core.cache import cache
+        cache.set(key, value, _setting('PDF_EXTRACTION_CACHE_TTL', CACHE_TTL_DEFAULT))
+    except Exception as e:
+        logger.warning(f"Could not cache PDF extraction result: {e}")
+
+
+def _extract_from_pdf_bytes(file_bytes) -> dict:
+    """Extract and parse a PDF (uncached)."""
     # Extract text from PDF with page separation
     try:
         pages_data = extract_text_from_pdf(file_bytes)
@@ -842,46 +967,21 @@ def extract_from_bytes(file_bytes, filename: str = '') -> dict:
     try:
         parsed = parse_invoice_data(pages_data)
 
-        # Ensure multi-page line items are fully captured: also parse each page individually and merge items
-        try:
-            combined_items = []
-            seen = set()
-            # Start with items from the full-document parse
-            for it in (parsed.get('items') or []):
-                key = (
-                    (it.get('code') or '').strip(),
-                    (it.get('description') or '').strip(),
-                    str(it.get('qty') or ''),
-                    str(it.get('rate') or ''),
-                    str(it.get('value') or ''),
-                )
-                if key not in seen:
-                    seen.add(key)
-                    combined_items.append(it)
-
-            # Parse each page independently and merge items to catch any missed on subsequent pages
-            for page in pages_data:
-                try:
-                    page_parsed = parse_invoice_data([page])
-                    for it in (page_parsed.get('items') or []):
-                        key = (
-                            (it.get('code') or '').strip(),
-                            (it.get('description') or '').strip(),
-                            str(it.get('qty') or ''),
-                            str(it.get('rate') or ''),
-                            str(it.get('value') or ''),
-                        )
-                        if key not in seen:
-                            seen.add(key)
-                            combined_items.append(it)
-                except Exception:
-                    continue
-
-            # Replace parsed items with the merged list
-            parsed['items'] = combined_items
-        except Exception:
-            # If merging fails, continue with original parsed result
-            pass
+        # Drop repeated identical line items (same code, description, qty, rate and value)
+        combined_items = []
+        seen = set()
+        for it in (parsed.get('items') or []):
+            key = (
+                (it.get('code') or '').strip(),
+                (it.get('description') or '').strip(),
+                str(it.get('qty') or ''),
+                str(it.get('rate') or ''),
+                str(it.get('value') or ''),
+            )
+            if key not in seen:
+                seen.add(key)
+                combined_items.append(it)
+        parsed['items'] = combined_items
 
         # Prepare header
         header = {
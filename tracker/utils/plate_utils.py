@@ -0,0 +1,43 @@
+"""
+Vehicle plate normalization helpers.
+
+Plates are compared in a canonical form (upper case, no spaces or dashes) so that
+"T 123 ABC", "t123abc" and "T-123-ABC" all refer to the same vehicle.
+"""
+
+import re
+from typing import Optional
+
+_SEPARATORS = re.compile(r'[\s\-]+')
+
+# Reference formats recognised as plate numbers on invoices
+_PLATE_PATTERNS = (
+    re.compile(r'^[A-Z]{1,3}\s*-?\s*\d{1,4}[A-Z]?$'),
+    re.compile(r'^[A-Z]{1,3}\d{3,4}$'),
+    re.compile(r'^\d{1,4}[A-Z]{2,3}$'),
+    re.compile(r'^[A-Z]\s*\d{1,4}\s*[A-Z]{2,3}$'),
+)
+
+
+def normalize_plate(value) -> str:
+    """Canonical plate form: upper case with whitespace and dashes removed."""
+    if not value:
+        return ''
+    return _SEPARATORS.sub('', str(value)).upper()
+
+
+def plate_from_reference(ref) -> Optional[str]:
+    """
+    Extract a normalized plate number from an invoice reference such as "FOR T 123 ABC".
+    Returns None when the reference does not look like a plate.
+    """
+    if not ref:
+        return None
+    s = str(ref).strip().upper()
+    if s.startswith('FOR '):
+        s = s[4:].strip()
+    elif s.startswith('FOR'):
+        s = s[3:].strip()
+    if any(p.match(s) for p in _PLATE_PATTERNS):
+        return s.replace('-', '').replace(' ', '')
+    return None
@@ -4,16 +4,51 @@ Provides functions to aggregate and analyze revenue by sales/service/labour cate
 """
 
 from decimal import Decimal
-from django.db.models import Sum, Q, F, DecimalField
-from django.db.models.functions import Coalesce
+from django.db.models import Sum, F, DecimalField
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth
 from django.utils import timezone
 from datetime import timedelta
 from tracker.models import Invoice, InvoiceLineItem
 
+ORDER_TYPES = ('sales', 'service', 'labour', 'unknown')
+REVENUE_STATUSES = ['draft', 'issued', 'paid']
+
+# line_total + tax_amount, treating a missing tax amount as zero
+_LINE_VALUE = Coalesce(F('line_total'), Decimal('0'), output_field=DecimalField()) + Coalesce(
+    F('tax_amount'), Decimal('0'), output_field=DecimalField()
+)
+
+
+def _empty_breakdown():
+    return {key: Decimal('0') for key in ORDER_TYPES + ('total',)}
+
+
+def _filtered_invoices(invoices_qs=None, date_from=None, date_to=None):
+    if invoices_qs is None:
+        invoices_qs = Invoice.objects.all()
+    invoices_qs = invoices_qs.filter(status__in=REVENUE_STATUSES)
+    if date_from:
+        invoices_qs = invoices_qs.filter(invoice_date__gte=date_from)
+    if date_to:
+        invoices_qs = invoices_qs.filter(invoice_date__lte=date_to)
+    return invoices_qs
+
+
+def _line_items_for(invoices_qs):
+    """Line items of ``invoices_qs`` as a single joined query (invoice filters become a subquery)."""
+    return InvoiceLineItem.objects.filter(invoice__in=invoices_qs.order_by().values('id'))
+
+
+def _add(breakdown, order_type, value):
+    key = order_type if order_type in ORDER_TYPES else 'unknown'
+    breakdown[key] += value or Decimal('0')
+    breakdown['total'] += value or Decimal('0')
+
 
 def get_revenue_by_order_type(invoices_qs=None, date_from=None, date_to=None):
     """
     Calculate total revenue breakdown by order type (sales, service, labour, unknown).
+    Line item values are summed per order type by the database in one grouped query.
 
     Args:
         invoices_qs: QuerySet of invoices to analyze (optional, defaults to all)
@@ -29,82 +64,50 @@ def get_revenue_by_order_type(invoices_qs=None, date_from=None, date_to=None):
         - total: Total revenue across all types
         - count: Number of invoices analyzed
     """
-    if invoices_qs is None:
-        invoices_qs = Invoice.objects.filter(status__in=['draft', 'issued', 'paid'])
-    else:
-        invoices_qs = invoices_qs.filter(status__in=['draft', 'issued', 'paid'])
-    
-    # Apply date filtering if provided
-    if date_from:
-        invoices_qs = invoices_qs.filter(invoice_date__gte=date_from)
-    if date_to:
-        invoices_qs = invoices_qs.filter(invoice_date__lte=date_to)
-    
-    # Get invoice IDs to filter line items
-    invoice_ids = list(invoices_qs.values_list('id', flat=True))
-    
-    if not invoice_ids:
-        return {
-            'sales': Decimal('0'),
-            'service': Decimal('0'),
-            'labour': Decimal('0'),
-            'unknown': Decimal('0'),
-            'total': Decimal('0'),
-            'count': 0,
-        }
-    
-    # Aggregate line items by order type
-    line_items = InvoiceLineItem.objects.filter(invoice_id__in=invoice_ids)
-    
-    result = {
-        'sales': Decimal('0'),
-        'service': Decimal('0'),
-        'labour': Decimal('0'),
-        'unknown': Decimal('0'),
-        'total': Decimal('0'),
-        'count': len(invoice_ids),
-    }
-    
-    # Sum line totals by order type
-    for item in line_items:
-        order_type = item.order_type or 'unknown'
-        line_value = item.line_total + item.tax_amount if item.tax_amount else item.line_total
-        
-        if order_type in result:
-            result[order_type] = Decimal(str(result[order_type])) + Decimal(str(line_value))
-        else:
-            result['unknown'] = Decimal(str(result['unknown'])) + Decimal(str(line_value))
-    
-    # Calculate total
-    result['total'] = (
-        result['sales'] +
-        result['service'] +
-        result['labour'] +
-        result['unknown']
-    )
-    
+    invoices_qs = _filtered_invoices(invoices_qs, date_from, date_to)
+    result = _empty_breakdown()
+    rows = _line_items_for(invoices_qs).values('order_type').annotate(value=Sum(_LINE_VALUE)).order_by()
+    for row in rows:
+        _add(result, row['order_type'], row['value'])
+    result['count'] = invoices_qs.count()
     return result
 
 
-def get_revenue_by_order_type_this_month():
-    """Get revenue breakdown by order type for current month."""
-    now = timezone.now()
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-
-    invoices_qs = Invoice.objects.filter(
-        status__in=['draft', 'issued', 'paid'],
-        invoice_date__gte=month_start.date(),
-        invoice_date__lte=month_end.date()
+def get_revenue_by_order_type_over_time(invoices_qs=None, date_from=None, date_to=None, period='day'):
+    """
+    Revenue breakdown by order type per day (``period='day'``) or per month (``period='month'``),
+    computed in one grouped query for charts.
+
+    Returns:
+        List of dicts ordered by date, each with 'date' (first day of the bucket) plus the
+        sales/service/labour/unknown/total keys of get_revenue_by_order_type.
+    """
+    invoices_qs = _filtered_invoices(invoices_qs, date_from, date_to)
+    trunc = TruncMonth if period == 'month' else TruncDay
+    rows = (
+        _line_items_for(invoices_qs)
+        .annotate(bucket=trunc('invoice__invoice_date'))
+        .values('bucket', 'order_type')
+        .annotate(value=Sum(_LINE_VALUE))
+        .order_by('bucket')
     )
+    series = {}
+    for row in rows:
+        breakdown = series.setdefault(row['bucket'], _empty_breakdown())
+        _add(breakdown, row['order_type'], row['value'])
+    return [{'date': bucket, **breakdown} for bucket, breakdown in series.items()]
+
 
-    return get_revenue_by_order_type(invoices_qs)
+def get_revenue_by_order_type_this_month():
+    """Get revenue breakdown by order type for current month."""
+    month_start = timezone.localdate().replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return get_revenue_by_order_type(date_from=month_start, date_to=month_end)
 
 
 def get_revenue_by_order_type_all_time():
     """Get revenue breakdown by order type for all time."""
-    invoices_qs = Invoice.objects.filter(status__in=['draft', 'issued', 'paid'])
-    return get_revenue_by_order_type(invoices_qs)
+    return get_revenue_by_order_type()
 
 
 def get_revenue_by_order_type_for_vehicles(vehicle_ids, date_from=None, date_to=None):
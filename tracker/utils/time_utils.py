@@ -41,6 +41,16 @@ def is_order_overdue(started_at: datetime, now: datetime = None) -> bool:
     return elapsed_hours >= OVERDUE_THRESHOLD_HOURS
 
 
+def compute_overdue_at(started_at: datetime) -> datetime | None:
+    """
+    Return the moment an order started at ``started_at`` becomes overdue.
+    Persisted on Order.overdue_at so overdue checks become a plain indexed comparison.
+    """
+    if not started_at:
+        return None
+    return started_at + timedelta(hours=OVERDUE_THRESHOLD_HOURS)
+
+
 def get_order_overdue_status(order) -> dict:
     """
     Get the overdue status of an order.
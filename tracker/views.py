@@ -6,7 +6,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Count, Avg, Q, Sum, Case, When, F, Value, DecimalField, ExpressionWrapper
+from django.db.models import Count, Avg, Q, Sum, Case, When, F, Value, DecimalField, IntegerField, ExpressionWrapper
 from django.db.models.functions import TruncDate, TruncDay, TruncMonth, Concat, Coalesce
 from django.utils import timezone
 from django.template.loader import render_to_string
@@ -25,10 +25,14 @@ from django.contrib.auth.models import User, Group
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
-from .models import Profile, Customer, Order, Vehicle, InventoryItem, CustomerNote, Brand, Branch, OrderAttachment, OrderAttachmentSignature, ServiceType, ServiceAddon, InquiryNote
+from .models import Profile, Customer, Order, Vehicle, InventoryItem, CustomerNote, Brand, Branch, OrderAttachment, OrderAttachmentSignature, ServiceType, ServiceAddon, InquiryNote, DailyBranchMetrics
 from django.core.paginator import Paginator
-from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch
-from .services import OrderService
+from .utils import add_audit_log, clear_audit_logs, scope_queryset, get_user_branch
+from .utils.mysql_compat import between_dates, on_date, since_date
+from .services import OrderService, VehicleService, SigningService, JobService, ExportService, CustomerStatsService
+from .services.export_service import ExportError
+from .services.signing_service import JOB_CARD_KINDS
+from .views_jobs import job_accepted_response, wants_async
 from .utils.pdf_signature import (
     embed_signature_in_pdf,
     SignatureEmbedError,
@@ -46,51 +50,6 @@ from django.views.generic import View
 logger = logging.getLogger(__name__)
 
 
-def _mark_overdue_orders():
-    """
-    Mark orders as overdue after 9 calendar hours elapsed.
-    Simple calculation: just check elapsed time, no working hour complexity.
-    """
-    try:
-        from .utils.time_utils import is_order_overdue, OVERDUE_THRESHOLD_HOURS
-
-        now = timezone.now()
-        # Ensure inquiries are treated as completed (retroactively normalize existing data)
-        Order.objects.filter(type='inquiry').exclude(status='completed').update(status='completed', completed_at=now, completion_date=now)
-
-        # Auto progress: created -> in_progress after 10 minutes (exclude inquiries)
-        # Set started_at to created_at when auto-progressing
-        created_cutoff = now - timedelta(minutes=10)
-        Order.objects.filter(status="created", created_at__lte=created_cutoff).exclude(type='inquiry').update(status="in_progress", started_at=F('created_at'))
-
-        # Mark orders as overdue if they've been active for 9+ calendar hours
-        # Check in_progress orders with started_at set
-        in_progress_orders = Order.objects.filter(
-            status='in_progress',
-            started_at__isnull=False
-        ).exclude(type='inquiry')
-
-        for order in in_progress_orders:
-            if is_order_overdue(order.started_at, now):
-                order.status = 'overdue'
-                order.save(update_fields=['status'])
-
-        # Check created orders that are waiting too long (created but not yet auto-progressed)
-        # An order in 'created' status for 9+ hours should be marked as overdue
-        created_orders = Order.objects.filter(
-            status='created',
-            created_at__isnull=False
-        ).exclude(type='inquiry')
-
-        for order in created_orders:
-            if is_order_overdue(order.created_at, now):
-                order.status = 'overdue'
-                order.save(update_fields=['status'])
-
-    except Exception as e:
-        logger.warning(f"Error in _mark_overdue_orders: {e}")
-        pass
-
 class CustomLoginView(LoginView):
     template_name = "registration/login.html"
 
@@ -136,7 +95,6 @@ class CustomLogoutView(LogoutView):
 
 @login_required
 def api_order_status(request: HttpRequest, pk: int):
-    _mark_overdue_orders()
     try:
         o = Order.objects.get(pk=pk)
         data = {
@@ -157,7 +115,6 @@ def api_order_status(request: HttpRequest, pk: int):
 
 @login_required
 def api_orders_statuses(request: HttpRequest):
-    _mark_overdue_orders()
     ids_param = request.GET.get('ids') or ''
     try:
         ids = [int(x) for x in ids_param.replace(',', ' ').split() if x.isdigit()]
@@ -176,6 +133,42 @@ def api_orders_statuses(request: HttpRequest):
         }
     return JsonResponse({'success': True, 'orders': out})
 
+@login_required
+def api_orders_changes(request: HttpRequest):
+    """
+    Change feed of the orders in the caller's scope.
+
+    GET params:
+    - since: watermark from the previous response, or an ISO timestamp (e.g. page render
+      time). Without it only the current watermark is returned.
+    - wait: optional long-poll, in seconds, until something changes; capped by
+      ORDER_FEED_MAX_WAIT, which defaults to 0 because every waiting request holds a
+      synchronous worker.
+
+    Returns the changed orders (oldest change first), the next watermark and has_more
+    when the page was full and the client should ask again right away.
+    """
+    from django.conf import settings
+    from .services import OrderFeedService
+
+    orders_qs = scope_queryset(Order.objects.all(), request.user, request)
+    since = (request.GET.get('since') or '').strip()
+    if not since:
+        return JsonResponse({'success': True, 'orders': [], 'watermark': OrderFeedService.current_watermark(), 'has_more': False})
+    position = OrderFeedService.parse_watermark(since)
+    if position is None:
+        return JsonResponse({'success': False, 'error': 'Invalid since watermark'}, status=400)
+
+    try:
+        wait = float(request.GET.get('wait') or 0)
+    except ValueError:
+        wait = 0
+    wait = min(max(wait, 0), float(getattr(settings, 'ORDER_FEED_MAX_WAIT', 0)))
+    if wait:
+        OrderFeedService.wait_for_changes(orders_qs, position, wait)
+
+    return JsonResponse({'success': True, **OrderFeedService.changes(orders_qs, position)})
+
 @login_required
 def api_order_invoice_totals(request: HttpRequest, pk: int):
     """
@@ -269,7 +262,7 @@ def api_service_distribution(request: HttpRequest):
 
         orders_qs = scope_queryset(Order.objects.all(), request.user, request)
         # Filter by created_at date range (inclusive)
-        filtered = orders_qs.filter(created_at__date__gte=start_date, created_at__date__lte=today)
+        filtered = orders_qs.filter(between_dates('created_at', start_date, today))
         rows = filtered.values('type').annotate(c=Count('id'))
         counts = {r['type']: r['c'] for r in rows}
         # Ensure consistent order of labels
@@ -285,154 +278,148 @@ def api_service_distribution(request: HttpRequest):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-@login_required
-def dashboard(request: HttpRequest):
-    # Normalize statuses before computing metrics
-    _mark_overdue_orders()
-    # Always calculate fresh metrics for accurate data
-    today = timezone.localdate()
+def _dashboard_metrics(request: HttpRequest, orders_qs, customers_qs, today) -> dict:
+    """
+    Compute the dashboard's KPIs and chart data for the viewer's scope.
 
-    # Import aggregation functions and datetime utilities at the top of the function to avoid UnboundLocalError
+    Scalar order KPIs come from one conditional aggregate and the status/type/priority
+    distributions from one grouped query, so the temporary-customer exclusion join is
+    applied once per query rather than once per counter.
+    """
     from decimal import Decimal
-    from django.db.models import Sum, Count, Avg
-    from datetime import datetime
-
-    # Branch-scoped base querysets with safe fallback for staff/admin without branch assignment
-    # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    from .utils import get_user_branch
-    _branch = get_user_branch(request.user)
-    if not _branch and (getattr(request.user, 'is_superuser', False) or getattr(request.user, 'is_staff', False)):
-        orders_qs = Order.objects.all().exclude(
-            customer__full_name__startswith='Plate ',
-            customer__phone__startswith='PLATE_'
-        )
-        customers_qs = Customer.objects.all().exclude(
-            full_name__startswith='Plate ',
-            phone__startswith='PLATE_'
-        )
-    else:
-        orders_qs = scope_queryset(Order.objects.all(), request.user, request).exclude(
-            customer__full_name__startswith='Plate ',
-            customer__phone__startswith='PLATE_'
-        )
-        customers_qs = scope_queryset(Customer.objects.all(), request.user, request).exclude(
-            full_name__startswith='Plate ',
-            phone__startswith='PLATE_'
-        )
-
-    # Remove caching to ensure fresh data
-    metrics = None
-
-    if True:  # Always recalculate
-        total_orders = orders_qs.count()
-        total_customers = customers_qs.count()
-
-        status_counts_qs = orders_qs.values("status").annotate(c=Count("id"))
-        type_counts_qs = orders_qs.values("type").annotate(c=Count("id"))
-        priority_counts_qs = orders_qs.values("priority").annotate(c=Count("id"))
-
-        status_counts = {x["status"]: x["c"] for x in status_counts_qs}
-        type_counts = {x["type"]: x["c"] for x in type_counts_qs}
-        priority_counts = {x["priority"]: x["c"] for x in priority_counts_qs}
-
-        # Count persisted overdue
-        try:
-            overdue_count = orders_qs.filter(status="overdue").count()
-            status_counts["overdue"] = overdue_count
-        except Exception:
-            status_counts.setdefault("overdue", 0)
-
-        # Ensure all possible status values exist in status_counts (even if zero)
-        all_statuses = ["created", "in_progress", "overdue", "completed", "cancelled"]
-        for status in all_statuses:
-            if status not in status_counts:
-                status_counts[status] = 0
-
-        # Ensure we have a count for completed orders, even if it's zero
-        completed_orders = orders_qs.filter(status="completed").count()
-        completion_rate = (completed_orders / total_orders * 100) if total_orders > 0 else 0
-        
-        # Update status_counts to ensure 'completed' key exists
-        status_counts['completed'] = completed_orders
-        
-        # Also count completed today - MySQL compatible using range
-        from .utils.mysql_compat import get_date_range
-        today_date = timezone.now().date()
-        start_dt, end_dt = get_date_range(today_date)
-        completed_today_count = orders_qs.filter(status="completed").filter(
-            Q(completed_at__gte=start_dt, completed_at__lte=end_dt) |
-            Q(completed_at__isnull=True, created_at__gte=start_dt, created_at__lte=end_dt)
-        ).count()
+    from tracker.models import Invoice
+    from .utils.mysql_compat import month_start_filter
+
+    created_today = on_date("created_at", today)
+    completed = Q(status="completed")
+    order_totals = orders_qs.aggregate(
+        total=Count("id"),
+        completed=Count("id", filter=completed),
+        # Completed today by completed_at, falling back to created_at when it was never set
+        completed_today=Count("id", filter=completed & (
+            on_date("completed_at", today) | (Q(completed_at__isnull=True) & created_today)
+        )),
+        new_today=Count("id", filter=Q(status="created") & created_today),
+        pending_inquiries=Count("id", filter=Q(type="inquiry", status__in=["created", "in_progress"])),
+    )
+    total_orders = order_totals["total"]
+    completed_orders = order_totals["completed"]
+    completion_rate = (completed_orders / total_orders * 100) if total_orders > 0 else 0
+
+    # Ensure all possible status values exist in status_counts (even if zero)
+    status_counts = dict.fromkeys(["created", "in_progress", "overdue", "completed", "cancelled"], 0)
+    type_counts = {}
+    priority_counts = {}
+    distribution = orders_qs.values("status", "type", "priority").annotate(c=Count("id")).order_by()
+    for row in distribution:
+        status_counts[row["status"]] = status_counts.get(row["status"], 0) + row["c"]
+        type_counts[row["type"]] = type_counts.get(row["type"], 0) + row["c"]
+        priority_counts[row["priority"]] = priority_counts.get(row["priority"], 0) + row["c"]
+
+    customer_totals = customers_qs.aggregate(
+        total=Count("id"),
+        new_this_month=Count("id", filter=month_start_filter("registration_date")),
+    )
 
-        # New orders created today (status 'created' within today's range)
-        # Exclude temporary customers
-        try:
-            new_orders_today = orders_qs.filter(status="created").filter(created_at__gte=start_dt, created_at__lte=end_dt).count()
-        except Exception:
-            # Fallback: total 'created' if date filtering fails
-            new_orders_today = orders_qs.filter(status="created").count()
-
-        # New customers this month - MySQL compatible
-        # Exclude temporary customers
-        from .utils.mysql_compat import month_start_filter
-        new_customers_this_month = customers_qs.filter(
-            month_start_filter('registration_date')
-        ).count()
+    # Keep original fields/logic for compatibility, but use valid types/statuses
+    average_order_value = 0
 
-        # Keep original fields/logic for compatibility, but use valid types/statuses
-        average_order_value = 0
-        pending_inquiries_count = orders_qs.filter(
-            type="inquiry",
+    # Upcoming appointments (next 7 days) based on active orders
+    upcoming_appointments = (
+        orders_qs.filter(
+            between_dates("created_at", today, today + timedelta(days=7)),
             status__in=["created", "in_progress"],
-        ).count()
-
-        # Upcoming appointments (next 7 days) based on active orders
-        upcoming_appointments = (
-            orders_qs.filter(
-                status__in=["created", "in_progress"],
-                created_at__date__gte=today,
-                created_at__date__lte=today + timedelta(days=7),
-            )
-            .select_related("customer")
-            .order_by("created_at")[:5]
         )
+        .select_related("customer")
+        .order_by("created_at")[:5]
+    )
 
-        # Top customers by order count
-        from django.db.models import Max
-
-        top_customers = (
-            customers_qs.annotate(
-                order_count=Count("orders"),
-                latest_order_date=Max("orders__created_at")
-            )
-            .filter(order_count__gt=0)
-            .order_by("-order_count")[:5]
+    # Top customers by order count, read from the maintained CustomerStats rows
+    top_customers = (
+        customers_qs.annotate(
+            order_count=F("stats__order_count"),
+            latest_order_date=F("stats__last_order_at")
         )
+        .filter(order_count__gt=0)
+        .order_by("-order_count")[:5]
+    )
 
-        status_percentages = {}
-        for s, c in status_counts.items():
-            status_percentages[f"{s}_percent"] = (c / total_orders * 100) if total_orders > 0 else 0
+    # Inventory metrics: item count, units in stock, low stock (quantity <= reorder level) and out of stock
+    inventory = InventoryItem.objects.aggregate(
+        total_items=Count("id"),
+        total_stock=Sum("quantity"),
+        low_stock_count=Count("id", filter=Q(quantity__lte=F("reorder_level"))),
+        out_of_stock_count=Count("id", filter=Q(quantity=0)),
+    )
+    inventory["total_stock"] = inventory["total_stock"] or 0
+
+    # Revenue KPI Calculations from Invoices
+    # New accurate metrics: Gross Revenue (subtotal + VAT) for both this month and all-time
+    gross_revenue_this_month = Decimal('0')
+    total_gross_revenue = Decimal('0')
+    net_revenue_this_month = Decimal('0')
+    total_net_revenue = Decimal('0')
+    vat_this_month = Decimal('0')
+    total_vat = Decimal('0')
+    avg_invoice_amount = Decimal('0')
+    invoices_this_month_count = 0
+    revenue_by_branch_tsh = {}
 
-        # Get inventory metrics
-        from django.db.models import Sum
-        from tracker.models import InventoryItem
+    today_gross_revenue = Decimal('0')
+    today_net_revenue = Decimal('0')
+    today_vat = Decimal('0')
 
-        # Total inventory items count
-        total_inventory_items = InventoryItem.objects.count()
-        
-        # Sum of all quantities in stock
-        total_stock = InventoryItem.objects.aggregate(total=Sum('quantity'))['total'] or 0
-        
-        # Count of low stock items (quantity <= reorder_level)
-        low_stock_count = InventoryItem.objects.filter(quantity__lte=F('reorder_level')).count()
-        
-        # Count of out of stock items
-        out_of_stock_count = InventoryItem.objects.filter(quantity=0).count()
-        
-        # Revenue KPI Calculations from Invoices
-        # New accurate metrics: Gross Revenue (subtotal + VAT) for both this month and all-time
-        from tracker.models import Invoice
+    # Scope invoices to user's branch/permissions (used for the by-type breakdown below)
+    invoices_qs = scope_queryset(Invoice.objects.all(), request.user, request)
+    today_date = today
+    month_start = today_date.replace(day=1)
+    month_invoices = invoices_qs.filter(invoice_date__gte=month_start, invoice_date__lte=today_date)
+    today_invoices = invoices_qs.filter(invoice_date=today_date)
+
+    try:
+        # Gross (subtotal + VAT), net and VAT totals are read from the daily rollup, so this
+        # is one aggregate over O(days) rows instead of a scan of every invoice
+        metrics_qs = scope_queryset(DailyBranchMetrics.objects.all(), request.user, request)
+        this_month = Q(day__gte=month_start, day__lte=today_date)
+        today_only = Q(day=today_date)
+        sums = metrics_qs.aggregate(
+            total_gross=Sum('revenue'),
+            total_net=Sum('net_revenue'),
+            total_vat_sum=Sum('tax'),
+            total_count=Sum('invoice_count'),
+            month_gross=Sum('revenue', filter=this_month),
+            month_net=Sum('net_revenue', filter=this_month),
+            month_vat_sum=Sum('tax', filter=this_month),
+            month_count=Sum('invoice_count', filter=this_month),
+            today_gross=Sum('revenue', filter=today_only),
+            today_net=Sum('net_revenue', filter=today_only),
+            today_vat_sum=Sum('tax', filter=today_only),
+        )
+        total_gross_revenue = sums['total_gross'] or Decimal('0')
+        total_net_revenue = sums['total_net'] or Decimal('0')
+        total_vat = sums['total_vat_sum'] or Decimal('0')
+        if sums['total_count']:
+            avg_invoice_amount = total_gross_revenue / sums['total_count']
+        gross_revenue_this_month = sums['month_gross'] or Decimal('0')
+        net_revenue_this_month = sums['month_net'] or Decimal('0')
+        vat_this_month = sums['month_vat_sum'] or Decimal('0')
+        invoices_this_month_count = sums['month_count'] or 0
+        today_gross_revenue = sums['today_gross'] or Decimal('0')
+        today_net_revenue = sums['today_net'] or Decimal('0')
+        today_vat = sums['today_vat_sum'] or Decimal('0')
+
+        # Revenue by branch (Gross Value)
+        branch_sums = metrics_qs.values('branch__name').annotate(
+            total=Sum('revenue')
+        ).order_by('branch__name')
+
+        for item in branch_sums:
+            branch_name = item['branch__name'] or 'Unassigned'
+            amount = Decimal(str(item['total'])) if item['total'] is not None else Decimal('0')
+            revenue_by_branch_tsh[branch_name] = amount
 
+    except Exception as e:
+        logger.error(f"Error aggregating revenue KPIs from invoices: {e}")
         gross_revenue_this_month = Decimal('0')
         total_gross_revenue = Decimal('0')
         net_revenue_this_month = Decimal('0')
@@ -443,228 +430,83 @@ def dashboard(request: HttpRequest):
         invoices_this_month_count = 0
         revenue_by_branch_tsh = {}
 
-        try:
-            # Scope invoices to user's branch/permissions
-            invoices_qs = scope_queryset(Invoice.objects.all(), request.user, request)
-
-            # Calculate total gross revenue (all time) = sum of total_amount (subtotal + VAT)
-            total_gross_sums = invoices_qs.aggregate(
-                total_gross=Sum('total_amount'),
-                total_net=Sum('subtotal'),
-                total_vat_sum=Sum('tax_amount'),
-                total_count=Count('id'),
-                avg_gross=Avg('total_amount')
-            )
-
-            if total_gross_sums.get('total_gross') is not None:
-                total_gross_revenue = Decimal(str(total_gross_sums.get('total_gross')))
-
-            if total_gross_sums.get('total_net') is not None:
-                total_net_revenue = Decimal(str(total_gross_sums.get('total_net')))
-
-            if total_gross_sums.get('total_vat_sum') is not None:
-                total_vat = Decimal(str(total_gross_sums.get('total_vat_sum')))
-
-            if total_gross_sums.get('avg_gross') is not None:
-                avg_invoice_amount = Decimal(str(total_gross_sums.get('avg_gross')))
-
-            # Month ranges for this month's calculations
-            today_date = timezone.localdate()
-            month_start = today_date.replace(day=1)
-            month_end = today_date
-
-            # Get this month's invoices using created_at for accuracy
-            # (invoice_date might not be set correctly for extracted invoices)
-            month_start_datetime = timezone.make_aware(datetime.combine(month_start, datetime.min.time()))
-            month_end_datetime = timezone.make_aware(datetime.combine(month_end, datetime.max.time()))
-
-            month_invoices = invoices_qs.filter(
-                created_at__gte=month_start_datetime,
-                created_at__lte=month_end_datetime
-            )
-
-            # Calculate gross revenue this month (subtotal + VAT)
-            month_gross_sums = month_invoices.aggregate(
-                month_gross=Sum('total_amount'),
-                month_net=Sum('subtotal'),
-                month_vat_sum=Sum('tax_amount'),
-                month_count=Count('id')
-            )
-
-            if month_gross_sums.get('month_gross') is not None:
-                gross_revenue_this_month = Decimal(str(month_gross_sums.get('month_gross')))
-
-            if month_gross_sums.get('month_net') is not None:
-                net_revenue_this_month = Decimal(str(month_gross_sums.get('month_net')))
-
-            if month_gross_sums.get('month_vat_sum') is not None:
-                vat_this_month = Decimal(str(month_gross_sums.get('month_vat_sum')))
-
-            if month_gross_sums.get('month_count') is not None:
-                invoices_this_month_count = month_gross_sums.get('month_count')
-
-            # Daily revenue calculations (today's invoices)
-            today_date = timezone.localdate()
-            today_start_datetime = timezone.make_aware(datetime.combine(today_date, datetime.min.time()))
-            today_end_datetime = timezone.make_aware(datetime.combine(today_date, datetime.max.time()))
-
-            today_invoices = invoices_qs.filter(
-                created_at__gte=today_start_datetime,
-                created_at__lte=today_end_datetime
-            )
-
-            # Calculate gross revenue today
-            today_gross_revenue = Decimal('0')
-            today_net_revenue = Decimal('0')
-            today_vat = Decimal('0')
-
-            today_gross_sums = today_invoices.aggregate(
-                today_gross=Sum('total_amount'),
-                today_net=Sum('subtotal'),
-                today_vat_sum=Sum('tax_amount')
-            )
-
-            if today_gross_sums.get('today_gross') is not None:
-                today_gross_revenue = Decimal(str(today_gross_sums.get('today_gross')))
-
-            if today_gross_sums.get('today_net') is not None:
-                today_net_revenue = Decimal(str(today_gross_sums.get('today_net')))
-
-            if today_gross_sums.get('today_vat_sum') is not None:
-                today_vat = Decimal(str(today_gross_sums.get('today_vat_sum')))
-
-            # Revenue by branch (Gross Value)
-            branch_sums = invoices_qs.values('branch__name').annotate(
-                total=Sum('total_amount')
-            ).order_by('branch__name')
-
-            for item in branch_sums:
-                branch_name = item['branch__name'] or 'Unassigned'
-                amount = Decimal(str(item['total'])) if item['total'] is not None else Decimal('0')
-                revenue_by_branch_tsh[branch_name] = amount
-
-        except Exception as e:
-            logger.error(f"Error aggregating revenue KPIs from invoices: {e}")
-            gross_revenue_this_month = Decimal('0')
-            total_gross_revenue = Decimal('0')
-            net_revenue_this_month = Decimal('0')
-            total_net_revenue = Decimal('0')
-            vat_this_month = Decimal('0')
-            total_vat = Decimal('0')
-            avg_invoice_amount = Decimal('0')
-            invoices_this_month_count = 0
-            revenue_by_branch_tsh = {}
-
-        # Revenue breakdown by order type
-        revenue_by_type = {}
-        revenue_by_type_this_month = {}
-        revenue_by_type_today = {}
-        try:
-            from tracker.utils.revenue_utils import get_revenue_by_order_type
-
-            # All-time revenue by type
-            revenue_by_type = get_revenue_by_order_type(invoices_qs)
+    # Revenue breakdown by order type
+    revenue_by_type = {}
+    revenue_by_type_this_month = {}
+    revenue_by_type_today = {}
+    try:
+        from tracker.utils.revenue_utils import get_revenue_by_order_type
 
-            # This month's revenue by type
-            revenue_by_type_this_month = get_revenue_by_order_type(month_invoices)
+        # All-time revenue by type
+        revenue_by_type = get_revenue_by_order_type(invoices_qs)
 
-            # Today's revenue by type
-            revenue_by_type_today = get_revenue_by_order_type(today_invoices)
-        except Exception as e:
-            logger.warning(f"Error calculating revenue by order type: {e}")
-            revenue_by_type = {
-                'sales': Decimal('0'),
-                'service': Decimal('0'),
-                'labour': Decimal('0'),
-                'unknown': Decimal('0'),
-                'total': Decimal('0'),
-                'count': 0,
-            }
-            revenue_by_type_this_month = {
-                'sales': Decimal('0'),
-                'service': Decimal('0'),
-                'labour': Decimal('0'),
-                'unknown': Decimal('0'),
-                'total': Decimal('0'),
-                'count': 0,
-            }
-            revenue_by_type_today = {
-                'sales': Decimal('0'),
-                'service': Decimal('0'),
-                'labour': Decimal('0'),
-                'unknown': Decimal('0'),
-                'total': Decimal('0'),
-                'count': 0,
-            }
+        # This month's revenue by type
+        revenue_by_type_this_month = get_revenue_by_order_type(month_invoices)
 
-        metrics = {
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'completed_today': completed_today_count,
-            'new_orders_today': new_orders_today,
-            'total_customers': total_customers,
-            'completion_rate': round(completion_rate, 1),
-            'status_counts': status_counts,
-            'type_counts': type_counts,
-            'priority_counts': priority_counts,
-            'new_customers_this_month': new_customers_this_month,
-            'pending_inquiries_count': pending_inquiries_count,
-            'average_order_value': average_order_value,
-            # Revenue KPIs - Fresh calculation based on Gross Revenue (subtotal + VAT)
-            'gross_revenue_this_month': gross_revenue_this_month,      # Gross revenue this month
-            'total_gross_revenue': total_gross_revenue,                # Total gross revenue (all time)
-            'net_revenue_this_month': net_revenue_this_month,          # Net revenue this month (subtotal)
-            'total_net_revenue': total_net_revenue,                    # Total net revenue (all time)
-            'vat_this_month': vat_this_month,                          # VAT this month
-            'total_vat': total_vat,                                    # Total VAT (all time)
-            'avg_invoice_amount': avg_invoice_amount,                  # Average invoice amount
-            'invoices_this_month_count': invoices_this_month_count,    # Number of invoices this month
-            # Daily revenue KPIs
-            'today_gross_revenue': today_gross_revenue,                # Gross revenue today
-            'today_net_revenue': today_net_revenue,                    # Net revenue today
-            'today_vat': today_vat,                                    # VAT today
-            'revenue_by_branch_tsh': revenue_by_branch_tsh,
-            # Revenue breakdown by order type
-            'revenue_by_type': revenue_by_type,
-            'revenue_by_type_this_month': revenue_by_type_this_month,
-            'revenue_by_type_today': revenue_by_type_today,
-            'upcoming_appointments': list(upcoming_appointments.values('id', 'customer__full_name', 'created_at')),
-            'top_customers': list(top_customers.values('id', 'full_name', 'order_count', 'phone', 'email', 'total_spent', 'latest_order_date', 'registration_date')),
-            'recent_orders': list(orders_qs.select_related("customer").exclude(status="completed").order_by("-created_at").values('id', 'customer__full_name', 'status', 'created_at')[:10]),
-            'inventory_metrics': {
-                'total_items': total_inventory_items,
-                'total_stock': total_stock,
-                'low_stock_count': low_stock_count,
-                'out_of_stock_count': out_of_stock_count,
-            }
+        # Today's revenue by type
+        revenue_by_type_today = get_revenue_by_order_type(today_invoices)
+    except Exception as e:
+        logger.warning(f"Error calculating revenue by order type: {e}")
+        revenue_by_type = {
+            'sales': Decimal('0'),
+            'service': Decimal('0'),
+            'labour': Decimal('0'),
+            'unknown': Decimal('0'),
+            'total': Decimal('0'),
+            'count': 0,
+        }
+        revenue_by_type_this_month = {
+            'sales': Decimal('0'),
+            'service': Decimal('0'),
+            'labour': Decimal('0'),
+            'unknown': Decimal('0'),
+            'total': Decimal('0'),
+            'count': 0,
+        }
+        revenue_by_type_today = {
+            'sales': Decimal('0'),
+            'service': Decimal('0'),
+            'labour': Decimal('0'),
+            'unknown': Decimal('0'),
+            'total': Decimal('0'),
+            'count': 0,
         }
-        # Don't cache metrics to ensure fresh data
-        # cache.set(cache_key, metrics, 60)
 
-    # Always fresh data for fast-updating sections
-    recent_orders = list(
-        orders_qs.select_related("customer").exclude(status="completed").order_by("-created_at")[:10]
-    )
-    # Fix completed today calculation - MySQL compatible
-    from datetime import date
-    from .utils.mysql_compat import today_filter, get_date_range
-    
-    today = timezone.now().date()
-    today_start, today_end = get_date_range(today)
-    
-    # Count completed orders by completed_at date (if set) or created_at date - MySQL compatible
-    completed_today = orders_qs.filter(
-        status="completed"
-    ).filter(
-        Q(completed_at__gte=today_start, completed_at__lte=today_end) |
-        Q(completed_at__isnull=True, created_at__gte=today_start, created_at__lte=today_end)
-    ).count()
-
-    # Use completed_today from metrics if available, otherwise calculate fresh
-    completed_today_final = metrics.get('completed_today', completed_today)
-    
-    context = {**metrics, "recent_orders": recent_orders, "completed_today": completed_today_final, "current_time": timezone.now(), "revenue_by_branch_tsh": revenue_by_branch_tsh}
-    # render after charts
+    metrics = {
+        'total_orders': total_orders,
+        'completed_orders': completed_orders,
+        'completed_today': order_totals['completed_today'],
+        'new_orders_today': order_totals['new_today'],
+        'total_customers': customer_totals['total'],
+        'completion_rate': round(completion_rate, 1),
+        'status_counts': status_counts,
+        'type_counts': type_counts,
+        'priority_counts': priority_counts,
+        'new_customers_this_month': customer_totals['new_this_month'],
+        'pending_inquiries_count': order_totals['pending_inquiries'],
+        'average_order_value': average_order_value,
+        # Revenue KPIs - Fresh calculation based on Gross Revenue (subtotal + VAT)
+        'gross_revenue_this_month': gross_revenue_this_month,      # Gross revenue this month
+        'total_gross_revenue': total_gross_revenue,                # Total gross revenue (all time)
+        'net_revenue_this_month': net_revenue_this_month,          # Net revenue this month (subtotal)
+        'total_net_revenue': total_net_revenue,                    # Total net revenue (all time)
+        'vat_this_month': vat_this_month,                          # VAT this month
+        'total_vat': total_vat,                                    # Total VAT (all time)
+        'avg_invoice_amount': avg_invoice_amount,                  # Average invoice amount
+        'invoices_this_month_count': invoices_this_month_count,    # Number of invoices this month
+        # Daily revenue KPIs
+        'today_gross_revenue': today_gross_revenue,                # Gross revenue today
+        'today_net_revenue': today_net_revenue,                    # Net revenue today
+        'today_vat': today_vat,                                    # VAT today
+        'revenue_by_branch_tsh': revenue_by_branch_tsh,
+        # Revenue breakdown by order type
+        'revenue_by_type': revenue_by_type,
+        'revenue_by_type_this_month': revenue_by_type_this_month,
+        'revenue_by_type_today': revenue_by_type_today,
+        'upcoming_appointments': list(upcoming_appointments.values('id', 'customer__full_name', 'created_at')),
+        'top_customers': list(top_customers.values('id', 'full_name', 'order_count', 'phone', 'email', 'total_spent', 'latest_order_date', 'registration_date')),
+        'inventory_metrics': inventory,
+    }
 
     # Build sales_chart_json (monthly Orders vs Completed for last 12 months)
     from django.db.models.functions import TruncMonth
@@ -676,23 +518,30 @@ def dashboard(request: HttpRequest):
         last_months.append(prev)
     last_months = list(reversed(last_months))
 
-    # Simplified monthly data without TruncMonth to avoid timezone issues
+    # Daily sales order counts for the last 12 months from the rollup (one grouped query),
+    # folded into the monthly, current-month and last-7-days series below
+    daily_total_map = {}
+    daily_completed_map = {}
+    try:
+        sales_days = (
+            scope_queryset(DailyBranchMetrics.objects.all(), request.user, request)
+            .filter(order_type="sales", day__gte=last_months[0], day__lte=today)
+            .values("day")
+            .annotate(total=Sum("order_count"), completed=Sum("order_count", filter=Q(status="completed")))
+            .order_by()
+        )
+        for row in sales_days:
+            daily_total_map[row["day"]] = row["total"] or 0
+            daily_completed_map[row["day"]] = row["completed"] or 0
+    except Exception as e:
+        logger.warning(f"Error loading sales chart data from daily metrics: {e}")
+
     monthly_total_map = {}
     monthly_completed_map = {}
-    
-    try:
-        # Get orders from last 12 months without complex date truncation
-        twelve_months_ago = today - timedelta(days=365)
-        
-        total_orders = orders_qs.filter(type="sales", created_at__date__gte=twelve_months_ago).count()
-        completed_orders = orders_qs.filter(type="sales", status="completed", created_at__date__gte=twelve_months_ago).count()
-        
-        # Use current month as key for simplicity
-        current_month = today.replace(day=1)
-        monthly_total_map[current_month] = total_orders
-        monthly_completed_map[current_month] = completed_orders
-    except Exception:
-        pass
+    for d, c in daily_total_map.items():
+        monthly_total_map[d.replace(day=1)] = monthly_total_map.get(d.replace(day=1), 0) + c
+    for d, c in daily_completed_map.items():
+        monthly_completed_map[d.replace(day=1)] = monthly_completed_map.get(d.replace(day=1), 0) + c
 
     def _month_label(d):
         return d.strftime("%b %Y")
@@ -706,41 +555,13 @@ def dashboard(request: HttpRequest):
     # Periodized datasets
     curr_month_start = today.replace(day=1)
     curr_days = [curr_month_start + timezone.timedelta(days=i) for i in range((today - curr_month_start).days + 1)]
-
-    # Simplified daily data
-    daily_total_prev_map = {}
-    daily_completed_prev_map = {}
-    
-    try:
-        # Get today's data without complex date truncation
-        today_total = orders_qs.filter(type="sales", created_at__date=today).count()
-        today_completed = orders_qs.filter(type="sales", status="completed", created_at__date=today).count()
-        
-        daily_total_prev_map[today] = today_total
-        daily_completed_prev_map[today] = today_completed
-    except Exception:
-        pass
     sales_last_month = {
         "labels": [d.strftime("%Y-%m-%d") for d in curr_days],
-        "total": [daily_total_prev_map.get(d, 0) for d in curr_days],
-        "completed": [daily_completed_prev_map.get(d, 0) for d in curr_days],
+        "total": [daily_total_map.get(d, 0) for d in curr_days],
+        "completed": [daily_completed_map.get(d, 0) for d in curr_days],
     }
 
     last_7_days = [today - timezone.timedelta(days=i) for i in range(6, -1, -1)]
-    # Simplified weekly data
-    daily_total_map = {}
-    daily_completed_map = {}
-    
-    try:
-        # Get last 7 days data
-        for i in range(7):
-            date = today - timedelta(days=i)
-            total = orders_qs.filter(type="sales", created_at__date=date).count()
-            completed = orders_qs.filter(type="sales", status="completed", created_at__date=date).count()
-            daily_total_map[date] = total
-            daily_completed_map[date] = completed
-    except Exception:
-        pass
     sales_last_week = {
         "labels": [d.strftime("%Y-%m-%d") for d in last_7_days],
         "total": [daily_total_map.get(d, 0) for d in last_7_days],
@@ -748,8 +569,8 @@ def dashboard(request: HttpRequest):
     }
 
     from django.db.models.functions import TruncHour
-    hourly_total_qs = orders_qs.filter(type="sales", created_at__date=today).annotate(h=TruncHour("created_at")).values("h").annotate(c=Count("id"))
-    hourly_completed_qs = orders_qs.filter(type="sales", status="completed", completed_at__date=today).annotate(h=TruncHour("completed_at")).values("h").annotate(c=Count("id"))
+    hourly_total_qs = orders_qs.filter(on_date("created_at", today), type="sales").annotate(h=TruncHour("created_at")).values("h").annotate(c=Count("id"))
+    hourly_completed_qs = orders_qs.filter(on_date("completed_at", today), type="sales", status="completed").annotate(h=TruncHour("completed_at")).values("h").annotate(c=Count("id"))
     hourly_total_map = {row["h"].hour: row["c"] for row in hourly_total_qs if row["h"]}
     hourly_completed_map = {row["h"].hour: row["c"] for row in hourly_completed_qs if row["h"]}
     hours = list(range(0, 24))
@@ -783,7 +604,7 @@ def dashboard(request: HttpRequest):
     for p in ["today", "yesterday", "last_week", "last_month"]:
         start_d, end_d = _period_range(p)
         rows = (
-            orders_qs.filter(created_at__date__gte=start_d, created_at__date__lte=end_d)
+            orders_qs.filter(between_dates("created_at", start_d, end_d))
             .values("customer__full_name")
             .annotate(c=Count("id"))
             .order_by("-c")[:5]
@@ -793,20 +614,60 @@ def dashboard(request: HttpRequest):
             "values": [r["c"] for r in rows],
         }
 
-    # Add inventory metrics to context
-    inventory_metrics = metrics.get('inventory_metrics', {})
-    
+    metrics.update({
+        "sales_chart_json": json.dumps(sales_chart),
+        "sales_chart_periods_json": json.dumps(sales_periods),
+        "total_order_spark_json": json.dumps(total_order_spark),
+        "top_orders_json": json.dumps(top_orders_json_data),
+    })
+    return metrics
+
+
+@login_required
+def dashboard(request: HttpRequest):
+    today = timezone.localdate()
+
+    # Branch-scoped base querysets with safe fallback for staff/admin without branch assignment
+    # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
+    from .utils import get_user_branch
+    _branch = get_user_branch(request.user)
+    if not _branch and (getattr(request.user, 'is_superuser', False) or getattr(request.user, 'is_staff', False)):
+        orders_qs = Order.objects.all().exclude(
+            customer__full_name__startswith='Plate ',
+            customer__phone__startswith='PLATE_'
+        )
+        customers_qs = Customer.objects.all().exclude(
+            full_name__startswith='Plate ',
+            phone__startswith='PLATE_'
+        )
+    else:
+        orders_qs = scope_queryset(Order.objects.all(), request.user, request).exclude(
+            customer__full_name__startswith='Plate ',
+            customer__phone__startswith='PLATE_'
+        )
+        customers_qs = scope_queryset(Customer.objects.all(), request.user, request).exclude(
+            full_name__startswith='Plate ',
+            phone__startswith='PLATE_'
+        )
+
+    # Computed metrics and charts are cached briefly per branch; order and invoice writes
+    # bump the branch's cache version, so changes show on the next load (see utils.dashboard_cache)
+    from .utils.dashboard_cache import DASHBOARD_CACHE_TTL, dashboard_cache_key
+    cache_key = dashboard_cache_key(request.user, request)
+    metrics = cache.get(cache_key)
+    if metrics is None:
+        metrics = _dashboard_metrics(request, orders_qs, customers_qs, today)
+        cache.set(cache_key, metrics, DASHBOARD_CACHE_TTL)
+
+    # Always fresh data for fast-updating sections
+    recent_orders = list(
+        orders_qs.select_related("customer").exclude(status="completed").order_by("-created_at")[:10]
+    )
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
     context = {
         **metrics,
         "recent_orders": recent_orders,
-        "completed_today": completed_today,
         "current_time": timezone.now(),
-        "sales_chart_json": json.dumps(sales_chart),
-        "sales_chart_periods_json": json.dumps(sales_periods),
-        "total_order_spark_json": json.dumps(total_order_spark),
-        "top_orders_json": json.dumps(top_orders_json_data),
-        "inventory_metrics": inventory_metrics,  # Add inventory metrics to template context
         "branches": branches,
     }
     return render(request, "tracker/dashboard.html", context)
@@ -833,13 +694,12 @@ def customers_list(request: HttpRequest):
         qs = qs.filter(customer_type=f_type)
 
     # Stats - fix calculations with current date
-    from datetime import date
-    today_date = date.today()
+    today_date = timezone.localdate()
 
     # Apply status filters based on today's activity and visit history
     if f_status == 'active':
         # Active today: customers who visited today (based on last_visit date)
-        qs = qs.filter(last_visit__date=today_date)
+        qs = qs.filter(on_date('last_visit', today_date))
     elif f_status == 'inactive':
         # Inactive: customers who have never visited or didn't visit today
         qs = qs.filter(total_visits=0)
@@ -848,8 +708,8 @@ def customers_list(request: HttpRequest):
         qs = qs.filter(total_visits__gt=1)
 
     # KPI calculations for header
-    active_customers = customers_qs.filter(last_visit__date=today_date).count()
-    new_customers_today = customers_qs.filter(registration_date__date=today_date).count()
+    active_customers = customers_qs.filter(on_date('last_visit', today_date)).count()
+    new_customers_today = customers_qs.filter(on_date('registration_date', today_date)).count()
     returning_customers = customers_qs.filter(total_visits__gt=1).count()
 
     paginator = Paginator(qs, 20)
@@ -887,18 +747,8 @@ def customers_search(request: HttpRequest):
     elif recent:
         results = customers_qs.order_by('-last_visit', '-registration_date')[:10]
     elif q:
-        q_upper = q.upper()
-        exact_plate_qs = customers_qs.filter(vehicles__plate_number__iexact=q_upper)
-        if exact_plate_qs.exists():
-            results = exact_plate_qs.order_by('-last_visit', '-registration_date')[:10]
-        else:
-            results = customers_qs.filter(
-                Q(full_name__icontains=q) |
-                Q(phone__icontains=q) |
-                Q(email__icontains=q) |
-                Q(code__icontains=q) |
-                Q(vehicles__plate_number__istartswith=q_upper)
-            ).distinct().order_by('-last_visit', '-registration_date')[:20]
+        from .services import CustomerSearchService
+        results = CustomerSearchService.search(customers_qs, q)
 
     data = []
     for c in results:
@@ -934,40 +784,145 @@ def customers_search(request: HttpRequest):
     return JsonResponse({"results": data})
 
 
+# Dropdown results per request (default and maximum) when a limit or search is given
+CUSTOMER_DROPDOWN_LIMIT = 50
+CUSTOMER_DROPDOWN_MAX_LIMIT = 200
+
+# Summary lookups are capped at this many ids per request
+CUSTOMER_SUMMARY_MAX_IDS = 500
+
+# Rows fetched per round trip (and serialized per chunk) when streaming the full list
+CUSTOMER_STREAM_CHUNK = 1000
+
+
+def _customer_validators(request: HttpRequest, customers_qs):
+    """
+    (ETag, Last-Modified timestamp) for a customer API response. Both come from one
+    aggregate over the scoped rows: the newest updated_at catches edits and the row count
+    catches deletions. The user and query string are part of the tag because they
+    decide which rows the response contains.
+    """
+    from django.db.models import Max
+    from django.utils.http import quote_etag
+    import hashlib
+
+    stats = customers_qs.order_by().aggregate(latest=Max('updated_at'), total=Count('id'))
+    latest = stats['latest']
+    basis = f"{request.user.pk}|{request.GET.urlencode()}|{stats['total']}|{latest.isoformat() if latest else ''}"
+    etag = quote_etag(hashlib.md5(basis.encode()).hexdigest())
+    return etag, int(latest.timestamp()) if latest else None
+
+
+def _with_validators(response, etag, last_modified):
+    from django.utils.cache import patch_cache_control
+    from django.utils.http import http_date
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Private per-user data; browsers keep it but must revalidate before reuse
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _dropdown_customer(row) -> dict:
+    pk, full_name, phone, customer_type = row
+    return {'id': pk, 'full_name': full_name, 'phone': phone or '', 'customer_type': customer_type or 'personal'}
+
+
+def _stream_customers(rows):
+    """Serialize dropdown rows as the {'success': true, 'customers': [...]} document, chunk by chunk."""
+    yield '{"success": true, "customers": ['
+    chunk = []
+    first = True
+    for row in rows:
+        chunk.append(json.dumps(_dropdown_customer(row)))
+        if len(chunk) >= CUSTOMER_STREAM_CHUNK:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']}'
+
+
 @login_required
 def api_customers_summary(request: HttpRequest):
+    """Visit summary (last visit, visit count, type) for the customers in ?ids=, keyed by id."""
+    from django.utils.cache import get_conditional_response
+
     ids = (request.GET.get('ids') or '').strip()
     if not ids:
         return JsonResponse({'success': False, 'error': 'ids required'})
-    try:
-        id_list = [int(x) for x in ids.split(',') if x.isdigit()]
-    except Exception:
-        id_list = []
+    id_list = [int(x) for x in ids.split(',') if x.strip().isdigit()][:CUSTOMER_SUMMARY_MAX_IDS]
     qs = scope_queryset(Customer.objects.filter(id__in=id_list), request.user, request)
-    payload = {}
-    for c in qs:
-        payload[str(c.id)] = {
-            'last_visit': c.last_visit.isoformat() if c.last_visit else None,
-            'total_visits': c.total_visits or 0,
-            'customer_type': c.customer_type or 'personal',
+
+    etag, last_modified = _customer_validators(request, qs)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    payload = {
+        str(pk): {
+            'last_visit': last_visit.isoformat() if last_visit else None,
+            'total_visits': total_visits or 0,
+            'customer_type': customer_type or 'personal',
         }
-    return JsonResponse({'success': True, 'customers': payload})
+        for pk, last_visit, total_visits, customer_type
+        in qs.values_list('id', 'last_visit', 'total_visits', 'customer_type')
+    }
+    return _with_validators(JsonResponse({'success': True, 'customers': payload}), etag, last_modified)
 
 
 @login_required
 def api_customers_list(request: HttpRequest):
-    """API endpoint to get all customers for dropdown selection (e.g., inquiries)"""
-    qs = scope_queryset(Customer.objects.all().order_by('full_name'), request.user, request)
-    customers = [
-        {
-            'id': c.id,
-            'full_name': c.full_name,
-            'phone': c.phone or '',
-            'customer_type': c.customer_type or 'personal',
-        }
-        for c in qs
-    ]
-    return JsonResponse({'success': True, 'customers': customers})
+    """
+    Customers for dropdown selection (e.g. inquiries), ordered by name.
+
+    ``?q=`` runs the typeahead search and ``?limit=`` caps the result (at most
+    CUSTOMER_DROPDOWN_MAX_LIMIT); ``?id=`` returns just that customer. Without any of
+    them the whole branch list is streamed. Unsearched responses carry ETag/Last-Modified
+    so an unchanged list revalidates with a 304; searched ones do not, because ``q`` also
+    matches vehicle plates and makes, which the customer validators cannot see.
+    """
+    from django.http import StreamingHttpResponse
+    from django.utils.cache import get_conditional_response
+
+    customers_qs = scope_queryset(Customer.objects.all(), request.user, request)
+    q = (request.GET.get('q') or '').strip()
+    customer_id = (request.GET.get('id') or '').strip()
+    limit = None
+    if q or request.GET.get('limit'):
+        try:
+            limit = int(request.GET.get('limit') or CUSTOMER_DROPDOWN_LIMIT)
+        except (TypeError, ValueError):
+            limit = CUSTOMER_DROPDOWN_LIMIT
+        limit = max(1, min(limit, CUSTOMER_DROPDOWN_MAX_LIMIT))
+    if customer_id:
+        customers_qs = customers_qs.filter(pk=customer_id if customer_id.isdigit() else 0)
+
+    fields = ('id', 'full_name', 'phone', 'customer_type')
+    if q:
+        from .services import CustomerSearchService
+        matches = CustomerSearchService.search(customers_qs, q, limit=limit)
+        rows = [tuple(getattr(c, f) for f in fields) for c in matches]
+        return JsonResponse({'success': True, 'customers': [_dropdown_customer(row) for row in rows]})
+
+    etag, last_modified = _customer_validators(request, customers_qs)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if limit is not None or customer_id:
+        rows = list(customers_qs.order_by('full_name', 'id').values_list(*fields)[:limit])
+    else:
+        rows = customers_qs.order_by('full_name', 'id').values_list(*fields).iterator(chunk_size=CUSTOMER_STREAM_CHUNK)
+        return _with_validators(
+            StreamingHttpResponse(_stream_customers(rows), content_type='application/json'), etag, last_modified
+        )
+
+    customers = [_dropdown_customer(row) for row in rows]
+    return _with_validators(JsonResponse({'success': True, 'customers': customers}), etag, last_modified)
 
 
 @login_required
@@ -2161,7 +2116,7 @@ def create_order_for_customer(request: HttpRequest, pk: int):
 @login_required
 def customer_groups(request: HttpRequest):
     """Advanced customer groups page with detailed analytics and insights"""
-    from django.db.models import Count, Sum, Avg, Max, Min, Q, F
+    from django.db.models import Count, Sum, Avg, Q, F
     from django.db.models.functions import TruncMonth, TruncWeek
     from datetime import datetime, timedelta
     
@@ -2219,15 +2174,15 @@ def customer_groups(request: HttpRequest):
     
     # Base customer queryset with annotations
     customers_base = scope_queryset(Customer.objects.all(), request.user, request).annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        first_order_date=Min('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True)
+        recent_orders_count=Count('orders', filter=since_date('orders__created_at', start_date)),
+        last_order_date=F('stats__last_order_at'),
+        first_order_date=F('stats__first_order_at'),
+        service_orders=Count('orders', filter=Q(orders__type='service') & since_date('orders__created_at', start_date)),
+        sales_orders=Count('orders', filter=Q(orders__type='sales') & since_date('orders__created_at', start_date)),
+        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry') & since_date('orders__created_at', start_date)),
+        completed_orders=Count('orders', filter=Q(orders__status='completed') & since_date('orders__created_at', start_date)),
+        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled') & since_date('orders__created_at', start_date)),
+        vehicles_count=Coalesce(F('stats__vehicle_count'), 0, output_field=IntegerField())
     )
     
     # Get all defined customer types from the model
@@ -2347,7 +2302,7 @@ def customer_groups(request: HttpRequest):
         mixed_preference = total_customers - service_preference - sales_preference if total_customers > 0 else 0
         
         # Recent activity trends
-        recent_new_customers = group_customers.filter(registration_date__date__gte=start_date).count()
+        recent_new_customers = group_customers.filter(since_date('registration_date', start_date)).count()
         returning_customers = group_customers.filter(total_visits__gt=1).count()
         
         # Calculate completion rate (completed orders / (completed + cancelled))
@@ -2445,7 +2400,7 @@ def customer_groups(request: HttpRequest):
     for customer_type, display_name in Customer.TYPE_CHOICES:
         # Get monthly order data
         monthly_data = (Order.objects
-                       .filter(customer__customer_type=customer_type, created_at__date__gte=start_date)
+                       .filter(since_date('created_at', start_date), customer__customer_type=customer_type)
                        .annotate(month=TruncMonth('created_at'))
                        .values('month')
                        .annotate(
@@ -2560,209 +2515,168 @@ def customer_groups_advanced(request: HttpRequest):
 
 @login_required
 def api_customer_groups_data(request: HttpRequest):
-    """Advanced API endpoint for customer groups data"""
-    from django.db.models import Count, Sum, Avg, Q, F, Max, Min
-    from datetime import datetime, timedelta
-    
-    # Get parameters
+    """Customer type statistics for a period, with activity/order type filters and optional group details"""
+    from .models import Invoice
+    from .services import CustomerGroupService
+
     group = request.GET.get('group', 'all')
-    period = request.GET.get('period', '6months')
-    
-    # Calculate date range
-    today = timezone.now().date()
-    if period == '1month':
-        start_date = today - timedelta(days=30)
-    elif period == '3months':
-        start_date = today - timedelta(days=90)
-    elif period == '1year':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=180)
-    
-    # Get all customer types
-    customer_types = ['government', 'ngo', 'company', 'personal']
-    
-    # Build group statistics
-    groups_data = {}
-    total_customers = 0
-    total_orders = 0
-    total_revenue = 0
-    
-    for customer_type in customer_types:
-        # Get customers for this group
-        customers = Customer.objects.filter(customer_type=customer_type).annotate(
-            total_orders=Count('orders'),
-            recent_orders=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-            service_orders=Count('orders', filter=Q(orders__type='service')),
-            sales_orders=Count('orders', filter=Q(orders__type='sales')),
-            inquiry_orders=Count('orders', filter=Q(orders__type='inquiry')),
-            completed_orders=Count('orders', filter=Q(orders__status='completed')),
-            last_order_date=Max('orders__created_at'),
-            vehicles_count=Count('vehicles', distinct=True)
-        )
-        
-        customer_count = customers.count()
-        group_orders = sum(c.total_orders for c in customers) or 0
-        group_revenue = sum(float(c.total_spent or 0) for c in customers) or 0
-        
-        # Calculate averages
-        avg_orders = group_orders / customer_count if customer_count > 0 else 0
-        avg_revenue = group_revenue / customer_count if customer_count > 0 else 0
-        
-        # Get top customers
-        top_customers = list(customers.order_by('-total_spent')[:5].values(
-            'id', 'full_name', 'phone', 'total_spent', 'total_orders', 'last_order_date'
-        ))
-        
-        groups_data[customer_type] = {
-            'name': dict(Customer.TYPE_CHOICES)[customer_type],
-            'customer_count': customer_count,
-            'total_orders': group_orders,
-            'total_revenue': float(group_revenue),
-            'avg_orders': round(avg_orders, 1),
-            'avg_revenue': round(float(avg_revenue), 2),
-            'top_customers': top_customers
-        }
-        
-        total_customers += customer_count
-        total_orders += group_orders
-        total_revenue += float(group_revenue)
-    
-    # If specific group requested, get detailed data
+    activity_filter = request.GET.get('activity', 'all')  # all, active, inactive
+    order_type_filter = request.GET.get('order_type', 'all')  # all, service, sales, inquiry, labour
+    window = CustomerGroupService.period_window(request.GET.get('period'))
+
+    customers_qs = scope_queryset(Customer.objects.all(), request.user, request)
+    orders_qs = scope_queryset(Order.objects.all(), request.user, request)
+    invoices_qs = scope_queryset(Invoice.objects.all(), request.user, request)
+
+    # One grouped query each for customers, orders and invoice revenue per customer type
+    summary = CustomerGroupService.summary(
+        customers_qs, orders_qs, invoices_qs, window, activity=activity_filter, order_type=order_type_filter
+    )
+
+    # The first customers of a requested group; the full list is paged by customer_groups_data
     group_details = None
-    if group != 'all' and group in customer_types:
-        customers = Customer.objects.filter(customer_type=group).annotate(
-            total_orders=Count('orders'),
-            recent_orders=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-            service_orders=Count('orders', filter=Q(orders__type='service')),
-            sales_orders=Count('orders', filter=Q(orders__type='sales')),
-            inquiry_orders=Count('orders', filter=Q(orders__type='inquiry')),
-            completed_orders=Count('orders', filter=Q(orders__status='completed')),
-            last_order_date=Max('orders__created_at'),
-            vehicles_count=Count('vehicles', distinct=True)
-        ).order_by('-total_spent')
-        
+    if group != 'all' and group in summary['groups']:
+        group_customers = CustomerGroupService.with_activity(
+            customers_qs.filter(customer_type=group), orders_qs, window, activity_filter
+        )
+        customers_data = CustomerGroupService.rows(group_customers, window, '-total_spent', 0, CUSTOMER_GROUP_DETAILS_LIMIT)
+        for row in customers_data:
+            row['total_orders'] = row['recent_orders_count']
         group_details = {
-            'customers': list(customers.values(
-                'id', 'full_name', 'phone', 'email', 'total_spent', 'total_orders',
-                'recent_orders', 'service_orders', 'sales_orders', 'inquiry_orders',
-                'completed_orders', 'last_order_date', 'vehicles_count', 'registration_date'
-            )[:50]),
-            'stats': groups_data.get(group, {})
+            'customers': customers_data,
+            'stats': summary['groups'][group]
         }
-    
+
     return JsonResponse({
         'success': True,
-        'groups': groups_data,
-        'totals': {
-            'customers': total_customers,
-            'orders': total_orders,
-            'revenue': round(total_revenue, 2)
-        },
+        'groups': summary['groups'],
+        'totals': summary['totals'],
         'group_details': group_details,
-        'period': period
+        'period': window['period'],
+        'period_label': window['label'],
+        'filters': {
+            'activity': activity_filter,
+            'order_type': order_type_filter
+        },
+        'date_range': {
+            'start': window['start_date'].isoformat() if window['start_date'] else None,
+            'end': window['end_date'].isoformat()
+        }
     })
 
+
+# DataTables page size cap for customer_groups_data
+CUSTOMER_GROUPS_MAX_LENGTH = 100
+
+# Customers listed in a group's details by api_customer_groups_data
+CUSTOMER_GROUP_DETAILS_LIMIT = 50
+
+
 @login_required
 def customer_groups_data(request: HttpRequest):
-    """API endpoint for AJAX requests to get customer groups data"""
-    from django.db.models import Count, Sum, Avg, Q, F
-    from datetime import datetime, timedelta
-    
-    # Get filter parameters
-    selected_group = request.GET.get('group', 'all')
-    time_period = request.GET.get('period', '6months')
-    draw = int(request.GET.get('draw', 1))
-    start = int(request.GET.get('start', 0))
-    length = int(request.GET.get('length', 10))
-    search_value = request.GET.get('search[value]', '')
-    
-    # Calculate date ranges based on time period
-    end_date = datetime.now()
-    if time_period == 'week':
-        start_date = end_date - timedelta(days=7)
-    elif time_period == 'month':
-        start_date = end_date - timedelta(days=30)
-    elif time_period == '3months':
-        start_date = end_date - timedelta(days=90)
-    elif time_period == '6months':
-        start_date = end_date - timedelta(days=180)
-    elif time_period == 'year':
-        start_date = end_date - timedelta(days=365)
-    else:
-        start_date = datetime(2000, 1, 1)  # All time
-    
-    # Base query for customers
-    customers = Customer.objects.all()
-    
-    # Apply search filter
+    """
+    Server-side DataTables endpoint for the customers of a group (customer type).
+
+    Takes the DataTables draw/start/length/search[value]/order[0][...] parameters plus
+    group, period and activity. Search, sorting and paging run in SQL and each row is a
+    projection with the customer's order and invoice aggregates over the period.
+    """
+    from .services import CustomerGroupService, CustomerSearchService
+    from .services.customer_group_service import SORTABLE_FIELDS
+
+    def _int(name, default):
+        try:
+            return int(request.GET.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    draw = _int('draw', 1)
+    start = max(_int('start', 0), 0)
+    length = min(max(_int('length', 10), 1), CUSTOMER_GROUPS_MAX_LENGTH)
+    group = request.GET.get('group', 'all')
+    window = CustomerGroupService.period_window(request.GET.get('period'))
+
+    customers = scope_queryset(Customer.objects.all(), request.user, request)
+    if group in dict(Customer.TYPE_CHOICES):
+        customers = customers.filter(customer_type=group)
+    customers = CustomerGroupService.with_activity(
+        customers, scope_queryset(Order.objects.all(), request.user, request), window, request.GET.get('activity', 'all')
+    )
+    records_total = customers.count()
+
+    search_value = request.GET.get('search[value]', '').strip()
     if search_value:
-        customers = customers.filter(
-            Q(first_name__icontains=search_value) |
-            Q(last_name__icontains=search_value) |
-            Q(phone__icontains=search_value) |
-            Q(email__icontains=search_value)
-        )
-    
-    # Apply group filter
-    if selected_group and selected_group != 'all':
-        if selected_group == 'high_value':
-            customers = customers.annotate(
-                order_count=Count('orders')
-            ).filter(
-                order_count__gt=0,
-                total_spent__gt=1000  # Example threshold for high-value
-            )
-        elif selected_group == 'inactive':
-            customers = customers.filter(
-                last_order_date__lt=end_date - timedelta(days=180)
-            )
-        # Add more group filters as needed
-    
-    # Get total count before pagination
-    total_records = customers.count()
-    
-    # Apply pagination
-    customers = customers[start:start + length]
-    
-    # Prepare data for DataTables
-    data = []
-    for customer in customers:
-        data.append({
-            'id': customer.id,
-            'full_name': f"{customer.first_name} {customer.last_name}",
-            'phone': customer.phone,
-            'email': customer.email,
-            'total_spent': float(customer.total_spent) if customer.total_spent else 0,
-            'recent_orders_count': customer.orders.count(),
-            'last_order_date': customer.last_order_date.strftime('%Y-%m-%d') if customer.last_order_date else 'N/A',
-            'actions': f'''
-                <a href="/customer/{customer.id}/" class="btn btn-sm btn-primary">
-                    <i class="fas fa-eye"></i> View
-                </a>
-                <a href="/customer/{customer.id}/edit/" class="btn btn-sm btn-secondary">
-                    <i class="fas fa-edit"></i> Edit
-                </a>
-            '''
-        })
-    
-    # Prepare response
-    response = {
+        customers = CustomerSearchService.matching(customers, search_value)
+        records_filtered = customers.count()
+    else:
+        records_filtered = records_total
+
+    # Sort column: the data name DataTables sends for the ordered column, if sortable
+    column = request.GET.get(f"columns[{_int('order[0][column]', -1)}][data]") or request.GET.get('order_by', '')
+    if column in SORTABLE_FIELDS:
+        order_by = column if request.GET.get('order[0][dir]', 'desc') == 'asc' else f'-{column}'
+    else:
+        order_by = '-total_spent'
+
+    data = CustomerGroupService.rows(customers, window, order_by, start, length)
+    return JsonResponse({
         'draw': draw,
-        'recordsTotal': total_records,
-        'recordsFiltered': total_records,
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
         'data': data,
-    }
-    
-    return JsonResponse(response)
+        'period': window['period'],
+        'period_label': window['label'],
+    })
+
+def _orders_list_kpis(request: HttpRequest) -> dict:
+    """
+    KPI tiles for the orders list, computed with one conditional aggregate and cached per
+    viewer scope for ORDERS_KPI_CACHE_TTL seconds (versioned like the dashboard, so order
+    writes invalidate it immediately).
+    """
+    from django.conf import settings
+    from .utils.dashboard_cache import dashboard_cache_key
+
+    cache_key = dashboard_cache_key(request.user, request, prefix='orders_list_kpis')
+    kpis = cache.get(cache_key)
+    if kpis is not None:
+        return kpis
+
+    # Temporary customers (full_name "Plate ..." with phone "PLATE_...") are left out of the order tiles
+    real = ~Q(customer__full_name__startswith='Plate ', customer__phone__startswith='PLATE_')
+    active = Q(status__in=['created', 'in_progress', 'overdue'])
+    kpis = scope_queryset(Order.objects.all(), request.user, request).aggregate(
+        total_orders=Count('id', filter=real),
+        pending_orders=Count('id', filter=real & Q(status='created')),
+        active_orders=Count('id', filter=real & active),
+        completed_today=Count('id', filter=real & Q(status='completed') & on_date('completed_at', timezone.localdate())),
+        urgent_orders=Count('id', filter=real & Q(priority='urgent')),
+        overdue_count=Count('id', filter=real & Q(status='overdue')),
+        # Started orders tiles count every order, temporary customers included
+        started_total=Count('id', filter=active),
+        started_pending=Count('id', filter=Q(status='in_progress')),
+        started_completed=Count('id', filter=Q(status='completed')),
+    )
+    kpis['revenue_today'] = 0
+
+    # Calculate documents uploaded (document_scans count)
+    kpis['documents_uploaded'] = 0
+    try:
+        from .models import DocumentScan
+        kpis['documents_uploaded'] = DocumentScan.objects.filter(
+            order__in=scope_queryset(Order.objects.filter(active), request.user, request)
+        ).count()
+    except Exception:
+        pass
+
+    cache.set(cache_key, kpis, getattr(settings, 'ORDERS_KPI_CACHE_TTL', 10))
+    return kpis
+
 
 @login_required
 def orders_list(request: HttpRequest):
     from django.db.models import Q, Sum, Count
 
-    # Persist overdue statuses before listing
-    _mark_overdue_orders()
-
     # Get timezone from cookie or use default
     tzname = request.COOKIES.get('django_timezone')
 
@@ -2776,7 +2690,7 @@ def orders_list(request: HttpRequest):
     customer_id = request.GET.get("customer", "")
 
     # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    orders = scope_queryset(Order.objects.select_related("customer", "vehicle").order_by("-created_at"), request.user, request).exclude(
+    orders = scope_queryset(Order.objects.select_related("customer", "vehicle").order_by("-created_at", "-id"), request.user, request).exclude(
         customer__full_name__startswith='Plate ',
         customer__phone__startswith='PLATE_'
     )
@@ -2796,7 +2710,7 @@ def orders_list(request: HttpRequest):
     dr = (date_range or '').lower()
     if dr in ("daily", "today"):
         today = timezone.localdate()
-        orders = orders.filter(created_at__date=today)
+        orders = orders.filter(on_date('created_at', today))
     elif dr in ("weekly", "week"):
         week_ago = timezone.now() - timedelta(days=7)
         orders = orders.filter(created_at__gte=week_ago)
@@ -2808,39 +2722,13 @@ def orders_list(request: HttpRequest):
         start_year = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
         orders = orders.filter(created_at__gte=start_year)
 
-    # Get counts for stats
-    # Exclude temporary customers (those with full_name starting with "Plate " and phone starting with "PLATE_")
-    base_orders_qs = scope_queryset(Order.objects.all(), request.user, request).exclude(
-        customer__full_name__startswith='Plate ',
-        customer__phone__startswith='PLATE_'
-    )
-    total_orders = base_orders_qs.count()
-    pending_orders = base_orders_qs.filter(status="created").count()
-    active_orders = base_orders_qs.filter(status__in=["created", "in_progress", "overdue"]).count()
-    completed_today = base_orders_qs.filter(status="completed", completed_at__date=timezone.localdate()).count()
-    urgent_orders = base_orders_qs.filter(priority="urgent").count()
-    # Overdue KPI: respect user branch scoping and optional admin branch filter
-    overdue_count = base_orders_qs.filter(status="overdue").count()
-    revenue_today = 0
-
-    # Get started orders KPIs (for the Started Orders view)
+    kpis = _orders_list_kpis(request)
     started_orders_qs = scope_queryset(Order.objects.filter(status__in=['created', 'in_progress', 'overdue']), request.user, request)
-    started_total = started_orders_qs.count()
-    started_pending = started_orders_qs.filter(status='in_progress').count()
-    started_completed = scope_queryset(Order.objects.filter(status='completed'), request.user, request).count()
-
-    # Calculate documents uploaded (document_scans count)
-    documents_uploaded = 0
-    try:
-        from .models import DocumentScan
-        documents_uploaded = DocumentScan.objects.filter(
-            order__in=started_orders_qs
-        ).count()
-    except Exception:
-        pass
 
     # Fetch started orders if view mode is 'started'
     started_orders = []
+    first_query = next_page_query = previous_page_query = ''
+
     if view_mode == "started":
         plate_search = (request.GET.get("plate_search") or "").strip().upper()
         started_status = request.GET.get("status", "all")
@@ -2852,7 +2740,7 @@ def orders_list(request: HttpRequest):
             started_list_qs = started_list_qs.filter(status=started_status)
 
         if plate_search:
-            started_list_qs = started_list_qs.filter(vehicle__plate_number__istartswith=plate_search)
+            started_list_qs = started_list_qs.filter(vehicle__in=VehicleService.vehicles_by_plate(plate_search, prefix=True))
 
         if started_sort == "plate_number":
             started_list_qs = started_list_qs.order_by("vehicle__plate_number")
@@ -2868,10 +2756,22 @@ def orders_list(request: HttpRequest):
         page = request.GET.get('page')
         started_orders = paginator.get_page(page)
     else:
-        # For regular view, paginate regular orders
-        paginator = Paginator(orders, 20)
-        page = request.GET.get('page')
-        orders = paginator.get_page(page)
+        # For regular view, page through orders by (created_at, id) cursor so deep pages
+        # cost the same as the first one
+        from .utils.pagination import keyset_page
+        orders = keyset_page(orders, after=request.GET.get('after', ''), before=request.GET.get('before', ''))
+        # Page links keep the current filters
+        params = request.GET.copy()
+        for key in ('after', 'before', 'page'):
+            params.pop(key, None)
+        first_query = params.urlencode()
+        if orders.next_cursor:
+            params['after'] = orders.next_cursor
+            next_page_query = params.urlencode()
+            params.pop('after')
+        if orders.previous_cursor:
+            params['before'] = orders.previous_cursor
+            previous_page_query = params.urlencode()
 
     branches = list(Branch.objects.filter(is_active=True).order_by('name').values_list('name', flat=True))
     return render(request, "tracker/orders_list.html", {
@@ -2880,17 +2780,10 @@ def orders_list(request: HttpRequest):
         "order_view_mode": view_mode,
         "status": status,
         "type": type_filter,
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "active_orders": active_orders,
-        "completed_today": completed_today,
-        "urgent_orders": urgent_orders,
-        "overdue_count": overdue_count,
-        "revenue_today": revenue_today,
-        "started_total": started_total,
-        "started_pending": started_pending,
-        "started_completed": started_completed,
-        "documents_uploaded": documents_uploaded,
+        **kpis,
+        "first_page_query": first_query,
+        "next_page_query": next_page_query,
+        "previous_page_query": previous_page_query,
         "branches": branches,
         "plate_search": (request.GET.get("plate_search") or ""),
         "started_status": request.GET.get("status", "all"),
@@ -3726,7 +3619,6 @@ def sign_order_document(request: HttpRequest, pk: int):
         return JsonResponse({'success': False, 'error': 'PDF document and signature are required.'}, status=400)
 
     MAX_PDF_BYTES = 10 * 1024 * 1024  # 10 MB
-    MAX_SIGNATURE_BYTES = 2 * 1024 * 1024  # 2 MB
 
     filename_lower = (pdf_file.name or '').lower()
     if not filename_lower.endswith('.pdf'):
@@ -3735,24 +3627,21 @@ def sign_order_document(request: HttpRequest, pk: int):
     if hasattr(pdf_file, 'size') and pdf_file.size and pdf_file.size > MAX_PDF_BYTES:
         return JsonResponse({'success': False, 'error': 'PDF exceeds maximum size of 10MB.'}, status=400)
 
-    def _decode_signature(payload: str) -> bytes:
-        if ';base64,' in payload:
-            payload = payload.split(';base64,', 1)[1]
-        payload = payload.strip()
-        if not payload:
-            raise ValueError('Signature payload is empty.')
-        try:
-            return base64.b64decode(payload)
-        except Exception as exc:
-            raise ValueError('Signature payload is not valid base64.') from exc
-
     try:
-        signature_bytes = _decode_signature(signature_payload)
+        signature_bytes = SigningService.decode_signature(signature_payload)
     except ValueError as exc:
         return JsonResponse({'success': False, 'error': str(exc)}, status=400)
 
-    if len(signature_bytes) > MAX_SIGNATURE_BYTES:
-        return JsonResponse({'success': False, 'error': 'Signature image is too large (max 2MB).'}, status=400)
+    preset = 'job_card' if (request.POST.get('completion_doc_type') or '').strip().lower() in JOB_CARD_KINDS else None
+
+    if wants_async(request):
+        job = JobService.enqueue('sign_order_document', {
+            'order_id': order.id,
+            'filename': pdf_file.name,
+            'signature_data': signature_payload,
+            'preset': preset,
+        }, user=request.user, upload=pdf_file)
+        return job_accepted_response(job)
 
     try:
         try:
@@ -3760,47 +3649,14 @@ def sign_order_document(request: HttpRequest, pk: int):
         except Exception:
             pass
         pdf_bytes = pdf_file.read()
-        preset = 'job_card' if (request.POST.get('completion_doc_type') or '').strip().lower() in {'job_card','jobcard','job card'} else None
-        if preset:
-            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes, preset=preset)
-        else:
-            signed_pdf_bytes = embed_signature_in_pdf(pdf_bytes, signature_bytes)
+        signed_pdf_bytes, signed_name = SigningService.complete_order_with_signed_pdf(
+            order, pdf_bytes, pdf_file.name, signature_bytes, preset=preset, user=request.user
+        )
     except SignatureEmbedError as exc:
         return JsonResponse({'success': False, 'error': str(exc)}, status=400)
     except Exception:
         return JsonResponse({'success': False, 'error': 'Unable to sign the document.'}, status=500)
 
-    signed_name = build_signed_filename(pdf_file.name)
-
-    signed_content = ContentFile(signed_pdf_bytes, name=signed_name)
-    order.completion_attachment.save(signed_name, signed_content, save=False)
-
-    signature_file_name = f"signature_{order.id}_{int(time.time())}.png"
-    order.signature_file.save(signature_file_name, ContentFile(signature_bytes), save=False)
-
-    now = timezone.now()
-    if not order.started_at:
-        order.started_at = now
-        order.status = 'in_progress'
-    order.status = 'completed'
-    order.completed_at = now
-    order.completion_date = now
-    reference_time = order.started_at or order.created_at
-    order.actual_duration = int(max(0, (now - reference_time).total_seconds() // 60))
-    order.signed_by = request.user
-    order.signed_at = now
-
-    if order.type == 'sales' and (order.quantity or 0) > 0 and order.item_name and order.brand:
-        from .utils import adjust_inventory
-        adjust_inventory(order.item_name, order.brand, (order.quantity or 0))
-
-    order.save(update_fields=['status', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
-
-    try:
-        add_audit_log(request.user, 'order_completed', f"Order {order.order_number} signed and archived as PDF")
-    except Exception:
-        pass
-
     response = HttpResponse(signed_pdf_bytes, content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="{signed_name}"'
     try:
@@ -3826,71 +3682,60 @@ def sign_existing_document(request: HttpRequest, pk: int):
     attachment_id = (request.POST.get('attachment_id') or '').strip()
     signature_payload = request.POST.get('signature_data') or ''
     doc_kind = (request.POST.get('completion_doc_type') or '').strip().lower()
-    use_job_card = doc_kind in {'job_card','jobcard','job card'}
+    use_job_card = doc_kind in JOB_CARD_KINDS
 
     if not signature_payload:
         messages.error(request, 'Signature is required.')
         return redirect('tracker:order_detail', pk=order.id)
 
-    # Resolve source document
-    src_bytes = None
-    src_name = None
+    # Decode signature
+    try:
+        signature_bytes = SigningService.decode_signature(signature_payload)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect('tracker:order_detail', pk=order.id)
+
     if attachment_id:
         try:
             att = get_object_or_404(OrderAttachment, pk=int(attachment_id), order=order)
         except Exception:
             messages.error(request, 'Attachment not found for this order.')
             return redirect('tracker:order_detail', pk=order.id)
-        try:
-            att.file.open('rb')
-            src_bytes = att.file.read()
-            src_name = att.file.name or 'document'
-        finally:
-            try:
-                att.file.close()
-            except Exception:
-                pass
+        source = att.file
     elif order.completion_attachment:
-        try:
-            order.completion_attachment.open('rb')
-            src_bytes = order.completion_attachment.read()
-            src_name = order.completion_attachment.name or 'document'
-        finally:
-            try:
-                order.completion_attachment.close()
-            except Exception:
-                pass
+        source = order.completion_attachment
     else:
         messages.error(request, 'No document selected to sign.')
         return redirect('tracker:order_detail', pk=order.id)
 
-    lower = (src_name or '').lower()
-    is_pdf = lower.endswith('.pdf')
-
-    # Decode signature
-    try:
-        payload = signature_payload
-        if ';base64,' in payload:
-            payload = payload.split(';base64,', 1)[1]
-        signature_bytes = base64.b64decode(payload)
-    except Exception:
-        messages.error(request, 'Invalid signature payload.')
+    if wants_async(request):
+        job = JobService.enqueue('sign_existing_document', {
+            'order_id': order.id,
+            'attachment_id': int(attachment_id) if attachment_id else None,
+            'signature_data': signature_payload,
+            'use_job_card': use_job_card,
+        }, user=request.user)
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return job_accepted_response(job)
+        messages.info(request, 'Signing in progress. The signed copy will appear in the attachments shortly.')
         return redirect('tracker:order_detail', pk=order.id)
 
-    if len(signature_bytes) > (2 * 1024 * 1024):
-        messages.error(request, 'Signature image is too large (max 2MB).')
-        return redirect('tracker:order_detail', pk=order.id)
+    # Resolve source document
+    try:
+        source.open('rb')
+        src_bytes = source.read()
+        src_name = source.name or 'document'
+    finally:
+        try:
+            source.close()
+        except Exception:
+            pass
 
-    # Perform embedding
+    # Perform embedding, save as new attachment and ensure signature file stored
     try:
-        if is_pdf:
-            out = embed_signature_in_pdf(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
-            out_name = build_signed_filename(src_name)
-            out_content = ContentFile(out, name=out_name)
-        else:
-            out = embed_signature_in_image(src_bytes, signature_bytes, preset='job_card' if use_job_card else None)
-            out_name = build_signed_name(src_name)
-            out_content = ContentFile(out, name=out_name)
+        SigningService.sign_into_new_attachment(
+            order, src_bytes, src_name, signature_bytes, use_job_card=use_job_card, user=request.user
+        )
     except SignatureEmbedError as exc:
         messages.error(request, str(exc))
         return redirect('tracker:order_detail', pk=order.id)
@@ -3898,23 +3743,6 @@ def sign_existing_document(request: HttpRequest, pk: int):
         messages.error(request, 'Could not embed signature into the document.')
         return redirect('tracker:order_detail', pk=order.id)
 
-    # Save as new attachment and ensure signature file stored
-    OrderAttachment.objects.create(order=order, file=out_content, uploaded_by=request.user)
-    if not order.signature_file:
-        order.signature_file.save(f"signature_{order.id}_{int(time.time())}.png", ContentFile(signature_bytes), save=False)
-    now = timezone.now()
-    if not order.started_at:
-        order.started_at = now
-        order.status = 'in_progress'
-    order.status = 'completed'
-    order.completed_at = now
-    order.completion_date = now
-    reference_time = order.started_at or order.created_at
-    order.actual_duration = int(max(0, (now - reference_time).total_seconds() // 60))
-    order.signed_by = request.user
-    order.signed_at = now
-    order.save(update_fields=['status', 'started_at', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
-
     messages.success(request, 'Signed copy created and attached to the order.')
     return redirect('tracker:order_detail', pk=order.id)
 
@@ -4027,83 +3855,36 @@ def sign_supporting_documents(request: HttpRequest, pk: int):
     if OrderAttachmentSignature.objects.filter(attachment=attachment).exists():
         return JsonResponse({'success': False, 'error': 'This document has already been signed.'}, status=400)
 
-    MAX_SIGNATURE_BYTES = 2 * 1024 * 1024
-
     try:
-        if ';base64,' in signature_data:
-            header, b64_data = signature_data.split(';base64,', 1)
-            ext = (header.split('/')[-1] or 'png').split(';')[0]
-        else:
-            b64_data = signature_data.strip()
-            ext = 'png'
-
-        signature_bytes = base64.b64decode(b64_data)
-
-        if len(signature_bytes) > MAX_SIGNATURE_BYTES:
-            return JsonResponse({'success': False, 'error': 'Signature image is too large (max 2MB).'}, status=400)
-
-    except Exception as e:
+        signature_bytes = SigningService.decode_signature(signature_data)
+    except ValueError as e:
         logger.error(f"Failed to decode signature: {e}")
-        return JsonResponse({'success': False, 'error': 'Invalid signature data.'}, status=400)
+        message = str(e) if 'too large' in str(e) else 'Invalid signature data.'
+        return JsonResponse({'success': False, 'error': message}, status=400)
 
-    try:
-        attachment.file.open('rb')
-        doc_bytes = attachment.file.read()
-        attachment.file.close()
-    except Exception as e:
-        logger.error(f"Failed to read attachment: {e}")
-        return JsonResponse({'success': False, 'error': 'Could not read the document file.'}, status=400)
-
-    signed_file_content = None
-    filename_lower = attachment.filename().lower()
-
-    if filename_lower.endswith('.pdf'):
-        try:
-            signed_bytes = embed_signature_in_pdf(doc_bytes, signature_bytes)
-            signed_name = build_signed_filename(attachment.filename())
-            signed_file_content = ContentFile(signed_bytes, name=signed_name)
-        except Exception as e:
-            logger.error(f"Failed to embed signature in PDF: {e}")
-            return JsonResponse({'success': False, 'error': 'Could not embed signature into PDF.'}, status=400)
-    else:
-        image_exts = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-        if any(filename_lower.endswith(ext) for ext in image_exts):
-            try:
-                signed_bytes = embed_signature_in_image(doc_bytes, signature_bytes)
-                signed_name = build_signed_name(attachment.filename())
-                signed_file_content = ContentFile(signed_bytes, name=signed_name)
-            except Exception as e:
-                logger.error(f"Failed to embed signature in image: {e}")
-                return JsonResponse({'success': False, 'error': 'Could not embed signature into image.'}, status=400)
-        else:
-            return JsonResponse({'success': False, 'error': 'Only PDF and image files can be signed.'}, status=400)
+    if wants_async(request):
+        job = JobService.enqueue('sign_supporting_document', {
+            'attachment_id': attachment.id,
+            'signature_data': signature_data,
+        }, user=request.user)
+        return job_accepted_response(job)
 
     try:
-        sig_img = ContentFile(signature_bytes, name=f"sig_{attachment.id}_{int(time.time())}.png")
-        att_sig = OrderAttachmentSignature(
-            attachment=attachment,
-            signed_file=signed_file_content,
-            signature_image=sig_img,
-            signed_by=request.user
-        )
-        att_sig.save()
-
-        try:
-            add_audit_log(request.user, 'supporting_doc_signed', f"Signed supporting document for order {order.order_number}")
-        except Exception:
-            pass
-
-        return JsonResponse({
-            'success': True,
-            'message': 'Document signed successfully.',
-            'attachment_id': attachment_id,
-            'signed_at': att_sig.signed_at.isoformat(),
-            'signed_by': att_sig.signed_by.get_full_name() or att_sig.signed_by.username
-        })
+        att_sig = SigningService.sign_supporting_attachment(attachment, signature_bytes, user=request.user)
+    except SignatureEmbedError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"Failed to save signature: {e}")
         return JsonResponse({'success': False, 'error': 'Could not save the signed document.'}, status=400)
 
+    return JsonResponse({
+        'success': True,
+        'message': 'Document signed successfully.',
+        'attachment_id': attachment_id,
+        'signed_at': att_sig.signed_at.isoformat(),
+        'signed_by': att_sig.signed_by.get_full_name() or att_sig.signed_by.username
+    })
+
 
 @login_required
 def delete_order_attachment(request: HttpRequest, att_id: int):
@@ -4301,90 +4082,32 @@ def remove_invoice_link(request: HttpRequest, pk: int):
 
 
 
+def _export_response(request: HttpRequest, name: str):
+    """Stream export ``name`` (?format=csv|xlsx), or queue it as an 'export' job with ?async=true."""
+    fmt = request.GET.get('format', 'csv')
+    try:
+        if wants_async(request):
+            ExportService.check_format(fmt)
+            params = request.GET.copy()
+            params.pop('async', None)
+            job = JobService.enqueue('export', {'name': name, 'format': fmt, 'params': params.urlencode()}, user=request.user)
+            return job_accepted_response(job)
+        return ExportService.response(name, request.GET, request.user, fmt)
+    except ExportError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+
 @login_required
 def customers_export(request: HttpRequest):
-    q = request.GET.get('q','').strip()
-    qs = scope_queryset(Customer.objects.all().order_by('-registration_date'), request.user, request)
-    if q:
-        qs = qs.filter(full_name__icontains=q)
-    import csv
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="customers.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['Code','Name','Phone','Type','Visits','Last Visit'])
-    for c in qs.iterator():
-        writer.writerow([c.code, c.full_name, c.phone, c.customer_type, c.total_visits, c.last_visit.isoformat() if c.last_visit else '' ])
-    return response
+    return _export_response(request, 'customers')
 
 @login_required
 def orders_export(request: HttpRequest):
-    status = request.GET.get('status','all')
-    type_ = request.GET.get('type','all')
-    qs = scope_queryset(Order.objects.select_related('customer').order_by('-created_at'), request.user, request)
-    if status != 'all':
-        qs = qs.filter(status=status)
-    if type_ != 'all':
-        qs = qs.filter(type=type_)
-    import csv
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="orders.csv"'
-    writer = csv.writer(response)
-    writer.writerow(["Order","Customer","Type","Status","Priority","Created At"])
-    for o in qs.iterator():
-        writer.writerow([o.order_number, o.customer.full_name, o.type, o.status, o.priority, o.created_at.isoformat()])
-    return response
+    return _export_response(request, 'orders')
 
 @login_required
 def customer_groups_export(request: HttpRequest):
     """Export filtered customer group data to CSV"""
-    from datetime import timedelta
-    selected_group = request.GET.get('group', '')
-    time_period = request.GET.get('period', '6months')
-    today = timezone.now().date()
-    if time_period == '1month':
-        start_date = today - timedelta(days=30)
-    elif time_period == '3months':
-        start_date = today - timedelta(days=90)
-    elif time_period == '6months':
-        start_date = today - timedelta(days=180)
-    elif time_period == '1year':
-        start_date = today - timedelta(days=365)
-    else:
-        start_date = today - timedelta(days=180)
-
-    qs = scope_queryset(Customer.objects.all(), request.user, request).annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True),
-    )
-    if selected_group and selected_group in dict(Customer.TYPE_CHOICES):
-        qs = qs.filter(customer_type=selected_group)
-    import csv
-    resp = HttpResponse(content_type='text/csv')
-    resp['Content-Disposition'] = 'attachment; filename="customer_group.csv"'
-    w = csv.writer(resp)
-    w.writerow(['Code','Name','Phone','Type','Visits','Total Spent','Orders (period)','Service','Sales','inquiry','Completed (period)','Vehicles','Last Order'])
-    for c in qs.iterator():
-        w.writerow([
-            c.code,
-            c.full_name,
-            c.phone,
-            c.customer_type,
-            c.total_visits,
-            c.total_spent,
-            c.recent_orders_count,
-            c.service_orders,
-            c.sales_orders,
-            c.inquiry_orders,
-            c.completed_orders,
-            c.vehicles_count,
-            c.last_order_date.isoformat() if c.last_order_date else '',
-        ])
-    return resp
+    return _export_response(request, 'customer_groups')
 
 @login_required
 def profile(request: HttpRequest):
@@ -4841,20 +4564,16 @@ def api_notifications_summary(request: HttpRequest):
     from datetime import timedelta
     stock_threshold = int(request.GET.get('stock_threshold', 5) or 5)
 
-    # Normalize statuses once per request
-    _mark_overdue_orders()
-
     # Use timezone-aware date for consistency
     today_date = timezone.localdate()
     now = timezone.now()
     cutoff = now - timedelta(hours=24)
 
     # Today's visitors (customers who registered today OR have orders today)
-    from django.db.models import Q
     base_customers = scope_queryset(Customer.objects.all(), request.user, request)
     todays_qs = base_customers.filter(
-        Q(registration_date__date=today_date) |
-        Q(orders__created_at__date=today_date)
+        on_date('registration_date', today_date) |
+        on_date('orders__created_at', today_date)
     ).distinct().order_by('-registration_date')
     todays_count = todays_qs.count()
     todays = [{
@@ -5387,14 +5106,14 @@ def organization_management(request: HttpRequest):
         base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
 
     customers_qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True)
+        recent_orders_count=Count('orders', filter=since_date('orders__created_at', start_date)),
+        last_order_date=F('stats__last_order_at'),
+        service_orders=Count('orders', filter=Q(orders__type='service') & since_date('orders__created_at', start_date)),
+        sales_orders=Count('orders', filter=Q(orders__type='sales') & since_date('orders__created_at', start_date)),
+        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry') & since_date('orders__created_at', start_date)),
+        completed_orders=Count('orders', filter=Q(orders__status='completed') & since_date('orders__created_at', start_date)),
+        cancelled_orders=Count('orders', filter=Q(orders__status='cancelled') & since_date('orders__created_at', start_date)),
+        vehicles_count=Coalesce(F('stats__vehicle_count'), 0, output_field=IntegerField())
     )
 
     if status == 'returning':
@@ -5415,7 +5134,7 @@ def organization_management(request: HttpRequest):
     total_org = sum(counts.values()) if counts else 0
 
     # Charts
-    orders_scope = scope_queryset(Order.objects.filter(customer__in=base, created_at__date__gte=start_date), request.user, request)
+    orders_scope = scope_queryset(Order.objects.filter(since_date('created_at', start_date), customer__in=base), request.user, request)
     if status == 'returning':
         orders_scope = orders_scope.filter(customer__total_visits__gt=1)
     type_dist = {r['type']: r['c'] for r in orders_scope.values('type').annotate(c=Count('id'))}
@@ -5447,57 +5166,7 @@ def organization_management(request: HttpRequest):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def organization_export(request: HttpRequest):
-    org_types = ['government','ngo','company']
-    q = request.GET.get('q','').strip()
-    status = request.GET.get('status','')
-    time_period = request.GET.get('period','6months')
-    today = timezone.now().date()
-    if time_period == '1month':
-        start_date = today - timezone.timedelta(days=30)
-    elif time_period == '3months':
-        start_date = today - timezone.timedelta(days=90)
-    elif time_period == '1year':
-        start_date = today - timezone.timedelta(days=365)
-    else:
-        start_date = today - timezone.timedelta(days=180)
-
-    base = scope_queryset(Customer.objects.filter(customer_type__in=org_types), request.user, request)
-    if q:
-        base = base.filter(Q(full_name__icontains=q) | Q(phone__icontains=q) | Q(email__icontains=q) | Q(organization_name__icontains=q) | Q(code__icontains=q))
-    qs = base.annotate(
-        recent_orders_count=Count('orders', filter=Q(orders__created_at__date__gte=start_date)),
-        last_order_date=Max('orders__created_at'),
-        service_orders=Count('orders', filter=Q(orders__type='service', orders__created_at__date__gte=start_date)),
-        sales_orders=Count('orders', filter=Q(orders__type='sales', orders__created_at__date__gte=start_date)),
-        inquiry_orders=Count('orders', filter=Q(orders__type='inquiry', orders__created_at__date__gte=start_date)),
-        completed_orders=Count('orders', filter=Q(orders__status='completed', orders__created_at__date__gte=start_date)),
-        vehicles_count=Count('vehicles', distinct=True),
-    )
-    if status == 'returning':
-        qs = qs.filter(total_visits__gt=1)
-
-    import csv
-    resp = HttpResponse(content_type='text/csv')
-    resp['Content-Disposition'] = 'attachment; filename="organization_customers.csv"'
-    w = csv.writer(resp)
-    w.writerow(['Code','Organization','Contact','Phone','Type','Visits','Orders (period)','Service','Sales','Consult','Completed','Vehicles','Last Order'])
-    for c in qs.iterator():
-        w.writerow([
-            c.code,
-            c.organization_name or '',
-            c.full_name,
-            c.phone,
-            c.customer_type,
-            c.total_visits,
-            c.recent_orders_count,
-            c.service_orders,
-            c.sales_orders,
-            c.inquiry_orders,
-            c.completed_orders,
-            c.vehicles_count,
-            c.last_order_date.isoformat() if c.last_order_date else ''
-        ])
-    return resp
+    return _export_response(request, 'organizations')
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser or u.is_staff)
@@ -6080,11 +5749,15 @@ def api_inquiry_bulk_action(request: HttpRequest):
         inquiries = Order.objects.filter(pk__in=inquiry_ids, type='inquiry')
 
         if action == 'mark_resolved':
-            count = inquiries.update(status='completed', completed_at=timezone.now())
+            now = timezone.now()
+            count = inquiries.update(status='completed', completed_at=now, updated_at=now)
+            # Set-based updates bypass the model signals that keep CustomerStats current
+            CustomerStatsService.refresh_for_orders(inquiries)
             message = f'{count} inquiry(ies) marked as resolved'
 
         elif action == 'mark_pending':
-            count = inquiries.update(status='in_progress')
+            count = inquiries.update(status='in_progress', updated_at=timezone.now())
+            CustomerStatsService.refresh_for_orders(inquiries)
             message = f'{count} inquiry(ies) marked as pending'
 
         elif action == 'export_csv':
@@ -6259,56 +5932,43 @@ def system_settings(request: HttpRequest):
 @login_required
 @user_passes_test(lambda u: u.is_superuser)
 def audit_logs(request: HttpRequest):
+    from .models import AuditEvent
+    from .utils import flush_audit_log
+
     if request.method == 'POST' and request.POST.get('action') == 'clear':
         clear_audit_logs()
         add_audit_log(request.user, 'audit_logs_cleared', 'Cleared all audit logs')
         messages.success(request, 'Audit logs cleared')
         return redirect('tracker:audit_logs')
-    
+
+    # Make this worker's buffered events visible before querying
+    flush_audit_log()
+
     q = request.GET.get('q', '').strip()
     action_filter = request.GET.get('action', '').strip()
     user_filter = request.GET.get('user', '').strip()
-    
-    logs = get_audit_logs()
-    
-    if q or action_filter or user_filter:
-        filtered_logs = []
-        for log in logs:
-            # Convert all searchable fields to lowercase for case-insensitive search
-            log_user = str(log.get('user', '')).lower()
-            log_action = str(log.get('action', '')).lower()
-            log_description = str(log.get('description', '')).lower()
-            log_meta = str(log.get('meta', {})).lower()
-            
-            # Apply filters
-            matches = True
-            
-            # General search (q parameter)
-            if q:
-                q = q.lower()
-                if not (q in log_user or q in log_action or q in log_description or q in log_meta):
-                    matches = False
-            
-            # Action filter
-            if matches and action_filter:
-                if action_filter.lower() not in log_action:
-                    matches = False
-            
-            # User filter
-            if matches and user_filter:
-                if user_filter.lower() not in log_user:
-                    matches = False
-            
-            if matches:
-                filtered_logs.append(log)
-        logs = filtered_logs
-    
-    # Get unique actions and users for filter dropdowns
-    all_actions = sorted(set(log.get('action', '') for log in get_audit_logs() if log.get('action')))
-    all_users = sorted(set(log.get('user', '') for log in get_audit_logs() if log.get('user')))
-    
+
+    logs = AuditEvent.objects.only('timestamp', 'username', 'action', 'description', 'ip')
+    # Dropdown filters select exact values, served by the (action|username, timestamp) indexes
+    if action_filter:
+        logs = logs.filter(action=action_filter)
+    if user_filter:
+        logs = logs.filter(username=user_filter)
+    if q:
+        logs = logs.filter(
+            Q(username__icontains=q) | Q(action__icontains=q) | Q(description__icontains=q) | Q(ip__icontains=q)
+        )
+
+    paginator = Paginator(logs, 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Distinct values for filter dropdowns
+    all_actions = list(AuditEvent.objects.exclude(action='').order_by('action').values_list('action', flat=True).distinct())
+    all_users = list(AuditEvent.objects.exclude(username='').order_by('username').values_list('username', flat=True).distinct())
+
     context = {
-        'logs': logs,
+        'logs': page_obj,
+        'page_obj': page_obj,
         'q': q,
         'action_filter': action_filter,
         'user_filter': user_filter,
@@ -15,10 +15,11 @@ from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 
-from .models import Invoice, InvoiceLineItem, InvoicePayment, Order, Customer, Vehicle, InventoryItem
+from .models import Invoice, InvoiceLineItem, InvoicePayment, Order, Customer, InventoryItem
 from .forms import InvoiceLineItemForm, InvoicePaymentForm
 from .utils import get_user_branch
-from .services import OrderService, CustomerService, VehicleService
+from .services import OrderService, CustomerService, VehicleService, JobService
+from .views_jobs import job_accepted_response, wants_async
 
 logger = logging.getLogger(__name__)
 
@@ -91,57 +92,79 @@ def api_upload_extract_invoice(request):
       - selected_order_id: to link to an existing started order (when commit=true)
       - plate: plate number to match started order or create temp customer (when commit=true)
       - commit: 'true' to create Invoice + Items; otherwise only preview is returned.
+      - async: 'true' to queue the work and return 202 with a job id to poll
 
     When commit=true:
       - Links to an existing started order when possible, otherwise creates a new order for real customers.
       - Preserves extracted Net (subtotal), VAT (tax_amount) and Gross (total_amount). If no items were parsed,
         totals are kept as-is to ensure KPIs sum correctly.
     """
-    from tracker.utils.invoice_extractor import extract_from_bytes
-    import traceback
-
-    user_branch = get_user_branch(request.user)
-
     # Validate upload
     uploaded = request.FILES.get('file')
     if not uploaded:
         return JsonResponse({'success': False, 'message': 'No file uploaded'})
 
+    fields = {key: request.POST.get(key) for key in UPLOAD_FIELDS if request.POST.get(key) is not None}
+    if wants_async(request):
+        job = JobService.enqueue('upload_extract_invoice', {'filename': uploaded.name, 'fields': fields},
+                                 user=request.user, upload=uploaded)
+        return job_accepted_response(job)
+
     try:
         file_bytes = uploaded.read()
     except Exception as e:
         logger.error(f"Failed to read uploaded file: {e}")
         return JsonResponse({'success': False, 'message': 'Failed to read uploaded file'})
 
+    result = process_invoice_upload(file_bytes, uploaded.name, fields, request.user)
+    if result.get('redirect_url'):
+        result['redirect_url'] = request.build_absolute_uri(result['redirect_url'])
+    return JsonResponse(result)
+
+
+# POST fields of api_upload_extract_invoice that process_invoice_upload reads
+UPLOAD_FIELDS = ('commit', 'selected_order_id', 'plate', 'customer_id')
+
+
+def process_invoice_upload(file_bytes: bytes, filename: str, fields: dict, user) -> dict:
+    """
+    Extract an uploaded invoice and, with ``fields['commit'] == 'true'``, save it (see
+    api_upload_extract_invoice). Returns the JSON payload; shared by the view and the
+    'upload_extract_invoice' background job.
+    """
+    import traceback
+
+    user_branch = get_user_branch(user)
+
     # Run PDF text extractor (no OCR required)
     try:
         from tracker.utils.pdf_text_extractor import extract_from_bytes as extract_pdf_text
-        extracted = extract_pdf_text(file_bytes, uploaded.name if uploaded else 'document.pdf')
+        extracted = extract_pdf_text(file_bytes, filename or 'document.pdf')
     except Exception as e:
         logger.error(f"PDF extraction error: {e}\n{traceback.format_exc()}")
-        return JsonResponse({
+        return {
             'success': False,
             'message': 'Failed to extract invoice data from file',
             'error': str(e),
             'ocr_available': False
-        })
+        }
 
     # If extraction failed, return error but allow manual entry
     if not extracted.get('success'):
-        return JsonResponse({
+        return {
             'success': False,
             'message': extracted.get('message', 'Could not extract data from file. Please enter invoice details manually.'),
             'error': extracted.get('error'),
             'ocr_available': extracted.get('ocr_available', False),
             'data': extracted  # Include any partial data for manual completion
-        })
+        }
 
     header = extracted.get('header') or {}
     items = extracted.get('items') or []
     raw_text = extracted.get('raw_text') or ''
 
     # If commit flag not provided, return preview only
-    commit = str(request.POST.get('commit', '')).lower() == 'true'
+    commit = str(fields.get('commit', '')).lower() == 'true'
     if not commit:
         # Enrich items with category information for preview
         from tracker.views_invoice_upload import _get_item_code_categories
@@ -170,19 +193,19 @@ def api_upload_extract_invoice(request):
                 'color_class': category_info.get('color_class')
             })
 
-        return JsonResponse({
+        return {
             'success': True,
             'mode': 'preview',
             'header': header,
             'items': enriched_items,
             'raw_text': raw_text,
             'ocr_available': extracted.get('ocr_available', False)
-        })
+        }
 
     # Get identifiers from POST (commit path only)
-    selected_order_id = request.POST.get('selected_order_id') or None
-    plate = (request.POST.get('plate') or '').strip().upper() or None
-    customer_id = request.POST.get('customer_id') or None
+    selected_order_id = fields.get('selected_order_id') or None
+    plate = (fields.get('plate') or '').strip().upper() or None
+    customer_id = fields.get('customer_id') or None
 
     # Try to load the selected order first
     selected_order = None
@@ -267,10 +290,7 @@ def api_upload_extract_invoice(request):
     # Priority 4: Try to find customer by plate number (via vehicles)
     if not customer_obj and plate:
         try:
-            vehicle = Vehicle.objects.filter(
-                plate_number__iexact=plate,
-                customer__branch=user_branch
-            ).select_related('customer').first()
+            vehicle = VehicleService.find_vehicle_by_plate(plate, branch=user_branch)
             if vehicle and vehicle.customer:
                 customer_obj = vehicle.customer
         except Exception as e:
@@ -280,12 +300,12 @@ def api_upload_extract_invoice(request):
     # If still no customer, return extraction data for manual review
     if not customer_obj:
         logger.warning("No customer found for invoice upload. Extraction data returned for manual review.")
-        return JsonResponse({
+        return {
             'success': False,
             'message': 'Could not identify customer from invoice or provided data. Please enter customer details manually.',
             'data': extracted,
             'ocr_available': extracted.get('ocr_available', False)
-        })
+        }
 
     # Ensure vehicle if plate
     vehicle = None
@@ -436,7 +456,7 @@ def api_upload_extract_invoice(request):
         # Log the extracted amounts for debugging
         logger.info(f"Invoice extraction: subtotal={inv.subtotal}, tax={inv.tax_amount}, total={inv.total_amount}")
 
-        inv.created_by = request.user
+        inv.created_by = user if getattr(user, 'is_authenticated', False) else None
         if not getattr(inv, 'invoice_number', None):
             inv.generate_invoice_number()
         inv.save()
@@ -444,8 +464,8 @@ def api_upload_extract_invoice(request):
         # Persist uploaded document into invoice.document for traceability
         try:
             from django.core.files.base import ContentFile
-            filename = (uploaded.name if uploaded and getattr(uploaded, 'name', None) else f"invoice_{inv.invoice_number}.pdf")
-            if 'file_bytes' in locals() and file_bytes:
+            filename = filename or f"invoice_{inv.invoice_number}.pdf"
+            if file_bytes:
                 inv.document.save(filename, ContentFile(file_bytes), save=True)
         except Exception:
             # Non-fatal: continue without blocking invoice creation
@@ -663,27 +683,25 @@ def api_upload_extract_invoice(request):
 
         # Redirect to order_detail if order exists, otherwise to invoice_detail
         if order:
-            redirect_url = request.build_absolute_uri(f'/tracker/orders/{order.id}/')
+            redirect_url = f'/tracker/orders/{order.id}/'
         else:
-            redirect_url = request.build_absolute_uri(f'/tracker/invoices/{inv.id}/')
+            redirect_url = f'/tracker/invoices/{inv.id}/'
 
-        return JsonResponse({
+        return {
             'success': True,
             'message': reused_message,
             'invoice_id': inv.id,
             'invoice_number': inv.invoice_number,
             'redirect_url': redirect_url
-        })
+        }
 
     except Exception as e:
         logger.error(f"Error saving invoice from extraction: {e}\n{traceback.format_exc()}")
-        return JsonResponse({
+        return {
             'success': False,
             'message': 'Failed to save invoice',
             'error': str(e)
-        })
-
-
+        }
 
 
 @login_required
@@ -21,7 +21,8 @@ from django.db import transaction
 
 from .models import Order, Customer, Vehicle, Invoice, InvoiceLineItem, InvoicePayment, Branch
 from .utils import get_user_branch
-from .services import OrderService, CustomerService, VehicleService
+from .services import OrderService, CustomerService, VehicleService, JobService
+from .views_jobs import job_accepted_response, wants_async
 
 logger = logging.getLogger(__name__)
 
@@ -154,68 +155,34 @@ def _get_item_code_categories(item_codes):
     return result
 
 
-@login_required
-@require_http_methods(["POST"])
-def api_extract_invoice_preview(request):
+def build_extraction_preview(file_bytes: bytes, filename: str) -> dict:
     """
-    Step 1: Extract invoice data from uploaded PDF for preview.
-    Returns extracted customer, order, and payment information.
-    Does NOT create any records yet.
-
-    POST fields:
-      - file: PDF file to extract
-      - selected_order_id (optional): Started order ID to link to
-      - plate (optional): Vehicle plate number
-
-    Returns:
-      - success: true/false
-      - header: Customer and payment info {invoice_no, customer_name, address, date, subtotal, tax, total}
-      - items: Line items [{description, qty, value, code, category, order_type, color_class}]
-      - raw_text: Full extracted text for reference
-      - message: Error/status message
+    Extract an uploaded invoice and build the preview payload returned by
+    api_extract_invoice_preview (also run by the 'extract_invoice_preview' background job).
     """
-    user_branch = get_user_branch(request.user)
-
-    # Validate file upload
-    uploaded = request.FILES.get('file')
-    if not uploaded:
-        return JsonResponse({
-            'success': False,
-            'message': 'No file uploaded'
-        })
-
-    try:
-        file_bytes = uploaded.read()
-    except Exception as e:
-        logger.error(f"Failed to read uploaded file: {e}")
-        return JsonResponse({
-            'success': False,
-            'message': 'Failed to read uploaded file'
-        })
-
     # Extract text from PDF (non-OCR extractor with filename)
     try:
         from tracker.utils.pdf_text_extractor import extract_from_bytes as extract_pdf_text
-        extracted = extract_pdf_text(file_bytes, uploaded.name)
+        extracted = extract_pdf_text(file_bytes, filename)
     except Exception as e:
         logger.error(f"PDF extraction error: {e}")
-        return JsonResponse({
+        return {
             'success': False,
             'message': f'Failed to extract invoice data: {str(e)}',
             'error': str(e)
-        })
+        }
 
     # If extraction failed - still return partial data for manual completion
     if not extracted.get('success'):
         logger.info(f"Extraction failed: {extracted.get('error')} - {extracted.get('message')}")
-        return JsonResponse({
+        return {
             'success': False,
             'message': extracted.get('message', 'Could not extract data from PDF. Please enter invoice details manually.'),
             'error': extracted.get('error'),
             'raw_text': extracted.get('raw_text', ''),
             'header': extracted.get('header', {}),
             'items': extracted.get('items', [])
-        })
+        }
 
     # Return extracted preview data
     header = extracted.get('header') or {}
@@ -247,7 +214,7 @@ def api_extract_invoice_preview(request):
             'color_class': category_info.get('color_class')
         })
 
-    return JsonResponse({
+    return {
         'success': True,
         'message': 'Invoice data extracted successfully',
         'header': {
@@ -276,7 +243,55 @@ def api_extract_invoice_preview(request):
         },
         'items': enriched_items,
         'raw_text': extracted.get('raw_text', '')
-    })
+    }
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_extract_invoice_preview(request):
+    """
+    Step 1: Extract invoice data from uploaded PDF for preview.
+    Returns extracted customer, order, and payment information.
+    Does NOT create any records yet.
+
+    POST fields:
+      - file: PDF file to extract
+      - selected_order_id (optional): Started order ID to link to
+      - plate (optional): Vehicle plate number
+      - async (optional): 'true' to queue extraction and return 202 with a job id to poll
+
+    Returns:
+      - success: true/false
+      - header: Customer and payment info {invoice_no, customer_name, address, date, subtotal, tax, total}
+      - items: Line items [{description, qty, value, code, category, order_type, color_class}]
+      - raw_text: Full extracted text for reference
+      - message: Error/status message
+    """
+    user_branch = get_user_branch(request.user)
+
+    # Validate file upload
+    uploaded = request.FILES.get('file')
+    if not uploaded:
+        return JsonResponse({
+            'success': False,
+            'message': 'No file uploaded'
+        })
+
+    # Large scans can take seconds to parse; with async=1 the worker extracts them instead
+    if wants_async(request):
+        job = JobService.enqueue('extract_invoice_preview', {'filename': uploaded.name}, user=request.user, upload=uploaded)
+        return job_accepted_response(job)
+
+    try:
+        file_bytes = uploaded.read()
+    except Exception as e:
+        logger.error(f"Failed to read uploaded file: {e}")
+        return JsonResponse({
+            'success': False,
+            'message': 'Failed to read uploaded file'
+        })
+
+    return JsonResponse(build_extraction_preview(file_bytes, uploaded.name))
 
 
 @login_required
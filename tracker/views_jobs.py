@@ -0,0 +1,74 @@
+"""
+Background job endpoints.
+
+Slow endpoints accept ``async=true`` and answer 202 with a job id instead of doing the
+work in the web worker; clients poll api_job_status until the job has finished.
+"""
+
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import BackgroundJob
+from .services import JobService
+
+logger = logging.getLogger(__name__)
+
+
+def wants_async(request: HttpRequest) -> bool:
+    """True when the client asked for the work to be queued (POST or GET ``async``)."""
+    value = request.POST.get('async') or request.GET.get('async') or ''
+    return str(value).strip().lower() in {'1', 'true', 'yes'}
+
+
+def job_accepted_response(job: BackgroundJob) -> JsonResponse:
+    """202 response pointing the client at the job's status endpoint."""
+    return JsonResponse({
+        'success': True,
+        'queued': True,
+        'job_id': job.pk,
+        'status': job.status,
+        'status_url': reverse('tracker:api_job_status', args=[job.pk]),
+    }, status=202)
+
+
+def _visible_jobs(user):
+    qs = BackgroundJob.objects.all()
+    if getattr(user, 'is_superuser', False):
+        return qs
+    return qs.filter(created_by=user)
+
+
+@login_required
+def api_job_status(request: HttpRequest, job_id: int):
+    """Status, progress and (once finished) the result or error of one job."""
+    job = get_object_or_404(_visible_jobs(request.user), pk=job_id)
+    return JsonResponse(JobService.status_payload(job))
+
+
+@login_required
+def api_jobs_list(request: HttpRequest):
+    """The current user's most recent jobs (optionally ?kind= and ?status=), newest first."""
+    qs = BackgroundJob.objects.filter(created_by=request.user)
+    kind = (request.GET.get('kind') or '').strip()
+    status = (request.GET.get('status') or '').strip()
+    if kind:
+        qs = qs.filter(kind=kind)
+    if status:
+        qs = qs.filter(status=status)
+    jobs = [JobService.status_payload(job, include_result=False) for job in qs.order_by('-created_at')[:20]]
+    return JsonResponse({'success': True, 'jobs': jobs})
+
+
+@login_required
+def api_job_download(request: HttpRequest, job_id: int):
+    """The file a finished export job stored."""
+    job = get_object_or_404(_visible_jobs(request.user), pk=job_id, kind='export', status='succeeded')
+    path = (job.result or {}).get('file') if isinstance(job.result, dict) else None
+    if not path or not default_storage.exists(path):
+        raise Http404('Export file not found')
+    return FileResponse(default_storage.open(path, 'rb'), as_attachment=True, filename=job.result.get('filename'))
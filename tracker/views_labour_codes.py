@@ -1,23 +1,18 @@
-import csv
 import io
 import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db import transaction, models
+from django.db import models
 from django.views.decorators.http import require_http_methods
 from .models import LabourCode
 from .forms import LabourCodeForm, LabourCodeCSVImportForm
+from .services import LabourCodeImportService
+from .services.labour_code_import_service import LabourCodeImportError
 
 logger = logging.getLogger(__name__)
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
 
 @login_required
 @permission_required('tracker.view_labourcode', raise_exception=True)
@@ -166,21 +161,30 @@ def labour_codes_import(request):
             if form.is_valid():
                 import_file = request.FILES.get('import_file')
                 clear_existing = form.cleaned_data.get('clear_existing', False)
+                dry_run = form.cleaned_data.get('dry_run', False)
 
                 if import_file:
                     try:
                         # Determine file type based on filename
                         filename = import_file.name.lower()
                         if filename.endswith('.xlsx') or filename.endswith('.xls'):
-                            import_stats = _process_excel_import(import_file, clear_existing)
+                            import_stats = _process_excel_import(import_file, clear_existing, dry_run)
                         else:
-                            import_stats = _process_csv_import(import_file, clear_existing)
+                            import_stats = _process_csv_import(import_file, clear_existing, dry_run)
 
-                        if import_stats['success']:
+                        if import_stats['success'] and import_stats['dry_run']:
+                            messages.info(
+                                request,
+                                f"Dry run - nothing was saved. Would create: {import_stats['created']}, "
+                                f"update: {import_stats['updated']}, delete: {import_stats['deleted']}, "
+                                f"errors: {import_stats['errors']}"
+                            )
+                        elif import_stats['success']:
                             messages.success(
                                 request,
                                 f"Import completed! Created: {import_stats['created']}, "
                                 f"Updated: {import_stats['updated']}, "
+                                f"Deleted: {import_stats['deleted']}, "
                                 f"Errors: {import_stats['errors']}"
                             )
                             if import_stats['error_details']:
@@ -204,205 +208,28 @@ def labour_codes_import(request):
     return render(request, 'tracker/labour_codes_import.html', context)
 
 
-def _process_excel_import(excel_file, clear_existing=False):
+def _process_excel_import(excel_file, clear_existing=False, dry_run=False):
     """Process Excel file (.xlsx, .xls) and import labour codes"""
-    if not PANDAS_AVAILABLE:
-        return {
-            'success': False,
-            'error_message': 'Excel import requires pandas library. Please contact administrator.',
-        }
-
-    try:
-        # Read Excel file using pandas
-        try:
-            df = pd.read_excel(excel_file, sheet_name=0)
-        except Exception as e:
-            logger.error(f"Failed to read Excel file: {str(e)}")
-            return {
-                'success': False,
-                'error_message': f'Failed to read Excel file: {str(e)}',
-            }
-
-        if df.empty:
-            return {
-                'success': False,
-                'error_message': 'Excel file is empty.',
-            }
-
-        # Normalize column names (lowercase, strip whitespace)
-        df.columns = [col.strip().lower() for col in df.columns]
-
-        # Check required columns
-        required_cols = {'code', 'description', 'category'}
-        excel_cols = set(df.columns)
-
-        if not required_cols.issubset(excel_cols):
-            return {
-                'success': False,
-                'error_message': f'Excel must contain columns: code, description, category. Found: {", ".join(df.columns)}',
-            }
-
-        with transaction.atomic():
-            if clear_existing:
-                LabourCode.objects.all().delete()
-
-            created_count = 0
-            updated_count = 0
-            error_details = []
-
-            for row_num, row in df.iterrows():
-                try:
-                    code = str(row.get('code', '')).strip().upper()
-                    description = str(row.get('description', '')).strip()
-                    category = str(row.get('category', '')).strip().lower()
-                    is_active = True
-
-                    # Check for is_active column if present
-                    if 'is_active' in df.columns:
-                        is_active_val = row.get('is_active', 'true')
-                        is_active = str(is_active_val).lower() in ['true', '1', 'yes', 'active']
-
-                    # Validate required fields
-                    if not code or code == 'nan':
-                        error_details.append(f"Row {row_num + 2}: Code is required")
-                        continue
-
-                    if not description or description == 'nan':
-                        error_details.append(f"Row {row_num + 2}: Description is required")
-                        continue
+    return _run_import(LabourCodeImportService.read_excel, excel_file, clear_existing, dry_run)
 
-                    if not category or category == 'nan':
-                        error_details.append(f"Row {row_num + 2}: Category is required")
-                        continue
-
-                    # Create or update labour code
-                    obj, created = LabourCode.objects.update_or_create(
-                        code=code,
-                        defaults={
-                            'description': description,
-                            'category': category,
-                            'is_active': is_active,
-                        }
-                    )
-
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-
-                except Exception as e:
-                    error_details.append(f"Row {row_num + 2}: {str(e)}")
-                    logger.error(f"Error processing row {row_num + 2}: {str(e)}")
-
-        logger.info(f"Excel import completed: Created={created_count}, Updated={updated_count}, Errors={len(error_details)}")
-
-        return {
-            'success': True,
-            'created': created_count,
-            'updated': updated_count,
-            'errors': len(error_details),
-            'error_details': error_details,
-        }
 
-    except Exception as e:
-        logger.error(f"Error processing Excel file: {str(e)}", exc_info=True)
-        return {
-            'success': False,
-            'error_message': f'Error processing Excel file: {str(e)}',
-        }
-
-
-def _process_csv_import(csv_file, clear_existing=False):
+def _process_csv_import(csv_file, clear_existing=False, dry_run=False):
     """Process CSV file and import labour codes"""
-    try:
-        # Read CSV file
-        if isinstance(csv_file, str):
-            csv_content = csv_file
-        else:
-            csv_content = csv_file.read().decode('utf-8-sig')
-
-        # Parse CSV
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
-
-        if not csv_reader.fieldnames:
-            return {
-                'success': False,
-                'error_message': 'CSV file is empty or invalid format',
-            }
-
-        # Check required columns
-        required_cols = {'code', 'description', 'category'}
-        csv_cols = set(col.strip().lower() for col in csv_reader.fieldnames)
-
-        if not required_cols.issubset(csv_cols):
-            return {
-                'success': False,
-                'error_message': f'CSV must contain columns: code, description, category. Found: {", ".join(csv_reader.fieldnames)}',
-            }
-
-        with transaction.atomic():
-            if clear_existing:
-                LabourCode.objects.all().delete()
-
-            created_count = 0
-            updated_count = 0
-            error_details = []
-
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    code = row.get('code', '').strip().upper()
-                    description = row.get('description', '').strip()
-                    category = row.get('category', '').strip().lower()
-                    is_active = row.get('is_active', 'true').lower() in ['true', '1', 'yes']
-
-                    # Validate required fields
-                    if not code:
-                        error_details.append(f"Row {row_num}: Code is required")
-                        continue
-
-                    if not description:
-                        error_details.append(f"Row {row_num}: Description is required")
-                        continue
-
-                    if not category:
-                        error_details.append(f"Row {row_num}: Category is required")
-                        continue
+    if isinstance(csv_file, str):
+        csv_file = io.StringIO(csv_file)
+    return _run_import(LabourCodeImportService.read_csv, csv_file, clear_existing, dry_run)
 
-                    # Create or update labour code
-                    obj, created = LabourCode.objects.update_or_create(
-                        code=code,
-                        defaults={
-                            'description': description,
-                            'category': category,
-                            'is_active': is_active,
-                        }
-                    )
-
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-
-                except Exception as e:
-                    error_details.append(f"Row {row_num}: {str(e)}")
-
-        logger.info(f"CSV import completed: Created={created_count}, Updated={updated_count}, Errors={len(error_details)}")
 
-        return {
-            'success': True,
-            'created': created_count,
-            'updated': updated_count,
-            'errors': len(error_details),
-            'error_details': error_details,
-        }
-
-    except UnicodeDecodeError:
+def _run_import(read, import_file, clear_existing, dry_run):
+    try:
+        return LabourCodeImportService.import_frame(read(import_file), clear_existing=clear_existing, dry_run=dry_run)
+    except LabourCodeImportError as e:
         return {
             'success': False,
-            'error_message': 'File encoding error. Please use UTF-8 encoded CSV files.',
+            'error_message': str(e),
         }
     except Exception as e:
-        logger.error(f"Error processing CSV file: {str(e)}", exc_info=True)
+        logger.error(f"Error processing import file: {str(e)}", exc_info=True)
         return {
             'success': False,
             'error_message': f'Error processing file: {str(e)}',
@@ -15,12 +15,22 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db import transaction
 
-from .models import Order, Customer, Vehicle, Branch, ServiceType, ServiceAddon, InventoryItem, Invoice, InvoiceLineItem
+from .models import Order, Customer, Branch, ServiceType, ServiceAddon, InventoryItem, Invoice, InvoiceLineItem
 from .utils import get_user_branch, scope_queryset
-from .services import OrderService
+from .utils.mysql_compat import on_date
+from .services import OrderService, VehicleService
 
 logger = logging.getLogger(__name__)
 
+# Cards shown on the started-orders board; narrower filters are needed to see the rest
+STARTED_BOARD_LIMIT = 200
+
+# ?since= is moved back by this much so writes committed just after the previous poll
+# took its timestamp are not missed (cards sent twice are simply replaced)
+STARTED_CHANGES_OVERLAP_SECONDS = 5
+
+ACTIVE_ORDER_STATUSES = ['created', 'in_progress', 'overdue']
+
 
 @login_required
 @require_http_methods(["POST"])
@@ -79,7 +89,7 @@ def api_start_order(request):
             # (if customer is pre-selected or force_new_order is True, allow creating new order with same plate)
             existing_vehicle = None
             if plate_number and not existing_customer_id and not force_new_order:
-                existing_vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
+                existing_vehicle = VehicleService.find_vehicle_by_plate(plate_number, branch=user_branch)
                 if existing_vehicle:
                     # Check if there's already a started (in_progress) order for this vehicle
                     existing_order = Order.objects.filter(
@@ -239,7 +249,7 @@ def api_check_plate(request):
             return JsonResponse({'found': False})
 
         user_branch = get_user_branch(request.user)
-        vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
+        vehicle = VehicleService.find_vehicle_by_plate(plate_number, branch=user_branch)
         if not vehicle:
             return JsonResponse({'found': False})
 
@@ -287,20 +297,12 @@ def api_service_types(request):
         }, status=500)
 
 
-@login_required
-def started_orders_dashboard(request):
+def _started_board(request):
     """
-    Display all started orders for the current branch.
-    Shows orders that have been initiated and are being managed, regardless of creation method.
-    Supports filtering by status and includes all orders (created, in_progress, completed, etc).
-    Grouped by plate number for easy continuation.
-
-    GET params:
-    - status: Filter by order status (default: shows created, in_progress, completed from today/recent)
-    - sort_by: Sort orders by 'started_at', 'plate_number', 'order_type' (default: '-started_at')
-    - search: Search by plate number or customer name
+    Return (base_orders, board_filter, orders) for the started-orders board: the user's
+    scoped orders, the Q selecting the board's cards, and the sorted card queryset.
     """
-    from django.db.models import Q, Count
+    from django.db.models import Q
 
     status_filter = request.GET.get('status', '')
     sort_by = request.GET.get('sort_by', '-started_at')
@@ -309,81 +311,144 @@ def started_orders_dashboard(request):
     # Build base queryset: scope to user's branch/permissions
     base_orders = scope_queryset(Order.objects.all(), request.user, request)
 
-    # Apply status filter
     if status_filter:
         # Specific status requested
-        orders = base_orders.filter(status=status_filter).select_related('customer', 'vehicle')
+        board_filter = Q(status=status_filter)
     else:
         # Default: show active orders (created/in_progress/overdue) + completed from today
-        today = timezone.now().date()
-        orders = base_orders.filter(
-            Q(status__in=['created', 'in_progress', 'overdue']) |  # All active orders (including overdue)
-            Q(status='completed', completed_at__date=today)  # Completed today
-        ).select_related('customer', 'vehicle')
+        board_filter = Q(status__in=ACTIVE_ORDER_STATUSES) | (
+            Q(status='completed') & on_date('completed_at', timezone.localdate())
+        )
 
     # Apply search filter
     if search_query:
-        orders = orders.filter(
-            Q(vehicle__plate_number__icontains=search_query) |
-            Q(customer__full_name__icontains=search_query)
-        )
+        board_filter &= Q(vehicle__plate_number__icontains=search_query) | Q(customer__full_name__icontains=search_query)
 
-    # Apply sorting (handle related fields properly)
+    orders = base_orders.filter(board_filter).select_related('customer', 'vehicle')
+
+    # Apply sorting (handle related fields properly); plates keep their orders together by start time
     if sort_by == 'plate_number':
-        orders = orders.order_by('vehicle__plate_number')
+        orders = orders.order_by('vehicle__plate_number', 'started_at', 'id')
     elif sort_by == 'type':
-        orders = orders.order_by('type')
+        orders = orders.order_by('type', '-started_at', '-id')
     elif sort_by == 'started_at':
-        orders = orders.order_by('started_at')
-    elif sort_by == '-started_at':
-        orders = orders.order_by('-started_at')
+        orders = orders.order_by('started_at', 'id')
     else:
         # Default: sort by newest first
-        orders = orders.order_by('-started_at')
-
-    # Group orders by plate number
-    orders_by_plate = {}
-    for order in orders:
-        plate = order.vehicle.plate_number if order.vehicle else 'Unknown'
-        if plate not in orders_by_plate:
-            orders_by_plate[plate] = []
-        orders_by_plate[plate].append(order)
-
-    # Calculate statistics
-    # Total started orders: all active statuses (created, in_progress, overdue)
-    total_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue']
-    ).count()
-
-    # Orders started today: those created today (before or after auto-progression)
-    today = timezone.now().date()
-    today_started = base_orders.filter(
-        status__in=['created', 'in_progress', 'overdue'],
-        created_at__date=today
-    ).count()
+        orders = orders.order_by('-started_at', '-id')
+    return base_orders, board_filter, orders
+
+
+def _started_board_kpis(base_orders, board_filter) -> dict:
+    """Board tiles: one conditional aggregate plus the grouped repeated-vehicles count."""
+    from django.db.models import Count, Q
+
+    today_created = on_date('created_at', timezone.localdate())
+    active = Q(status__in=ACTIVE_ORDER_STATUSES)
+    totals = base_orders.aggregate(
+        # Total started orders: all active statuses (created, in_progress, overdue)
+        total_started=Count('id', filter=active),
+        # Orders started today: those created today (before or after auto-progression)
+        today_started=Count('id', filter=active & today_created),
+        # Plates on the board; orders without a vehicle share one 'Unknown' plate
+        plates=Count('vehicle__plate_number', distinct=True, filter=board_filter),
+        without_vehicle=Count('id', filter=board_filter & Q(vehicle__isnull=True)),
+    )
 
     # Calculate repeated vehicles today (vehicles with 2+ orders created today)
-    today_orders = base_orders.filter(
-        created_at__date=today,
-        vehicle__isnull=False
-    ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-    repeated_vehicles_today = today_orders.count()
+    repeated_vehicles_today = base_orders.filter(today_created, vehicle__isnull=False).values(
+        'vehicle__plate_number'
+    ).annotate(order_count=Count('id')).filter(order_count__gte=2).count()
 
-    context = {
-        'orders': orders,
-        'orders_by_plate': orders_by_plate,
-        'total_started': total_started,
-        'today_started': today_started,
+    return {
+        'total_started': totals['total_started'],
+        'today_started': totals['today_started'],
         'repeated_vehicles_today': repeated_vehicles_today,
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'sort_by': sort_by,
+        'unique_plates': totals['plates'] + (1 if totals['without_vehicle'] else 0),
+    }
+
+
+@login_required
+def started_orders_dashboard(request):
+    """
+    Display all started orders for the current branch.
+    Shows orders that have been initiated and are being managed, regardless of creation method.
+    Supports filtering by status and includes all orders (created, in_progress, completed, etc).
+    At most STARTED_BOARD_LIMIT cards are shown; the page then polls
+    api_started_orders_changes for updates instead of reloading.
+
+    GET params:
+    - status: Filter by order status (default: shows created, in_progress, completed from today/recent)
+    - sort_by: Sort orders by 'started_at', 'plate_number', 'order_type' (default: '-started_at')
+    - search: Search by plate number or customer name
+    """
+    board_time = timezone.now()
+    base_orders, board_filter, orders = _started_board(request)
+    orders = list(orders[:STARTED_BOARD_LIMIT + 1])
+    board_truncated = len(orders) > STARTED_BOARD_LIMIT
+
+    context = {
+        'orders': orders[:STARTED_BOARD_LIMIT],
+        'board_truncated': board_truncated,
+        'board_time': board_time.isoformat(),
+        **_started_board_kpis(base_orders, board_filter),
+        'search_query': request.GET.get('search', '').strip(),
+        'status_filter': request.GET.get('status', ''),
+        'sort_by': request.GET.get('sort_by', '-started_at'),
         'title': 'Started Orders',
     }
 
     return render(request, 'tracker/started_orders_dashboard.html', context)
 
 
+@login_required
+def api_started_orders_changes(request):
+    """
+    Incremental refresh for the started-orders board.
+
+    GET params: the board's own filters plus ``since`` (the ``board_time`` of the previous
+    response or of the page). Returns the rendered cards of board orders written since
+    then, the ids currently on the board (so the client can drop orders that left it) and
+    the tiles when any order in scope changed.
+    """
+    from datetime import timedelta
+    from django.template.loader import render_to_string
+    from django.utils.dateparse import parse_datetime
+
+    try:
+        since = parse_datetime(request.GET.get('since') or '')
+    except ValueError:
+        since = None
+    if since is None:
+        return JsonResponse({'success': False, 'error': 'since must be an ISO timestamp'}, status=400)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    changed_since = since - timedelta(seconds=STARTED_CHANGES_OVERLAP_SECONDS)
+
+    board_time = timezone.now()
+    base_orders, board_filter, orders = _started_board(request)
+    visible_ids = list(orders.values_list('id', flat=True)[:STARTED_BOARD_LIMIT])
+    changed = [
+        {
+            'id': order.id,
+            'status': order.status,
+            'html': render_to_string('tracker/partials/started_order_card.html', {'order': order}, request=request),
+        }
+        for order in orders.filter(updated_at__gte=changed_since, id__in=visible_ids)
+    ]
+    kpis = None
+    if changed or base_orders.filter(updated_at__gte=changed_since).exists():
+        kpis = _started_board_kpis(base_orders, board_filter)
+
+    return JsonResponse({
+        'success': True,
+        'board_time': board_time.isoformat(),
+        'changed': changed,
+        'visible_ids': visible_ids,
+        'kpis': kpis,
+    })
+
+
 @login_required
 def started_order_detail(request, order_id):
     """
@@ -1051,27 +1116,25 @@ def api_record_overrun_reason(request, order_id):
 def api_started_orders_kpis(request):
     """API endpoint to get KPI stats for started orders dashboard (for AJAX updates)."""
     try:
-        from django.db.models import Count
+        from django.db.models import Count, Q, Sum
+        from .models import DailyBranchMetrics
+        from .services.metrics_service import STARTED_STATUSES
         user_branch = get_user_branch(request.user)
 
-        # Total started orders: both 'created' (just initiated) and 'in_progress' (being worked on)
-        total_started = Order.objects.filter(
-            branch=user_branch,
-            status__in=['created', 'in_progress']
-        ).count()
-
-        # Orders started today: those created today
-        today = timezone.now().date()
-        today_started = Order.objects.filter(
-            branch=user_branch,
-            created_at__date=today,
-            status__in=['created', 'in_progress']
-        ).count()
+        # Started orders ('created' just initiated, 'in_progress' being worked on), read from the
+        # daily rollup: total across all days plus today's share, in one aggregate
+        today = timezone.localdate()
+        started = DailyBranchMetrics.objects.filter(branch=user_branch, status__in=STARTED_STATUSES).aggregate(
+            total=Sum('order_count'),
+            today=Sum('order_count', filter=Q(day=today)),
+        )
+        total_started = started['total'] or 0
+        today_started = started['today'] or 0
 
         # Calculate repeated vehicles today (vehicles with 2+ orders created today)
         today_orders = Order.objects.filter(
+            on_date('created_at', today),
             branch=user_branch,
-            created_at__date=today,
             vehicle__isnull=False
         ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
         repeated_vehicles_today = today_orders.count()